@@ -0,0 +1,94 @@
+"""
+Export time of the moviepy backend against the native ffmpeg filter-graph backend.
+
+Synthetic clips (test pattern and a sine tone) are generated with the bundled ffmpeg, then the same timeline is
+rendered by both backends with the same encoding profile. The moviepy run is what ConcatEngine does for it:
+lazy clips, concatenate_videoclips and write_videofile, frames passing through Python. The ffmpeg run is one
+FfmpegGraphRenderer process. Wall time, speed against real time and the speed-up are reported per method.
+The ffmpeg backend probes the sources with ffprobe, it has to be on PATH or next to the bundled ffmpeg.
+
+    python -m benchmarks.render_backends [--clips 4] [--duration 10] [--size 1280x720] [--methods chain compose]
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+import imageio_ffmpeg
+from moviepy.video.compositing import CompositeVideoClip
+
+from src.render import FfmpegGraphRenderer
+from src.schemas import ClipMetaData, EncodingProfile
+from src.workers.concatenator import ClipContentProvider
+
+BENCH_PRESET = 'veryfast'
+
+
+def make_clips(folder: str, count: int, duration_s: float, width: int, height: int) -> list[ClipMetaData]:
+    """ Test pattern clips with a tone, every other one a bit smaller, so 'compose' has clips to center """
+    clips = []
+    for idx in range(count):
+        clip_width, clip_height = (width, height) if idx % 2 == 0 else (width * 3 // 4, height * 3 // 4)
+        file_path = os.path.join(folder, f'bench_clip_{idx:02d}.mp4')
+        command = [imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+                   '-f', 'lavfi', '-i', f'testsrc2=size={clip_width}x{clip_height}:rate=30:duration={duration_s}',
+                   '-f', 'lavfi', '-i', f'sine=frequency={220 * (idx + 1)}:sample_rate=44100:duration={duration_s}',
+                   '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-shortest',
+                   file_path]
+        subprocess.run(command, check=True)
+        clips.append(ClipMetaData(file_path, duration_s, clip_width, clip_height))
+    return clips
+
+
+def render_moviepy(clips: list[ClipMetaData], file_path: str, method: str, profile: EncodingProfile):
+    content_provider = ClipContentProvider(clips)
+    try:
+        if method == 'chain':
+            video_clips = content_provider.create_lazy_video_clips()
+        else:
+            video_clips = content_provider.create_video_clips()
+        (CompositeVideoClip
+         .concatenate_videoclips(video_clips, method=method)
+         .write_videofile(file_path, codec=profile.video_codec, audio_codec=profile.audio_codec,
+                          audio_bitrate=profile.audio_bitrate, preset=profile.preset,
+                          ffmpeg_params=['-crf', str(profile.crf), '-pix_fmt', profile.pix_fmt], logger=None))
+    finally:
+        content_provider.close()
+
+
+def render_ffmpeg(clips: list[ClipMetaData], file_path: str, method: str, profile: EncodingProfile):
+    FfmpegGraphRenderer(clips, file_path, method, profile).render()
+
+
+def timed(render, clips: list[ClipMetaData], file_path: str, method: str, profile: EncodingProfile) -> float:
+    started = time.perf_counter()
+    render(clips, file_path, method, profile)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares export time of the moviepy and ffmpeg backends')
+    parser.add_argument('--clips', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of every clip')
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--methods', nargs='+', default=['chain', 'compose'], choices=['chain', 'compose'])
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.split('x'))
+    profile = EncodingProfile(preset=BENCH_PRESET)
+    with tempfile.TemporaryDirectory() as folder:
+        clips = make_clips(folder, args.clips, args.duration, width, height)
+        timeline_s = sum(clip.duration_s for clip in clips)
+        print(f'{len(clips)} clips, {timeline_s:.0f}s of {args.size} video, preset {profile.preset}, '
+              f'{os.cpu_count()} cpus')
+        print(f"  {'method':<10}{'moviepy s':>12}{'ffmpeg s':>12}{'moviepy x':>12}{'ffmpeg x':>12}{'speed-up':>10}")
+        for method in args.methods:
+            moviepy_s = timed(render_moviepy, clips, os.path.join(folder, f'moviepy_{method}.mp4'), method, profile)
+            ffmpeg_s = timed(render_ffmpeg, clips, os.path.join(folder, f'ffmpeg_{method}.mp4'), method, profile)
+            print(f'  {method:<10}{moviepy_s:>12.1f}{ffmpeg_s:>12.1f}{timeline_s / moviepy_s:>12.2f}'
+                  f'{timeline_s / ffmpeg_s:>12.2f}{moviepy_s / ffmpeg_s:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
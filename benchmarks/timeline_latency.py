@@ -0,0 +1,197 @@
+"""
+Latency of timeline interactions on the real widgets, rendered offscreen.
+
+Synthetic clips are put on the timeline of a PreviewWindow, their storyboards are plain pixmaps placed in the
+pixmap cache for every zoom level used, so zooming is served without storyboard workers. Zoom, scroll, drag,
+delete and ruler drawing are scripted, each step is timed including the events it posts, and p50/p95/p99 are
+reported per interaction. The run fails if a p95 is over the interaction target, the same for every clip count.
+
+    python -m benchmarks.timeline_latency [--clips 10 100 1000] [--repeats 3] [--threshold-scale 1.0]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QPointF
+from PyQt6.QtGui import QColor, QPixmap
+from PyQt6.QtWidgets import QApplication
+
+from src.preview_components.preview_window import PreviewWindow
+from src.schemas import ClipMetaData, PreviewData
+from src.thumbnails import pixmap_cache
+
+CLIP_COUNTS = [10, 100, 1000]
+CLIP_DURATION_S = (2.0, 20.0)
+BENCH_PIXMAP_BUDGET_MB = 2048
+FRAME_MS = 1000 / 60
+
+# p95 targets in frames of a 60 Hz display: scrolling and dropping have to keep up with the pointer, a zoom
+# step or a ruler redraw may skip a few frames
+TARGET_FRAMES = {'zoom': 3, 'scroll': 1, 'drag': 2, 'delete': 2, 'ruler': 3}
+
+
+def percentile(values: list[float], p: float) -> float:
+    """ Nearest-rank percentile """
+    ordered = sorted(values)
+    rank = min(max(math.ceil(p / 100 * len(ordered)), 1), len(ordered))
+    return ordered[rank - 1]
+
+
+class TimelineBenchmark:
+    def __init__(self, app: QApplication, clips_count: int, repeats: int, seed: int = 0):
+        self.app = app
+        self.clips_count = clips_count
+        self.repeats = repeats
+        self.rnd = random.Random(seed)
+        self.samples: dict[str, list[float]] = {}
+        self.window = PreviewWindow()
+        self.window.resize(1280, 200)
+        self.window.show()
+        self.clips = [ClipMetaData(f'bench_clip_{idx:04d}.mp4',
+                                   duration_s=round(self.rnd.uniform(*CLIP_DURATION_S), 2),
+                                   width=1920,
+                                   height=1080,
+                                   scaled_width=72,
+                                   scaled_height=self.window.TRACK_VIEW_HEIGHT)
+                      for idx in range(clips_count)]
+
+    def _storyboard(self, clip_metadata: ClipMetaData, pixels_per_second: float) -> QPixmap:
+        pixmap = QPixmap(max(int(clip_metadata.duration_s * pixels_per_second), 1), self.window.TRACK_VIEW_HEIGHT)
+        pixmap.fill(QColor.fromHsv(hash(clip_metadata.filename) % 360, 120, 200))
+        return pixmap
+
+    def _fill_pixmap_cache(self, zoom_levels: list[float]):
+        for pixels_per_second in zoom_levels:
+            for clip_metadata in self.clips:
+                storyboard = self._storyboard(clip_metadata, pixels_per_second)
+                pixmap_cache.put((clip_metadata.filename, storyboard.width()), storyboard)
+
+    def _timed(self, interaction: str, action):
+        """ Runs action and the events it posted, the wall time goes to the interaction's samples """
+        started = time.perf_counter()
+        action()
+        self.app.processEvents()
+        self.samples.setdefault(interaction, []).append((time.perf_counter() - started) * 1000)
+
+    def load(self):
+        window = self.window
+        zoom_idx = window.ZOOM_VARIANTS.index(window.pixels_per_second)
+        self._fill_pixmap_cache(window.ZOOM_VARIANTS[max(zoom_idx - 1, 0):zoom_idx + 3])
+        window.original_previews_order = list(self.clips)
+        window.total_previews = window.pending_previews = len(self.clips)
+        for clip_metadata in self.clips:
+            storyboard = self._storyboard(clip_metadata, window.pixels_per_second)
+            window.on_storyboard_ready(PreviewData(clip_metadata, storyboard=storyboard,
+                                                   duration_in_px=storyboard.width()))
+        self.app.processEvents()
+
+    def zoom(self):
+        for _ in range(self.repeats):
+            for action in (self.window.zoom_in, self.window.zoom_in, self.window.zoom_out, self.window.zoom_out,
+                           self.window.zoom_out, self.window.zoom_in):
+                self._timed('zoom', action)
+
+    def scroll(self):
+        scroll_bar = self.window.track_view.horizontalScrollBar()
+        steps = 20
+        for _ in range(self.repeats):
+            for step in list(range(steps + 1)) + list(range(steps, -1, -1)):
+                value = scroll_bar.minimum() + (scroll_bar.maximum() - scroll_bar.minimum()) * step // steps
+                self._timed('scroll', lambda value=value: scroll_bar.setValue(value))
+
+    def drag(self):
+        """ Drop of a dragged item at a random place, as done on mouse release """
+        for _ in range(self.repeats * 10):
+            items = self.window.scene.get_items()
+            item = self.rnd.choice(items)
+            target_x = self.rnd.uniform(0, items[-1].sceneBoundingRect().right())
+
+            def drop(item=item, target_x=target_x):
+                item.setPos(QPointF(target_x, 0))
+                item._change_order(item.pos())
+
+            self._timed('drag', drop)
+
+    def ruler(self):
+        window = self.window
+        for _ in range(self.repeats * 5):
+            self._timed('ruler', lambda: window.timeline_renderer.draw(window.pixels_per_second,
+                                                                       window._calc_timeline_width()))
+
+    def delete(self):
+        for _ in range(min(self.repeats * 10, self.clips_count // 2)):
+            item = self.rnd.choice(self.window.scene.get_items())
+
+            def remove(item=item):
+                self.window.scene.clearSelection()
+                item.setSelected(True)
+                self.window.on_remove_selected()
+
+            self._timed('delete', remove)
+
+    def run(self) -> dict:
+        self.load()
+        items_after_load = len(self.window.scene.items())
+        self.zoom()
+        self.scroll()
+        self.drag()
+        self.ruler()
+        self.delete()
+        result = {'clips': self.clips_count,
+                  'scene_items': items_after_load,
+                  'clip_items': len(self.window.scene.get_items()),
+                  'interactions': {name: {'p50': percentile(values, 50),
+                                          'p95': percentile(values, 95),
+                                          'p99': percentile(values, 99),
+                                          'count': len(values)}
+                                   for name, values in self.samples.items()}}
+        self.window.close()
+        self.window.teardown()
+        self.window.deleteLater()
+        self.app.processEvents()
+        return result
+
+
+def report(result: dict, threshold_scale: float) -> list[str]:
+    """ Prints the result of one run, returns the failed checks """
+    failures = []
+    print(f"\n{result['clips']} clips: {result['scene_items']} scene items after load, "
+          f"{result['clip_items']} clip items at the end")
+    print(f"  {'interaction':<12}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'limit':>10}")
+    for name, stats in result['interactions'].items():
+        limit = TARGET_FRAMES.get(name, math.inf) * FRAME_MS * threshold_scale
+        failed = stats['p95'] > limit
+        print(f"  {name:<12}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}"
+              f"{limit:>10.0f}{'  FAIL' if failed else ''}")
+        if failed:
+            failures.append(f"{result['clips']} clips, {name}: p95 {stats['p95']:.1f} ms > {limit:.0f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures latency of timeline interactions offscreen')
+    parser.add_argument('--clips', type=int, nargs='+', default=CLIP_COUNTS)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threshold-scale', type=float, default=1.0,
+                        help='multiplies every threshold, for slow machines')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    pixmap_cache.budget_bytes = BENCH_PIXMAP_BUDGET_MB * 1024 * 1024
+    failures = []
+    for clips_count in args.clips:
+        failures += report(TimelineBenchmark(app, clips_count, args.repeats).run(), args.threshold_scale)
+
+    print(f'\n{pixmap_cache.stats()}')
+    if failures:
+        print('\nFailed:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,27 @@
 import os
 import sys
-from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QStatusBar
+from PyQt6.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QStatusBar, QPlainTextEdit
 
+from src import debug_manager
+from src.stall_watchdog import stall_watchdog
 from src.video_player import VideoPlayer
 from src.video_editor import VideoEditor
 from src.preview_components import PreviewWindow
 from src.UI.color import ColorBackground, ColorOptions
 
 from src.updater import UpdateManager
-from src.options import SNAPS_FOLDER
+from src.options import SNAPS_FOLDER, CACHE_FOLDER, PROXY_FOLDER
 
 if not os.path.exists(SNAPS_FOLDER):
     print(SNAPS_FOLDER)
     os.mkdir(SNAPS_FOLDER)
 
+if not os.path.exists(CACHE_FOLDER):
+    os.mkdir(CACHE_FOLDER)
+
+if not os.path.exists(PROXY_FOLDER):
+    os.mkdir(PROXY_FOLDER)
+
 
 class PreviewPlayerMediator:
     def __init__(self, preview:PreviewWindow, player:VideoPlayer):
@@ -21,15 +29,24 @@ class PreviewPlayerMediator:
         self.video_player = player
         self.connect_preview_selection()
         self.connect_item_removed()
+        self.connect_timeline_request()
+        self.video_player.thumbnail_at = self.preview.thumbnail_at
 
     def connect_preview_selection(self):
-        self.preview.item_selected.connect(lambda clip_data: self.video_player.connect_video_to_player(clip_data.filename))
+        self.preview.item_selected.connect(lambda clip_data: self.video_player.connect_video_to_player(clip_data))
 
     def connect_item_removed(self):
         self.preview.item_removed.connect(self.stop_video_playing)
 
+    def connect_timeline_request(self):
+        self.video_player.timeline_requested.connect(
+            lambda: self.video_player.play_timeline(self.preview.timeline_clips()))
+
     def stop_video_playing(self, clip_data):
-        if clip_data.filename == self.video_player.player.source().toString().split('///')[-1]:
+        if self.video_player.timeline_mode:
+            self.video_player.leave_timeline_mode()
+            self.video_player.change_btn_play_name(True)
+        elif self.video_player.current_clip is clip_data:
             self.video_player.stop_pressed()
 
 
@@ -44,6 +61,13 @@ class MainWindow(QMainWindow):
         self.mediator = PreviewPlayerMediator(self.preview_window, self.video_player)
         self.status_bar = QStatusBar(self)
         self.setStatusBar(self.status_bar)
+        self.stalls_view = QPlainTextEdit()
+        self.stalls_view.setReadOnly(True)
+        self.stalls_view.setMaximumHeight(90)
+        self.stalls_view.setPlaceholderText('No UI stalls recorded')
+        debug_manager.register_widget(self.stalls_view)
+        stall_watchdog.stall_detected.connect(lambda site, stall_ms: self.stalls_view.setPlainText(
+            stall_watchdog.summary()))
 
         self.setGeometry(400, 100, 1000, 800)
         self.setMinimumSize(1000, 800)
@@ -51,6 +75,10 @@ class MainWindow(QMainWindow):
         self.init_layout()
         self.update_manager.check_for_updates()
 
+    def closeEvent(self, event):
+        self.preview_window.teardown()
+        super().closeEvent(event)
+
     def init_layout(self):
         main_layout_widget = ColorBackground(ColorOptions.darker)
         main_layout = QVBoxLayout()
@@ -69,12 +97,15 @@ class MainWindow(QMainWindow):
 
         main_layout.addWidget(video_player_background)
         main_layout.addWidget(editor_background)
+        main_layout.addWidget(self.stalls_view)
         main_layout_widget.setLayout(main_layout)
         self.setCentralWidget(main_layout_widget)
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
+    stall_watchdog.start()
+    app.aboutToQuit.connect(stall_watchdog.stop)
     window = MainWindow()
     window.video_player.audioOutput.setVolume(0.8)
     window.show()
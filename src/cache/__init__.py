@@ -0,0 +1,4 @@
+from .metadata_cache import metadata_cache, MetadataCache
+from .segment_cache import segment_cache, SegmentCache
+from .packet_index import packet_indexes, PacketIndex, PacketIndexStore
+from .eviction import evict_folder
\ No newline at end of file
@@ -0,0 +1,22 @@
+import os
+
+
+def evict_folder(folder: str, limit_bytes: int, keep: set[str] = frozenset()):
+    """
+    Removes the least recently used mp4 files of folder until it fits limit_bytes. Files in keep stay, as do
+    '.part.mp4' files that are still being written
+    """
+    if not os.path.isdir(folder):
+        return
+
+    entries = [entry for entry in os.scandir(folder) if entry.is_file() and entry.name.endswith('.mp4')
+               and not entry.name.endswith('.part.mp4')]
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    total_size = sum(entry.stat().st_size for entry in entries)
+    for entry in entries:
+        if total_size <= limit_bytes:
+            break
+        if entry.path in keep:
+            continue
+        total_size -= entry.stat().st_size
+        os.remove(entry.path)
@@ -0,0 +1,46 @@
+import json
+import os
+
+from src.options import CACHE_FOLDER
+
+
+class MetadataCache:
+    """ Analysis results of clips stored as json files named by the file fingerprint. Binary data of a clip
+    lies next to its json with an own extension """
+
+    def __init__(self, folder: str = CACHE_FOLDER):
+        self.folder = folder
+
+    def _entry_path(self, fingerprint: str, extension: str = 'json') -> str:
+        return os.path.join(self.folder, f'{fingerprint}.{extension}')
+
+    def load(self, fingerprint: str) -> dict | None:
+        try:
+            with open(self._entry_path(fingerprint), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, fingerprint: str, data: dict):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self._entry_path(fingerprint) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._entry_path(fingerprint))
+
+    def load_blob(self, fingerprint: str, extension: str) -> bytes | None:
+        try:
+            with open(self._entry_path(fingerprint, extension), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def save_blob(self, fingerprint: str, extension: str, data: bytes):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = self._entry_path(fingerprint, extension) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._entry_path(fingerprint, extension))
+
+
+metadata_cache = MetadataCache()
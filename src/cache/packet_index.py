@@ -0,0 +1,122 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+from src.cache.metadata_cache import metadata_cache, MetadataCache
+from src.utils import has_irregular_frame_intervals
+
+PACKET_INDEX_EXTENSION = 'pidx'
+PACKET_INDEX_VERSION = 1
+_HEADER = struct.Struct('<4sHBxIII')  # magic, version, vfr, keyframes, packets, gops
+
+
+class PacketIndex:
+    """
+    Keyframes and packets of the first video stream of a clip, built once by demuxing without decoding.
+
+    Everything is kept in typed arrays, a few bytes per packet in memory and on disk: keyframe times in
+    seconds with their byte offsets in the file (-1 if the container doesn't tell), presentation times of
+    all video packets, the size of every GOP in packets and whether the frame rate is variable.
+    """
+
+    def __init__(self, keyframe_times: array, keyframe_offsets: array, packet_times: array, gop_sizes: array,
+                 vfr: bool):
+        self.keyframe_times = keyframe_times
+        self.keyframe_offsets = keyframe_offsets
+        self.packet_times = packet_times
+        self.gop_sizes = gop_sizes
+        self.vfr = vfr
+
+    @classmethod
+    def from_packets(cls, packets: list[tuple[float | None, int, bool]]) -> 'PacketIndex':
+        """ packets are (pts, byte offset, is keyframe) in decode order, as demuxed """
+        gop_sizes = array('I')
+        keyframes = []
+        for pts, offset, is_keyframe in packets:
+            if is_keyframe or not gop_sizes:
+                gop_sizes.append(0)
+            gop_sizes[-1] += 1
+            if is_keyframe and pts is not None:
+                keyframes.append((pts, offset))
+
+        keyframes.sort()
+        packet_times = array('d', sorted(pts for pts, _, _ in packets if pts is not None))
+        return cls(array('d', (pts for pts, _ in keyframes)),
+                   array('q', (offset for _, offset in keyframes)),
+                   packet_times,
+                   gop_sizes,
+                   has_irregular_frame_intervals(packet_times))
+
+    def keyframe_index_at_or_before(self, time_s: float) -> int:
+        """ Index of the last keyframe at or before time_s, -1 if there is none """
+        return bisect_right(self.keyframe_times, time_s) - 1
+
+    def keyframe_at_or_before(self, time_s: float) -> float | None:
+        idx = self.keyframe_index_at_or_before(time_s)
+        return self.keyframe_times[idx] if idx >= 0 else None
+
+    def keyframe_offset_at_or_before(self, time_s: float) -> int | None:
+        idx = self.keyframe_index_at_or_before(time_s)
+        if idx < 0 or self.keyframe_offsets[idx] < 0:
+            return None
+        return self.keyframe_offsets[idx]
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(b'PIDX', PACKET_INDEX_VERSION, self.vfr,
+                              len(self.keyframe_times), len(self.packet_times), len(self.gop_sizes))
+        return header + b''.join(_little_endian(values).tobytes()
+                                 for values in (self.keyframe_times, self.keyframe_offsets,
+                                                self.packet_times, self.gop_sizes))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PacketIndex':
+        magic, version, vfr, keyframes_count, packets_count, gops_count = _HEADER.unpack_from(data)
+        if magic != b'PIDX' or version != PACKET_INDEX_VERSION:
+            raise ValueError('not a packet index of this version')
+
+        offset = _HEADER.size
+        arrays = []
+        for typecode, count in (('d', keyframes_count), ('q', keyframes_count), ('d', packets_count),
+                                ('I', gops_count)):
+            values = array(typecode)
+            size = values.itemsize * count
+            if len(data) < offset + size:
+                raise ValueError('packet index is truncated')
+            values.frombytes(data[offset:offset + size])
+            arrays.append(_little_endian(values))
+            offset += size
+
+        return cls(*arrays, vfr=bool(vfr))
+
+
+class PacketIndexStore:
+    """ Packet indexes stored in the metadata cache next to the analysis of each clip, kept in memory once read """
+
+    def __init__(self, cache: MetadataCache = metadata_cache):
+        self.cache = cache
+        self.indexes: dict[str, PacketIndex | None] = {}
+
+    def get(self, fingerprint: str) -> PacketIndex | None:
+        if fingerprint not in self.indexes:
+            data = self.cache.load_blob(fingerprint, PACKET_INDEX_EXTENSION)
+            try:
+                self.indexes[fingerprint] = PacketIndex.from_bytes(data) if data else None
+            except (ValueError, struct.error):
+                self.indexes[fingerprint] = None
+        return self.indexes[fingerprint]
+
+    def put(self, fingerprint: str, index: PacketIndex):
+        self.cache.save_blob(fingerprint, PACKET_INDEX_EXTENSION, index.to_bytes())
+        self.indexes[fingerprint] = index
+
+
+def _little_endian(values: array) -> array:
+    """ Arrays are stored little endian, a swapped copy is returned on big endian machines """
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+packet_indexes = PacketIndexStore()
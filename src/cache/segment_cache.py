@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+
+from src.options import CACHE_FOLDER, SEGMENT_CACHE_LIMIT_MB
+from .eviction import evict_folder
+
+SEGMENTS_FOLDER_NAME = 'segments'
+
+
+class SegmentCache:
+    """
+    Rendered clip segments stored as mp4 files named by the hash of everything their encoding depends on.
+    Least recently used segments are removed when the cache grows over its limit.
+    """
+
+    def __init__(self, folder: str = os.path.join(CACHE_FOLDER, SEGMENTS_FOLDER_NAME),
+                 cache_limit_mb: int = SEGMENT_CACHE_LIMIT_MB):
+        self.folder = folder
+        self.cache_limit_bytes = cache_limit_mb * 1024 * 1024
+
+    @staticmethod
+    def segment_key(parameters: dict) -> str:
+        return hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+
+    def segment_path(self, key: str) -> str:
+        return os.path.join(self.folder, f'{key}.mp4')
+
+    def get(self, key: str) -> str | None:
+        """ Path of the cached segment, marked as recently used, or None """
+        path = self.segment_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, rendered_path: str) -> str:
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.segment_path(key)
+        os.replace(rendered_path, path)
+        return path
+
+    def evict(self, keep: set[str] = frozenset()):
+        """ Removes the least recently used segments until the cache fits its limit, segments in keep stay """
+        evict_folder(self.folder, self.cache_limit_bytes, keep)
+
+
+segment_cache = SegmentCache()
@@ -0,0 +1 @@
+from .coordinator import FarmCoordinator, FarmError
\ No newline at end of file
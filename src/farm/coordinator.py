@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+from dataclasses import replace
+
+from src.farm.protocol import send_message, recv_message, parse_address
+from src.options import (FARM_HEARTBEAT_TIMEOUT_S, FARM_SEGMENTS_PER_WORKER, FARM_MAX_ATTEMPTS)
+from src.render import fix_profile, join_segments
+from src.schemas import RenderManifest
+
+
+class FarmError(Exception):
+    pass
+
+
+class FarmCoordinator:
+    """
+    Splits a timeline into segments, renders them on the render daemons and joins the results losslessly.
+
+    The output size, fps and codec settings are fixed before the split, so all segments are encoded with
+    identical parameters and are joined by stream copy. A daemon that does not answer for
+    FARM_HEARTBEAT_TIMEOUT_S (it sends heartbeats while rendering) is considered dead and its segment goes
+    back to the queue for the remaining daemons.
+    """
+
+    def __init__(self, workers: list[str]):
+        self.workers = [parse_address(address) for address in workers]
+        self.alive_workers: list[tuple[str, int]] = []
+
+    def check_workers(self) -> list[tuple[str, int]]:
+        """ Pings all registered daemons and keeps the answering ones """
+        self.alive_workers = [worker for worker in self.workers if self._ping(worker)]
+        return self.alive_workers
+
+    @staticmethod
+    def _ping(worker: tuple[str, int]) -> bool:
+        try:
+            with socket.create_connection(worker, timeout=FARM_HEARTBEAT_TIMEOUT_S) as sock:
+                send_message(sock, {'type': 'ping'})
+                return recv_message(sock)['type'] == 'pong'
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def fix_profile(manifest: RenderManifest) -> RenderManifest:
+        """ Resolves output size and fps of the whole timeline, so every segment gets the same ones. 'compose'
+        segments get it as a canvas and pad their clips to it unscaled """
+        return replace(manifest, profile=fix_profile(manifest.clips, manifest.concat_method, manifest.profile))
+
+    @staticmethod
+    def split(manifest: RenderManifest, segments_count: int) -> list[RenderManifest]:
+        """ Splits clips into contiguous groups of about the same duration """
+        segments_count = max(1, min(segments_count, len(manifest.clips)))
+        target_s = sum(clip.trimmed_duration_s for clip in manifest.clips) / segments_count
+        groups = [[]]
+        group_s = 0.0
+        for idx, clip in enumerate(manifest.clips):
+            clips_left = len(manifest.clips) - idx
+            groups_left = segments_count - len(groups)
+            if groups[-1] and (group_s >= target_s or clips_left <= groups_left) and groups_left > 0:
+                groups.append([])
+                group_s = 0.0
+            groups[-1].append(clip)
+            group_s += clip.trimmed_duration_s
+
+        return [replace(manifest, clips=group) for group in groups]
+
+    def render(self, manifest: RenderManifest, file_path: str, progress=None):
+        if not self.check_workers():
+            raise FarmError('No render daemons are available')
+
+        output_profile = manifest.profile
+        manifest = self.fix_profile(manifest)
+        segments = self.split(manifest, len(self.alive_workers) * FARM_SEGMENTS_PER_WORKER)
+        total_ms = int(sum(clip.trimmed_duration_s for clip in manifest.clips) * 1000)
+        if progress is not None:
+            progress(max(total_ms, 1))
+
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            segment_paths = self._dispatch(segments, tmp_folder, progress)
+            join_segments(segment_paths, file_path, output_profile, tmp_folder)
+
+        if progress is not None:
+            progress(max(total_ms, 1))
+
+    def _dispatch(self, segments: list[RenderManifest], tmp_folder: str, progress) -> list[str]:
+        pending = queue.Queue()
+        for segment_id in range(len(segments)):
+            pending.put(segment_id)
+
+        segment_paths = [os.path.join(tmp_folder, f'segment_{idx:05d}.mp4') for idx in range(len(segments))]
+        attempts = [0] * len(segments)
+        done_ms = [0] * len(segments)
+        done = [False] * len(segments)
+        errors = []
+        lock = threading.Lock()
+
+        def report_progress():
+            if progress is not None:
+                progress(sum(done_ms))
+
+        def worker_loop(worker):
+            while not errors:
+                try:
+                    segment_id = pending.get(timeout=0.5)
+                except queue.Empty:
+                    with lock:
+                        if all(done):
+                            return
+                    continue
+
+                try:
+                    self._render_on_worker(worker, segment_id, segments[segment_id], segment_paths[segment_id],
+                                           done_ms, report_progress)
+                except (OSError, ConnectionError, socket.timeout):
+                    with lock:
+                        done_ms[segment_id] = 0
+                    pending.put(segment_id)
+                    return  # the daemon is dead, its segment goes to the others
+                except FarmError as e:
+                    with lock:
+                        attempts[segment_id] += 1
+                        done_ms[segment_id] = 0
+                        if attempts[segment_id] >= FARM_MAX_ATTEMPTS:
+                            errors.append(str(e))
+                            return
+                    pending.put(segment_id)
+                else:
+                    with lock:
+                        done[segment_id] = True
+
+        threads = [threading.Thread(target=worker_loop, args=(worker,), daemon=True) for worker in self.alive_workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise FarmError(errors[0])
+        if not all(done):
+            raise FarmError('All render daemons failed before the job was finished')
+
+        return segment_paths
+
+    @staticmethod
+    def _render_on_worker(worker, segment_id: int, segment: RenderManifest, segment_path: str, done_ms: list,
+                          report_progress):
+        with socket.create_connection(worker, timeout=FARM_HEARTBEAT_TIMEOUT_S) as sock:
+            send_message(sock, {'type': 'render', 'segment_id': segment_id, 'manifest': segment.to_dict()})
+            while True:
+                message = recv_message(sock, payload_path=segment_path)
+                if message['type'] == 'heartbeat':
+                    done_ms[segment_id] = message.get('done_ms', 0)
+                    report_progress()
+                elif message['type'] == 'result':
+                    done_ms[segment_id] = int(sum(clip.trimmed_duration_s for clip in segment.clips) * 1000)
+                    report_progress()
+                    return
+                else:
+                    raise FarmError(message.get('error', 'unexpected answer of render daemon'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Renders a timeline manifest on render daemons')
+    parser.add_argument('manifest', help='json file with RenderManifest')
+    parser.add_argument('output')
+    parser.add_argument('--workers', required=True, help='comma separated host:port list')
+    args = parser.parse_args()
+
+    with open(args.manifest, 'r', encoding='utf-8') as f:
+        manifest = RenderManifest.from_dict(json.load(f))
+
+    coordinator = FarmCoordinator(args.workers.split(','))
+    coordinator.render(manifest, args.output, progress=lambda value: print(f'progress: {value}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import os
+import socketserver
+import tempfile
+import threading
+
+from src.farm.protocol import send_message, recv_message
+from src.options import FARM_HEARTBEAT_INTERVAL_S
+from src.render import FfmpegGraphRenderer
+from src.schemas import RenderManifest
+
+
+class RenderJobHandler(socketserver.BaseRequestHandler):
+    """
+    Serves one coordinator connection.
+
+    'ping' is answered with 'pong'. 'render' renders the manifest of a segment with the ffmpeg backend,
+    sending 'heartbeat' messages with progress every FARM_HEARTBEAT_INTERVAL_S while it works, and then
+    'result' carrying the rendered file or 'error'.
+    """
+
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            if message['type'] == 'ping':
+                send_message(self.request, {'type': 'pong', 'jobs': self.server.active_jobs})
+            elif message['type'] == 'render':
+                self.render_segment(message)
+            else:
+                send_message(self.request, {'type': 'error', 'error': f"unknown message {message['type']}"})
+
+    def render_segment(self, message: dict):
+        manifest = RenderManifest.from_dict(message['manifest'])
+        segment_id = message['segment_id']
+        progress = {'total_ms': 0, 'done_ms': 0}
+
+        def on_progress(value: int):
+            if not progress['total_ms']:
+                progress['total_ms'] = value
+            else:
+                progress['done_ms'] = value
+
+        with tempfile.TemporaryDirectory(dir=self.server.work_dir) as tmp_folder:
+            file_path = os.path.join(tmp_folder, f'segment_{segment_id}.mp4')
+            renderer = FfmpegGraphRenderer(manifest.clips, file_path, manifest.concat_method, manifest.profile)
+            errors = []
+            render_thread = threading.Thread(target=self._run_renderer, args=(renderer, on_progress, errors))
+
+            self.server.change_active_jobs(1)
+            try:
+                render_thread.start()
+                while render_thread.is_alive():
+                    render_thread.join(FARM_HEARTBEAT_INTERVAL_S)
+                    send_message(self.request, {'type': 'heartbeat', 'segment_id': segment_id,
+                                                'done_ms': progress['done_ms']})
+            except OSError:
+                renderer.cancel()
+                render_thread.join()
+                return
+            finally:
+                self.server.change_active_jobs(-1)
+
+            if errors:
+                send_message(self.request, {'type': 'error', 'segment_id': segment_id, 'error': errors[0]})
+            else:
+                send_message(self.request, {'type': 'result', 'segment_id': segment_id}, payload_path=file_path)
+
+    @staticmethod
+    def _run_renderer(renderer: FfmpegGraphRenderer, on_progress, errors: list):
+        try:
+            renderer.render(on_progress)
+        except Exception as e:
+            errors.append(str(e))
+
+
+class RenderDaemon(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, work_dir: str = None):
+        super().__init__((host, port), RenderJobHandler)
+        self.work_dir = work_dir or tempfile.gettempdir()
+        self.active_jobs = 0
+        self.jobs_lock = threading.Lock()
+
+    def change_active_jobs(self, delta: int):
+        """ Connection threads start and finish jobs concurrently """
+        with self.jobs_lock:
+            self.active_jobs += delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render worker daemon. Sources are read by the paths from '
+                                                 'the manifest, so they must be reachable from this machine.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=9101)
+    parser.add_argument('--work-dir', default=None)
+    args = parser.parse_args()
+
+    with RenderDaemon(args.host, args.port, args.work_dir) as daemon:
+        print(f'Render daemon listening on {args.host}:{args.port}')
+        daemon.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import json
+import socket
+import struct
+
+HEADER_SIZE = struct.Struct('>I')
+CHUNK_SIZE = 1024 * 1024
+
+
+def send_message(sock: socket.socket, header: dict, payload_path: str = None):
+    """
+    Sends one message: 4 bytes length of the json header, the header and optionally the content of
+    payload_path, whose size is put to the header as 'payload_size'.
+    """
+    if payload_path is not None:
+        with open(payload_path, 'rb') as f:
+            f.seek(0, 2)
+            header = dict(header, payload_size=f.tell())
+            f.seek(0)
+            _send_header(sock, header)
+            sock.sendfile(f)
+    else:
+        _send_header(sock, header)
+
+
+def _send_header(sock: socket.socket, header: dict):
+    data = json.dumps(header).encode()
+    sock.sendall(HEADER_SIZE.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(min(size - len(buffer), CHUNK_SIZE))
+        if not chunk:
+            raise ConnectionError('connection closed by the peer')
+        buffer += chunk
+    return bytes(buffer)
+
+
+def recv_message(sock: socket.socket, payload_path: str = None) -> dict:
+    """ Receives one message. Payload, if any, is written to payload_path (or dropped if it is None) """
+    header_size, = HEADER_SIZE.unpack(_recv_exact(sock, HEADER_SIZE.size))
+    header = json.loads(_recv_exact(sock, header_size))
+
+    remaining = header.get('payload_size', 0)
+    out_file = open(payload_path, 'wb') if payload_path is not None and remaining else None
+    try:
+        while remaining:
+            chunk = _recv_exact(sock, min(remaining, CHUNK_SIZE))
+            remaining -= len(chunk)
+            if out_file is not None:
+                out_file.write(chunk)
+    finally:
+        if out_file is not None:
+            out_file.close()
+
+    return header
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(':')
+    return host or 'localhost', int(port)
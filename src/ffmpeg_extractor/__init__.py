@@ -1 +1,6 @@
-from .extractors import extract_frames_to_folder
\ No newline at end of file
+from .extractors import extract_frames_to_folder, extract_frames_range, calc_frames_time_step, \
+    extract_frame_at
+from .decoder_pool import decoder_pool
+from .analysis_pass import analyze_to_folder, draw_waveform, save_peaks, load_peaks, ClipAnalysis
+from .probe import get_ffprobe_exe, probe_streams, probe_or_parse_streams, probe_keyframes, probe_packets, \
+    probe_video_packets, first_stream
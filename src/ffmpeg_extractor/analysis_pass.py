@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+
+import imageio_ffmpeg
+import numpy as np
+from PIL import Image
+
+from src.cache import metadata_cache
+from src.ffmpeg_extractor.extractors import calc_frames_time_step
+from src.options import (SNAPS_FOLDER, WAVEFORM_PX_PER_S, WAVEFORM_MAX_WIDTH, ANALYSIS_AUDIO_RATE, ANALYSIS_BLACK_FPS,
+                         ANALYSIS_BLACK_SIZE, ANALYSIS_BLACK_PIXEL_LEVEL, ANALYSIS_BLACK_PIXEL_SHARE,
+                         ANALYSIS_BLACK_MIN_S, ANALYSIS_SILENCE_WINDOW_S, ANALYSIS_SILENCE_DB, ANALYSIS_SILENCE_MIN_S)
+from src.processes import process_manager, Lane
+from src.utils import extract_file_name
+
+PEAKS_EXTENSION = 'peaks'
+WAVEFORM_FILE_NAME = 'waveform.png'
+WAVEFORM_COLOR = (159, 211, 199, 255)
+
+
+@dataclass
+class ClipAnalysis:
+    peaks: np.ndarray | None = None  # (n, 2) int16 min and max of every 1 / WAVEFORM_PX_PER_S second
+    black_ranges: list[list[float]] = field(default_factory=list)
+    silent_ranges: list[list[float]] = field(default_factory=list)
+
+
+def analyze_to_folder(filename: str, has_video: bool, has_audio: bool, frame_width: int = 0, frame_height: int = 0,
+                      time_step: float = None, overwrite: bool = False) -> tuple[str, ClipAnalysis]:
+    """
+    Decodes the clip once and fans the decoded streams out to every analysis: thumbnails into the clip's frames
+    folder (skipped if the folder is already there), a tiny grayscale video for black detection and mono
+    audio at ANALYSIS_AUDIO_RATE for peaks and silence detection. Returns the frames folder and the analysis
+    """
+    video_name = extract_file_name(filename)
+    folder_path = os.path.join(SNAPS_FOLDER, video_name)
+    if overwrite and os.path.exists(folder_path):
+        shutil.rmtree(folder_path)
+    extract_thumbnails = has_video and not os.path.exists(folder_path)
+    os.makedirs(folder_path, exist_ok=True)
+
+    black_width, black_height = ANALYSIS_BLACK_SIZE
+    black_filter = f"fps={ANALYSIS_BLACK_FPS},scale={black_width}:{black_height},format=gray"
+    with tempfile.TemporaryDirectory() as tmp_folder:
+        gray_path = os.path.join(tmp_folder, 'gray.raw')
+        audio_path = os.path.join(tmp_folder, 'audio.raw')
+        command = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-i", filename]
+        if extract_thumbnails:
+            time_step = time_step or calc_frames_time_step(frame_width)
+            command += ["-filter_complex",
+                        f"[0:v:0]split=2[thumbs_in][black_in];"
+                        f"[thumbs_in]fps=1/{time_step},scale={frame_width}:{frame_height}[thumbs];"
+                        f"[black_in]{black_filter}[gray]",
+                        "-map", "[thumbs]", "-vcodec", "png", os.path.join(folder_path, f"{video_name}%03d.png")]
+        elif has_video:
+            command += ["-filter_complex", f"[0:v:0]{black_filter}[gray]"]
+        if has_video:
+            command += ["-map", "[gray]", "-f", "rawvideo", gray_path]
+        if has_audio:
+            command += ["-map", "0:a:0", "-ac", "1", "-ar", str(ANALYSIS_AUDIO_RATE), "-f", "s16le", audio_path]
+        process_manager.run(command, Lane.IMPORT, check=True)
+
+        gray = np.fromfile(gray_path, dtype=np.uint8) if os.path.exists(gray_path) else None
+        samples = np.fromfile(audio_path, dtype='<i2') if os.path.exists(audio_path) else None
+
+    analysis = ClipAnalysis()
+    if gray is not None:
+        analysis.black_ranges = detect_black_ranges(gray.reshape(-1, black_width * black_height))
+    if samples is not None:
+        analysis.peaks = compute_peaks(samples)
+        analysis.silent_ranges = detect_silent_ranges(samples)
+    return folder_path, analysis
+
+
+def compute_peaks(samples: np.ndarray, rate: int = ANALYSIS_AUDIO_RATE,
+                  peaks_per_s: int = WAVEFORM_PX_PER_S) -> np.ndarray:
+    bucket = max(rate // peaks_per_s, 1)
+    padded = np.pad(samples, (0, -len(samples) % bucket)).reshape(-1, bucket)
+    return np.stack([padded.min(axis=1), padded.max(axis=1)], axis=1).astype(np.int16)
+
+
+def detect_black_ranges(gray_frames: np.ndarray, fps: float = ANALYSIS_BLACK_FPS) -> list[list[float]]:
+    """ gray_frames has one downscaled frame per row """
+    dark_share = np.mean(gray_frames < ANALYSIS_BLACK_PIXEL_LEVEL, axis=1)
+    return _true_ranges(dark_share >= ANALYSIS_BLACK_PIXEL_SHARE, 1 / fps, ANALYSIS_BLACK_MIN_S)
+
+
+def detect_silent_ranges(samples: np.ndarray, rate: int = ANALYSIS_AUDIO_RATE) -> list[list[float]]:
+    window = max(int(rate * ANALYSIS_SILENCE_WINDOW_S), 1)
+    windows = samples[:len(samples) // window * window].reshape(-1, window).astype(np.float32) / 32768
+    rms = np.sqrt(np.mean(windows ** 2, axis=1))
+    return _true_ranges(rms < 10 ** (ANALYSIS_SILENCE_DB / 20), window / rate, ANALYSIS_SILENCE_MIN_S)
+
+
+def _true_ranges(mask: np.ndarray, step_s: float, min_duration_s: float) -> list[list[float]]:
+    """ [start, end] in seconds of the runs of True lasting at least min_duration_s """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return [[round(float(start) * step_s, 3), round(float(end) * step_s, 3)]
+            for start, end in zip(starts, ends) if (end - start) * step_s >= min_duration_s]
+
+
+def draw_waveform(peaks: np.ndarray | None, duration_s: float, height: int, folder_path: str) -> str:
+    """ Draws the peaks as the png strip shown for audio clips, returns its path """
+    width = int(min(max(duration_s * WAVEFORM_PX_PER_S, 1), WAVEFORM_MAX_WIDTH))
+    columns = np.zeros((width, 2), dtype=np.int16)
+    if peaks is not None and len(peaks):
+        if len(peaks) > width:
+            starts = np.linspace(0, len(peaks), width, endpoint=False).astype(int)
+            columns = np.stack([np.minimum.reduceat(peaks[:, 0], starts), np.maximum.reduceat(peaks[:, 1], starts)],
+                               axis=1)
+        else:
+            columns = peaks[np.minimum(np.arange(width) * len(peaks) // width, len(peaks) - 1)]
+
+    rows = np.arange(height)[:, None]
+    top = (1 - columns[:, 1] / 32768) * height / 2
+    bottom = (1 - columns[:, 0] / 32768) * height / 2
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    image[(rows >= np.floor(top)) & (rows <= np.ceil(bottom))] = WAVEFORM_COLOR
+
+    waveform_path = os.path.join(folder_path, WAVEFORM_FILE_NAME)
+    Image.fromarray(image, 'RGBA').save(waveform_path)
+    return waveform_path
+
+
+def save_peaks(fingerprint: str, peaks: np.ndarray):
+    metadata_cache.save_blob(fingerprint, PEAKS_EXTENSION, peaks.astype('<i2').tobytes())
+
+
+def load_peaks(fingerprint: str) -> np.ndarray | None:
+    data = metadata_cache.load_blob(fingerprint, PEAKS_EXTENSION)
+    return np.frombuffer(data, dtype='<i2').reshape(-1, 2) if data else None
@@ -0,0 +1,245 @@
+import atexit
+import queue
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+import imageio_ffmpeg
+import numpy as np
+
+from src.options import DECODER_POOL_SIZE, DECODER_SESSION_FPS, DECODER_MAX_FORWARD_S, DECODER_COALESCE_S
+
+
+@dataclass
+class FrameRequest:
+    video_path: str
+    time_s: float
+    width: int
+    height: int
+    callbacks: list[Callable[[np.ndarray | None], None]] = field(default_factory=list)
+
+
+class DecoderSession:
+    """
+    Long-lived ffmpeg process decoding one clip forward from start_s as raw rgb24 frames.
+
+    Frames go out with the constant DECODER_SESSION_FPS rate, so the time of every frame is known without
+    parsing timestamps. Requests ahead of the current position are served by reading forward, which is
+    much cheaper than starting a new process with a new seek.
+    """
+
+    def __init__(self, video_path: str, width: int, height: int, start_s: float):
+        self.video_path = video_path
+        self.width = width
+        self.height = height
+        self.start_s = start_s
+        self.frame_size = width * height * 3
+        self.frames_read = 0
+        self.last_frame: np.ndarray | None = None
+
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(),
+            "-ss", f"{start_s:.3f}",
+            "-i", video_path,
+            "-vf", f"fps={DECODER_SESSION_FPS},scale={width}:{height}",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-an",
+            "-"]
+        self.proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    @property
+    def position_s(self) -> float:
+        """ Time of the next frame in the pipe """
+        return self.start_s + self.frames_read / DECODER_SESSION_FPS
+
+    def can_serve(self, time_s: float, width: int, height: int) -> bool:
+        if (width, height) != (self.width, self.height) or self.proc.poll() is not None:
+            return False
+
+        last_frame_s = self.position_s - 1 / DECODER_SESSION_FPS
+        if self.last_frame is not None and abs(time_s - last_frame_s) <= 0.5 / DECODER_SESSION_FPS:
+            return True
+
+        return self.position_s - 0.5 / DECODER_SESSION_FPS <= time_s <= self.position_s + DECODER_MAX_FORWARD_S
+
+    def read_frame_at(self, time_s: float) -> np.ndarray | None:
+        while self.position_s - 0.5 / DECODER_SESSION_FPS <= time_s:
+            data = self.proc.stdout.read(self.frame_size)
+            if len(data) < self.frame_size:
+                self.close()
+                return self.last_frame
+
+            self.last_frame = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 3)
+            self.frames_read += 1
+
+        return self.last_frame
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        if not self.proc.stdout.closed:
+            self.proc.stdout.close()
+        self.proc.wait()
+
+
+class DecoderPool:
+    """
+    Serves "frame at time_s, size width x height" requests from a bounded pool of decoder sessions.
+
+    Requests are queued and handled by one serving thread. Everything that is queued at the moment is taken
+    at once, requests closer than DECODER_COALESCE_S are merged and the rest are served in time order per
+    clip, so most of them are read forward from an already running session instead of seeking.
+    Sessions are kept one per clip and the least recently used one is closed when the pool is full.
+    """
+
+    def __init__(self, max_sessions: int = DECODER_POOL_SIZE):
+        self.max_sessions = max_sessions
+        self.sessions: OrderedDict[str, DecoderSession] = OrderedDict()
+        self.requests = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def request_frame(self, video_path: str, time_s: float, width: int, height: int,
+                      callback: Callable[[np.ndarray | None], None]):
+        """ Queues a request. callback is called from the pool thread with the frame or None """
+        self._ensure_started()
+        self.requests.put(FrameRequest(video_path, max(time_s, 0.0), width, height, [callback]))
+
+    def get_frame(self, video_path: str, time_s: float, width: int, height: int,
+                  timeout: float | None = None) -> np.ndarray | None:
+        """ Blocking variant of request_frame for worker threads """
+        done = threading.Event()
+        result = []
+
+        def on_frame(frame):
+            result.append(frame)
+            done.set()
+
+        self.request_frame(video_path, time_s, width, height, on_frame)
+        done.wait(timeout)
+        return result[0] if result else None
+
+    def get_frames(self, video_path: str, times: list[float], width: int, height: int,
+                   timeout: float | None = None) -> list[np.ndarray | None]:
+        """
+        Blocking request of several frames of one clip, in the order of times. They are queued as one batch, so
+        the pool serves them together in time order and reads forward from one session where they are close
+        """
+        results: list[np.ndarray | None] = [None] * len(times)
+        if not times:
+            return results
+
+        remaining = [len(times)]
+        done = threading.Event()
+
+        def on_frame(idx: int, frame: np.ndarray | None):
+            # called from the pool thread only
+            results[idx] = frame
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                done.set()
+
+        self._ensure_started()
+        self.requests.put([FrameRequest(video_path, max(time_s, 0.0), width, height,
+                                        [lambda frame, idx=idx: on_frame(idx, frame)])
+                           for idx, time_s in enumerate(times)])
+        done.wait(timeout)
+        return results
+
+    def close_session(self, video_path: str):
+        self.requests.put(video_path)
+
+    def shutdown(self):
+        if self._thread is not None:
+            self.requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, daemon=True)
+                self._thread.start()
+
+    def _serve(self):
+        while True:
+            pending = [self.requests.get()]
+            while True:
+                try:
+                    pending.append(self.requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            frame_requests = []
+            for item in pending:
+                if item is None:
+                    self._close_all()
+                    return
+                if isinstance(item, str):
+                    self._close_session(item)
+                elif isinstance(item, list):
+                    frame_requests.extend(item)
+                else:
+                    frame_requests.append(item)
+
+            for request in self._coalesce(frame_requests):
+                self._serve_request(request)
+
+    @staticmethod
+    def _coalesce(frame_requests: list[FrameRequest]) -> list[FrameRequest]:
+        frame_requests.sort(key=lambda r: (r.video_path, r.width, r.height, r.time_s))
+        merged = []
+        for request in frame_requests:
+            last = merged[-1] if merged else None
+            if (last is not None
+                    and (last.video_path, last.width, last.height) == (request.video_path, request.width, request.height)
+                    and request.time_s - last.time_s <= DECODER_COALESCE_S):
+                last.callbacks.extend(request.callbacks)
+            else:
+                merged.append(request)
+
+        return merged
+
+    def _serve_request(self, request: FrameRequest):
+        frame = None
+        try:
+            session = self._session_for(request)
+            frame = session.read_frame_at(request.time_s)
+        except (OSError, ValueError) as e:
+            print(f'Frame at {request.time_s:.2f}s of {request.video_path} failed: {e}')
+            self._close_session(request.video_path)
+
+        for callback in request.callbacks:
+            callback(frame)
+
+    def _session_for(self, request: FrameRequest) -> DecoderSession:
+        session = self.sessions.get(request.video_path)
+        if session is not None and session.can_serve(request.time_s, request.width, request.height):
+            self.sessions.move_to_end(request.video_path)
+            return session
+
+        self._close_session(request.video_path)
+        session = DecoderSession(request.video_path, request.width, request.height, request.time_s)
+        self.sessions[request.video_path] = session
+        while len(self.sessions) > self.max_sessions:
+            _, evicted = self.sessions.popitem(last=False)
+            evicted.close()
+
+        return session
+
+    def _close_session(self, video_path: str):
+        session = self.sessions.pop(video_path, None)
+        if session is not None:
+            session.close()
+
+    def _close_all(self):
+        while self.sessions:
+            _, session = self.sessions.popitem()
+            session.close()
+
+
+decoder_pool = DecoderPool()
+atexit.register(decoder_pool.shutdown)
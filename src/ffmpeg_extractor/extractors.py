@@ -1,31 +1,45 @@
 import io
 import os
+import shutil
+import tempfile
 
 import imageio_ffmpeg
+import numpy as np
 import subprocess
 
 from PIL import Image
 
 from src.ffmpeg_extractor.tools import create_snaps_folder
-from src.options import SNAPS_FOLDER
+from src.options import SNAPS_FOLDER, COARSE_FRAMES_MAX
+from src.processes import process_manager, Lane
 from src.utils import extract_file_name
 
 
-def extract_frames_to_folder(filename: str, frame_width: int, frame_height: int) -> str:
+def extract_frames_to_folder(filename: str, frame_width: int, frame_height: int, overwrite: bool = False,
+                             time_step: float = None) -> str:
     folder_name = extract_file_name(filename)
     folder_path = os.path.join(SNAPS_FOLDER, folder_name)
+    if overwrite and os.path.exists(folder_path):
+        shutil.rmtree(folder_path)
+
     if not os.path.exists(folder_path):
         os.mkdir(folder_path)
-        ffmpeg_make_extraction_to_folder(filename, frame_width, frame_height)
+        ffmpeg_make_extraction_to_folder(filename, frame_width, frame_height, time_step)
 
     return folder_path
 
 
-def ffmpeg_make_extraction_to_folder(video_path: str, width: int, height: int):
+def calc_frames_time_step(width: int, duration_s: float = 0.0) -> float:
+    """ Time in seconds between two frames of the coarse pass made on import. Long clips get at most
+    COARSE_FRAMES_MAX frames, denser ones are extracted later for the viewed ranges only """
+    return max(width / 100, duration_s / COARSE_FRAMES_MAX)
+
+
+def ffmpeg_make_extraction_to_folder(video_path: str, width: int, height: int, time_step: float = None):
     ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
     video_name = extract_file_name(video_path)
     create_snaps_folder(video_name)
-    min_time_step = width / 100
+    min_time_step = time_step or calc_frames_time_step(width)
 
     command = [
         ffmpeg_path,
@@ -35,7 +49,57 @@ def ffmpeg_make_extraction_to_folder(video_path: str, width: int, height: int):
         "-vcodec", "png",
         f"snaps/{video_name}/{video_name}%03d.png"
     ]
-    subprocess.run(command)
+    process_manager.run(command, Lane.IMPORT)
+
+
+def extract_frames_range(video_path: str, start_s: float, end_s: float, time_step: float,
+                         width: int, height: int, folder_path: str) -> list[tuple[float, str]]:
+    """ Extracts frames of the range with time_step to folder_path, names them by time in ms.
+    Returns (time, path) of extracted frames """
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+    os.makedirs(folder_path, exist_ok=True)
+    tmp_folder = tempfile.mkdtemp(dir=folder_path)
+
+    command = [
+        ffmpeg_path,
+        "-ss", f"{start_s:.3f}",
+        "-t", f"{end_s - start_s:.3f}",
+        "-i", video_path,
+        "-vf", f"fps=1/{time_step}",
+        "-s", f"{width}x{height}",
+        "-vcodec", "png",
+        os.path.join(tmp_folder, "%05d.png")
+    ]
+    process_manager.run(command, Lane.INTERACTIVE)
+
+    frames = []
+    for idx, file in enumerate(sorted(os.listdir(tmp_folder))):
+        time_s = start_s + idx * time_step
+        frame_path = os.path.join(folder_path, f"{round(time_s * 1000)}.png")
+        os.replace(os.path.join(tmp_folder, file), frame_path)
+        frames.append((time_s, frame_path))
+
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    return frames
+
+
+def extract_frame_at(video_path: str, time_s: float, width: int, height: int) -> np.ndarray | None:
+    """ One RGB frame near time_s. The input is seeked to the preceding keyframe, so only a few frames are
+    decoded whatever the length of the file. Returns None if there is no frame there """
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(),
+        "-ss", f"{max(time_s, 0.0):.3f}",
+        "-i", video_path,
+        "-frames:v", "1",
+        "-s", f"{width}x{height}",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "-"
+    ]
+    result = process_manager.run(command, Lane.INTERACTIVE, capture_stdout=True)
+    if len(result.stdout) < width * height * 3:
+        return None
+    return np.frombuffer(result.stdout[:width * height * 3], dtype=np.uint8).reshape(height, width, 3)
 
 
 def extract_frames_from_pipe(video_path: str, time_step: float, width: int, height: int):
@@ -81,4 +145,5 @@ def extract_frames_from_pipe(video_path: str, time_step: float, width: int, heig
         except Exception as e:
             print(e)
 
-    proc.terminate()
\ No newline at end of file
+    proc.terminate()
+
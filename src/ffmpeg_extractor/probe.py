@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import subprocess
+
+import imageio_ffmpeg
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from src.options import PROBE_TIMEOUT_S
+from src.processes import process_manager, Lane
+
+
+def get_ffprobe_exe() -> str:
+    """ ffprobe from PATH, otherwise the one lying next to the ffmpeg used by imageio """
+    ffprobe_path = shutil.which('ffprobe')
+    if ffprobe_path:
+        return ffprobe_path
+
+    ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+    folder, ffmpeg_name = os.path.split(ffmpeg_path)
+    ffprobe_path = os.path.join(folder, ffmpeg_name.replace('ffmpeg', 'ffprobe'))
+    if os.path.exists(ffprobe_path):
+        return ffprobe_path
+
+    raise FileNotFoundError('ffprobe executable is not found')
+
+
+def probe_streams(video_path: str) -> dict:
+    """ Container and streams info as returned by ffprobe, without decoding """
+    command = [
+        get_ffprobe_exe(),
+        "-v", "error",
+        "-show_format",
+        "-show_streams",
+        "-of", "json",
+        video_path]
+    proc = process_manager.run(command, Lane.IMPORT, timeout=PROBE_TIMEOUT_S, check=True, capture_stdout=True)
+    return json.loads(proc.stdout)
+
+
+def parse_streams(video_path: str) -> dict:
+    """
+    probe_streams result filled from the header the bundled ffmpeg prints, for when ffprobe is not available.
+    Has only codec_type, width and height of the first video and audio streams and the duration of the format
+    """
+    infos = ffmpeg_parse_infos(video_path)
+    streams = []
+    if infos.get('video_found'):
+        width, height = infos['video_size']
+        streams.append({'codec_type': 'video', 'width': width, 'height': height})
+    if infos.get('audio_found'):
+        streams.append({'codec_type': 'audio'})
+    return {'format': {'duration': infos.get('duration') or 0.0}, 'streams': streams}
+
+
+def probe_or_parse_streams(video_path: str) -> dict:
+    """ probe_streams when ffprobe is found, parse_streams otherwise """
+    try:
+        get_ffprobe_exe()
+    except FileNotFoundError:
+        return parse_streams(video_path)
+    return probe_streams(video_path)
+
+
+def first_stream(probe_data: dict, codec_type: str) -> dict | None:
+    for stream in probe_data.get('streams', []):
+        if stream.get('codec_type') == codec_type:
+            return stream
+    return None
+
+
+def probe_keyframes(video_path: str) -> list[float]:
+    """ Timestamps of video keyframes found by reading packet flags only (demuxing, no decoding) """
+    command = [
+        get_ffprobe_exe(),
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path]
+    proc = process_manager.run(command, Lane.IMPORT, timeout=PROBE_TIMEOUT_S, check=True, capture_stdout=True)
+
+    keyframes = []
+    for line in proc.stdout.decode(errors='replace').splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+
+    return sorted(keyframes)
+
+
+def probe_video_packets(video_path: str) -> list[tuple[float | None, int, bool]]:
+    """ (pts, byte offset, is keyframe) of the packets of the first video stream in decode order, by demuxing
+    only. Missing times are None, missing offsets -1 """
+    command = [
+        get_ffprobe_exe(),
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,pos,flags",
+        "-of", "csv=p=0",
+        video_path]
+    proc = process_manager.run(command, Lane.IMPORT, check=True, capture_stdout=True)
+
+    packets = []
+    for line in proc.stdout.decode(errors='replace').splitlines():
+        values = line.split(',')
+        if len(values) < 3:
+            continue
+        pts_time, pos, flags = values[:3]
+        packets.append((None if pts_time in ('', 'N/A') else float(pts_time),
+                        int(pos) if pos.isdigit() else -1,
+                        'K' in flags))
+
+    return packets
+
+
+def probe_packets(video_path: str) -> tuple[list[tuple[int, float | None, float | None, float | None, str]], str]:
+    """
+    (stream index, pts, dts, duration, flags) of every packet, read by demuxing only, and the tail of errors
+    ffprobe reported on the way. Missing times are None
+    """
+    command = [
+        get_ffprobe_exe(),
+        "-v", "error",
+        "-show_entries", "packet=stream_index,pts_time,dts_time,duration_time,flags",
+        "-of", "csv=p=0",
+        video_path]
+    result = process_manager.run(command, Lane.IMPORT, capture_stdout=True)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+
+    def to_float(value: str) -> float | None:
+        return None if value in ('', 'N/A') else float(value)
+
+    packets = []
+    for line in result.stdout.decode(errors='replace').splitlines():
+        values = line.split(',')
+        if len(values) < 5 or not values[0].isdigit():
+            continue
+        packets.append((int(values[0]), to_float(values[1]), to_float(values[2]), to_float(values[3]), values[4]))
+
+    return packets, result.stderr
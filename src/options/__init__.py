@@ -1,2 +1,2 @@
 from .constants import *
-from .options import options, DEBUG, BASEDIR, SNAPS_FOLDER
\ No newline at end of file
+from .options import options, DEBUG, BASEDIR, SNAPS_FOLDER, CACHE_FOLDER, PROXY_FOLDER
\ No newline at end of file
@@ -0,0 +1,78 @@
+HOVER_PREVIEW_WIDTH = 240
+HOVER_HIRES_DELAY_MS = 250
+
+DECODER_POOL_SIZE = 4
+DECODER_SESSION_FPS = 10
+DECODER_MAX_FORWARD_S = 3.0
+DECODER_COALESCE_S = 0.05
+
+PROXY_SOURCE_MAX_HEIGHT = 1080
+PROXY_SOURCE_MAX_BITRATE = 40_000_000
+PROXY_HEIGHT = 540
+PROXY_GOP = 12
+PROXY_MAX_JOBS = 1
+PROXY_FFMPEG_THREADS = 2
+PROXY_CACHE_LIMIT_MB = 20_000
+
+MAX_OPEN_READERS = 3
+
+COARSE_FRAMES_MAX = 200
+DENSIFY_DELAY_MS = 150
+
+FARM_WORKERS = []  # 'host:port' of render daemons, e.g. ['localhost:9101', 'localhost:9102']
+FARM_HEARTBEAT_INTERVAL_S = 2.0
+FARM_HEARTBEAT_TIMEOUT_S = 10.0
+FARM_SEGMENTS_PER_WORKER = 2
+FARM_MAX_ATTEMPTS = 3
+
+PROCESS_CPU_SLOTS = None  # None is the number of cpu cores
+PROCESS_INTERACTIVE_SLOTS = 1  # slots only interactive processes may take
+PROCESS_RENDER_COST = 4  # slots taken by an export, ffmpeg encoders use several cores
+PROCESS_STDERR_LINES = 50
+PROBE_TIMEOUT_S = 30.0
+
+TIMELINE_POLL_MS = 20
+
+WAVEFORM_PX_PER_S = 20
+WAVEFORM_MAX_WIDTH = 8000
+
+PREFLIGHT_WORKERS = 4
+PREFLIGHT_TRUNCATION_TOLERANCE_S = 1.0
+
+VFR_INTERVAL_TOLERANCE = 0.25  # relative deviation of a frame interval from the median one
+VFR_IRREGULAR_SHARE = 0.01  # share of deviating intervals above which the frame rate is variable
+
+PREVIEW_INTERACTIVE_SLOTS = 1  # preview pool threads kept for hover frames and visible clips
+
+SEGMENT_CACHE_LIMIT_MB = 10_000  # 0 turns the rendered segments cache off
+
+SERVICE_PORT = 9200
+SERVICE_MAX_WORKERS = 1
+SERVICE_MAX_QUEUE = 16
+SERVICE_PROGRESS_SAVE_S = 1.0
+
+PIXMAP_BUDGET_MB = 256
+PIXMAP_VISIBLE_MARGIN = 1.0  # viewport widths on each side kept materialized
+
+POSTER_TIME_S = 1.0  # poster frame of a clip being imported, capped at half of the clip
+COARSE_STRIP_FRAMES = 8  # frames fetched by seeking to show a strip before the thumbnails are extracted
+
+SCRUB_MIN_INTERVAL_MS = 40  # shortest time between two seeks while the slider is dragged
+SCRUB_SEEK_TIMEOUT_MS = 250  # a seek not reported done by then no longer holds the next one back
+SCRUB_PREVIEW_HEIGHT = 80
+
+STALL_THRESHOLD_MS = 100  # main loop stalls longer than this are recorded with the stack they happened in
+STALL_HEARTBEAT_MS = 50
+STALL_STACK_DEPTH = 20
+STALL_SITES_SHOWN = 10
+
+ANALYSIS_AUDIO_RATE = 4000  # mono sample rate the analysis pass decodes audio to
+ANALYSIS_BLACK_FPS = 4
+ANALYSIS_BLACK_SIZE = (32, 18)
+ANALYSIS_BLACK_PIXEL_LEVEL = 24  # luma below which a pixel counts as black
+ANALYSIS_BLACK_PIXEL_SHARE = 0.98
+ANALYSIS_BLACK_MIN_S = 0.5
+ANALYSIS_SILENCE_WINDOW_S = 0.05
+ANALYSIS_SILENCE_DB = -50.0
+ANALYSIS_SILENCE_MIN_S = 1.0
+ANALYSIS_EDGE_TOLERANCE_S = 0.1  # ranges this close to a clip end are offered as trims
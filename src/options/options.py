@@ -18,3 +18,5 @@ options = Options()
 DEBUG = True
 BASEDIR = get_base_dir()
 SNAPS_FOLDER = os.path.join(BASEDIR, 'snaps')
+CACHE_FOLDER = os.path.join(BASEDIR, 'cache')
+PROXY_FOLDER = os.path.join(BASEDIR, 'proxies')
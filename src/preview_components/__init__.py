@@ -1,3 +1,4 @@
+from .hover_preview import HoverPreview
 from .tracks_view import TracksView
 from .timeline_renderer import TimelineRenderer
 from .video_preview_item import VideoPreviewItem
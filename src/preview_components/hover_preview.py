@@ -0,0 +1,34 @@
+from PyQt6.QtCore import Qt, QPoint
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtWidgets import QLabel
+
+from src.options import HOVER_PREVIEW_WIDTH
+
+
+class HoverPreview(QLabel):
+    """ Floating frame preview shown above the timeline while the mouse moves over a clip """
+    CURSOR_OFFSET = 12
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.ToolTip)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet('border: 1px solid #262626; background-color: #262626;')
+        self.frame_key = None
+
+    def show_frame(self, pixmap: QPixmap, frame_key, global_pos: QPoint):
+        """ Sets a new frame only if it differs from the shown one, otherwise just follows the cursor """
+        if frame_key != self.frame_key:
+            self.frame_key = frame_key
+            self.setPixmap(pixmap.scaledToWidth(HOVER_PREVIEW_WIDTH, Qt.TransformationMode.FastTransformation))
+            self.adjustSize()
+
+        self.move(global_pos.x() - self.width() // 2, global_pos.y() - self.height() - self.CURSOR_OFFSET)
+        if not self.isVisible():
+            self.show()
+
+    def show_hires_frame(self, pixmap: QPixmap):
+        self.setPixmap(pixmap.scaledToWidth(HOVER_PREVIEW_WIDTH, Qt.TransformationMode.SmoothTransformation))
+
+    def hide_preview(self):
+        self.frame_key = None
+        self.hide()
@@ -1,11 +1,21 @@
-from PyQt6.QtCore import QPointF, QThreadPool, pyqtSignal, pyqtSlot, Qt
-from PyQt6.QtWidgets import (QPushButton, QWidget, QHBoxLayout,
+import math
+import os
+from typing import Callable
+
+from PyQt6.QtCore import QPointF, QPoint, QThreadPool, QTimer, pyqtSignal, pyqtSlot, Qt
+from PyQt6.QtGui import QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import (QLabel, QPushButton, QWidget, QHBoxLayout,
                              QVBoxLayout)
 
 from src import debug_manager
 from src.UI.color import ColorOptions
-from src.preview_components import TimelineRenderer, Scene
+from src.ffmpeg_extractor import decoder_pool
+from src.options import HOVER_PREVIEW_WIDTH, HOVER_HIRES_DELAY_MS, DENSIFY_DELAY_MS, PIXMAP_VISIBLE_MARGIN
+from src.preview_components import TimelineRenderer, Scene, HoverPreview
+from src.project import ProjectData
+from src.proxy import proxy_manager
 from src.schemas import ClipMetaData, PreviewData
+from src.thumbnails import ThumbnailIndex, pixmap_cache
 from src.preview_components import TracksView
 from src.preview_components import VideoPreviewItem
 from src.workers import PreviewWorkersManager
@@ -28,11 +38,28 @@ class PreviewWindow(QWidget):
         self.pending_previews = 0
         self.original_previews_order = []
         self.timeline_renderer = TimelineRenderer(self.scene)
-        self.workers_manager = PreviewWorkersManager()
+        self.workers_manager = PreviewWorkersManager(self)
+        self.workers_manager.view_distances = self.clip_view_distances
+        self.thumbnail_indexes: dict[str, ThumbnailIndex] = {}
+        self.hover_preview = HoverPreview(self)
+        self.hover_request = None
+        self.hover_clip = None
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.setInterval(HOVER_HIRES_DELAY_MS)
+        self.hover_timer.timeout.connect(self.request_hover_hires_frame)
+        self.pending_densifications = set()
+        self.densify_timer = QTimer(self)
+        self.densify_timer.setSingleShot(True)
+        self.densify_timer.setInterval(DENSIFY_DELAY_MS)
+        self.densify_timer.timeout.connect(self.densify_visible_clips)
+        self.pending_materializations = set()
+        self.staged_frames: dict[int, list] = {}  # id of clips being imported: their (time, QImage) frames so far
 
         self.pixels_per_second = self.ZOOM_VARIANTS[4]  # frames per sec = 10[px/sec] / 70 [px] =0.1428 frames per sec
         self.timeline_renderer.draw(self.pixels_per_second, self._calc_timeline_width())
         self.scene.selectionChanged.connect(self.on_selection_changed)
+        self.scene.item_trimmed.connect(self.on_item_trimmed)
 
         self.init_scene_mock()
         self.init_ui()
@@ -41,10 +68,16 @@ class PreviewWindow(QWidget):
         self.track_view = TracksView(self)
         self.track_view.setStyleSheet(f'background-color: {ColorOptions.dimmer};')
         self.track_view.setScene(self.scene)
+        self.track_view.clip_hovered.connect(self.on_clip_hovered)
+        self.track_view.hover_left.connect(self.on_hover_left)
+        self.track_view.horizontalScrollBar().valueChanged.connect(self.schedule_densification)
+        self.track_view.horizontalScrollBar().valueChanged.connect(self.workers_manager.reschedule)
+        self.track_view.horizontalScrollBar().valueChanged.connect(self.update_materialized_items)
         self.scene.setSceneRect(0, 0, self.track_view.width(), self.track_view.height())
 
         self.btn_debug = QPushButton('DBG_scn')
         self.btn_debug.clicked.connect(self.debug_pressed)
+        self.lbl_pixmap_stats = QLabel()
 
         self.btn_zoom_in = QPushButton("+")
         self.btn_zoom_in.clicked.connect(self.zoom_in)
@@ -52,8 +85,11 @@ class PreviewWindow(QWidget):
         self.btn_zoom_out = QPushButton("-")
         self.btn_zoom_out.clicked.connect(self.zoom_out)
         self.resizing_completed.connect(self.sort_after_resizing)
+        self.resizing_completed.connect(self.schedule_densification)
+        self.resizing_completed.connect(self.update_materialized_items)
 
         debug_manager.register_widget(self.btn_debug)
+        debug_manager.register_widget(self.lbl_pixmap_stats)
 
         layout = QHBoxLayout()
         btn_layout = QVBoxLayout()
@@ -61,13 +97,17 @@ class PreviewWindow(QWidget):
         btn_layout.addWidget(self.btn_zoom_in)
         btn_layout.addWidget(self.btn_zoom_out)
         layout.addLayout(btn_layout)
-        layout.addWidget(self.track_view)
+        track_layout = QVBoxLayout()
+        track_layout.addWidget(self.track_view)
+        track_layout.addWidget(self.lbl_pixmap_stats)
+        layout.addLayout(track_layout)
         self.setLayout(layout)
 
         self.timeline_renderer.draw(self.pixels_per_second, self._calc_timeline_width())
 
     def debug_pressed(self, value=None):
         print(self.scene.get_items())
+        print(pixmap_cache.stats())
 
     def debug_action(self, *args):
         print('SIGNAL EMITTED')
@@ -79,6 +119,7 @@ class PreviewWindow(QWidget):
             selected_item = items[0]
             self.scene.removeItem(selected_item)
             self.scene.remove_field_gaps()
+            self._release_clip_resources(selected_item.clip_metadata.filename)
             self.item_removed.emit(selected_item.clip_metadata)
 
         self.update_scene_rect()
@@ -117,6 +158,7 @@ class PreviewWindow(QWidget):
     @pyqtSlot(PreviewData)
     def on_storyboard_ready(self, preview_data: PreviewData):
         self.add_preview_item(preview_data)
+        self.schedule_densification()
         self.pending_previews -= 1
         if self.pending_previews == 0:
             self.resizing_completed.emit()
@@ -125,23 +167,390 @@ class PreviewWindow(QWidget):
     def on_storyboard_error(self, error: str):
         print(error)
         self.pending_previews -= 1
+        if self.pending_previews == 0:
+            self.resizing_completed.emit()
+
+    def on_analysis_ready(self, clip_metadata: ClipMetaData, staged_clip: list[ClipMetaData] = None):
+        """ A clip shown in stages keeps its item, the analysed metadata and storyboard replace the staged ones """
+        if staged_clip:
+            placeholder_clip = staged_clip[0]
+            self.staged_frames.pop(id(placeholder_clip), None)
+            if self._find_item(placeholder_clip) is not None:
+                self.on_refreshed_analysis_ready(placeholder_clip, clip_metadata)
+                self.schedule_densification()
+            return
+
+        self._register_clip(clip_metadata)
+        self._run_storyboard_worker(clip_metadata, self.on_storyboard_ready)
+
+    def on_clip_probed(self, clip_metadata: ClipMetaData, staged_clip: list[ClipMetaData]):
+        staged_clip.append(clip_metadata)
+        self.staged_frames[id(clip_metadata)] = []
+        self._add_staged_item(clip_metadata)
+
+    def on_staged_frames_ready(self, staged_clip: list[ClipMetaData], frames: list):
+        if not staged_clip or id(staged_clip[0]) not in self.staged_frames:
+            return
+
+        clip_metadata = staged_clip[0]
+        self.staged_frames[id(clip_metadata)] = frames
+        item = self._find_item(clip_metadata)
+        if item is not None:
+            item.set_storyboard(self._draw_staged_strip(clip_metadata, frames))
+
+    def _add_staged_item(self, clip_metadata: ClipMetaData):
+        """ Item of a clip being imported: a placeholder of the clip's size, or the strip of its frames so far """
+        duration_in_px = max(int(clip_metadata.duration_s * self.pixels_per_second), 1)
+        item = VideoPreviewItem(None, self.scene, QPointF(self._find_last_pos_x(), 0), clip_metadata,
+                                placeholder_size=(duration_in_px, self.TRACK_VIEW_HEIGHT))
+        frames = self.staged_frames.get(id(clip_metadata))
+        if frames:
+            item.set_storyboard(self._draw_staged_strip(clip_metadata, frames))
+        self.scene.addItem(item)
+        self.update_scene_rect()
+
+    def _draw_staged_strip(self, clip_metadata: ClipMetaData, frames: list) -> QPixmap:
+        """ Storyboard with the nearest of the few staged frames in every tile """
+        duration_in_px = max(int(clip_metadata.duration_s * self.pixels_per_second), 1)
+        strip = QPixmap(duration_in_px, self.TRACK_VIEW_HEIGHT)
+        strip.fill(Qt.GlobalColor.black)
+        painter = QPainter(strip)
+        for x in range(0, duration_in_px, clip_metadata.scaled_width):
+            time_s = (x + clip_metadata.scaled_width / 2) / self.pixels_per_second
+            _, image = min(frames, key=lambda frame: abs(frame[0] - time_s))
+            painter.drawImage(x, 0, image)
+        painter.end()
+        return strip
+
+    @pyqtSlot(str)
+    def on_analysis_error(self, error: str):
+        print(error)
+
+    def on_staged_analysis_error(self, staged_clip: list[ClipMetaData], error: str):
+        """ The placeholder of a clip that failed to import is taken off the timeline """
+        self.on_analysis_error(error)
+        if not staged_clip:
+            return
+
+        self.staged_frames.pop(id(staged_clip[0]), None)
+        item = self._find_item(staged_clip[0])
+        if item is not None:
+            self.scene.removeItem(item)
+            self.scene.remove_field_gaps()
+            self.update_scene_rect()
+
+    def call_analysis_worker(self, file_path: str):
+        staged_clip = []  # the clip of the placeholder item, once the file is probed
+        self.workers_manager.run_video_analysis_worker(
+            file_path,
+            self.TRACK_VIEW_HEIGHT,
+            lambda clip_metadata: self.on_analysis_ready(clip_metadata, staged_clip),
+            lambda error: self.on_staged_analysis_error(staged_clip, error),
+            on_probed=lambda clip_metadata: self.on_clip_probed(clip_metadata, staged_clip),
+            on_frames=lambda frames: self.on_staged_frames_ready(staged_clip, frames))
+
+    def timeline_clips(self) -> list[ClipMetaData]:
+        """ Clips in the order they are placed on the timeline """
+        return [item.clip_metadata for item in self.scene.get_items()]
+
+    def project_data(self) -> ProjectData:
+        return ProjectData([item.clip_metadata for item in self.scene.get_items()], self.pixels_per_second)
+
+    def load_project(self, project: ProjectData):
+        """
+        Rebuilds the timeline straight from the analysis stored in the project. Sources are checked
+        in the background afterwards and only changed ones are analysed again.
+        """
+        for item in self.scene.get_items():
+            self.scene.removeItem(item)
+        self.thumbnail_indexes.clear()
+
+        if project.pixels_per_second in self.ZOOM_VARIANTS:
+            self.pixels_per_second = project.pixels_per_second
+        self.timeline_renderer.draw(self.pixels_per_second, self._calc_timeline_width())
+
+        self.original_previews_order = list(project.clips)
+        cached_clips = []
+        for clip_metadata in project.clips:
+            if os.path.isdir(clip_metadata.all_frames_folder or ''):
+                cached_clips.append(clip_metadata)
+                self._register_clip(clip_metadata)
+                self._run_storyboard_worker(clip_metadata, self.on_storyboard_ready)
+            else:
+                self.refresh_clip(clip_metadata)
+
+        self.total_previews = len(cached_clips)
+        self.pending_previews = self.total_previews
+        self.workers_manager.run_project_validation_worker(cached_clips, self.refresh_clip, self.on_clip_missing)
+        self.update_scene_rect()
 
     @pyqtSlot(ClipMetaData)
-    def on_analysis_ready(self, clip_metadata: ClipMetaData):
+    def refresh_clip(self, clip_metadata: ClipMetaData):
+        """ Analyses the source of clip_metadata again and updates its preview in place """
+        self.workers_manager.run_video_analysis_worker(
+            clip_metadata.filename,
+            self.TRACK_VIEW_HEIGHT,
+            lambda new_metadata: self.on_refreshed_analysis_ready(clip_metadata, new_metadata),
+            self.on_analysis_error,
+            refresh=True)
+
+    def on_refreshed_analysis_ready(self, clip_metadata: ClipMetaData, new_metadata: ClipMetaData):
+        new_metadata.in_point_s = min(clip_metadata.in_point_s, new_metadata.duration_s)
+        if clip_metadata.out_point_s is not None and clip_metadata.out_point_s < new_metadata.duration_s:
+            new_metadata.out_point_s = clip_metadata.out_point_s
+        vars(clip_metadata).update(vars(new_metadata))
+        self._register_clip(clip_metadata)
+        self._run_storyboard_worker(clip_metadata, self.on_refreshed_storyboard_ready)
+
+    def _register_clip(self, clip_metadata: ClipMetaData):
+        """ Thumbnails and proxies are made for video clips only, audio clips are drawn as a waveform """
+        if clip_metadata.is_audio_only:
+            self.thumbnail_indexes.pop(clip_metadata.filename, None)
+            return
+
+        self.thumbnail_indexes[clip_metadata.filename] = ThumbnailIndex(clip_metadata)
+        proxy_manager.request_proxy(clip_metadata)
+
+    def _find_item(self, clip_metadata: ClipMetaData) -> VideoPreviewItem | None:
+        for item in self.scene.get_items():
+            if item.clip_metadata is clip_metadata:
+                return item
+        return None
+
+    def _update_item_storyboard(self, preview_data: PreviewData) -> bool:
+        """ Replaces the storyboard of the existing item in place. Returns False if the clip has no item """
+        item = self._find_item(preview_data.clip_metadata)
+        if item is None:
+            return False
+
+        item.set_storyboard(preview_data.storyboard.scaled(preview_data.duration_in_px, self.TRACK_VIEW_HEIGHT))
+        self.scene.remove_field_gaps()
+        self.update_scene_rect()
+        return True
+
+    @pyqtSlot(PreviewData)
+    def on_refreshed_storyboard_ready(self, preview_data: PreviewData):
+        if not self._update_item_storyboard(preview_data):
+            self.add_preview_item(preview_data)
+            self.sort_after_resizing()
+
+    @pyqtSlot(PreviewData)
+    def on_densified_storyboard_ready(self, preview_data: PreviewData):
+        self._update_item_storyboard(preview_data)
+
+    def _run_storyboard_worker(self, clip_metadata: ClipMetaData, on_ready):
         self.workers_manager.run_storyboard_creation_worker(clip_metadata,
+                                                            self.thumbnail_indexes.get(clip_metadata.filename),
                                                             self.pixels_per_second,
-                                                            self.on_storyboard_ready,
+                                                            on_ready,
                                                             self.on_storyboard_error)
 
+    def thumbnail_at(self, clip_metadata: ClipMetaData, time_s: float) -> QPixmap | None:
+        """ Nearest cached thumbnail of the clip, None for clips without thumbnails """
+        index = self.thumbnail_indexes.get(clip_metadata.filename)
+        return index.pixmap_at(time_s) if index else None
+
+    def visible_clip_ranges(self) -> list[tuple[VideoPreviewItem, float, float]]:
+        """ Items intersecting the visible part of the timeline with the visible time range of each """
+        visible_rect = self.track_view.mapToScene(self.track_view.viewport().rect()).boundingRect()
+        ranges = []
+        for item in self.scene.get_items():
+            item_rect = item.sceneBoundingRect()
+            left = max(visible_rect.left(), item_rect.left())
+            right = min(visible_rect.right(), item_rect.right())
+            if right > left:
+                ranges.append((item, item.time_at(left - item_rect.left()), item.time_at(right - item_rect.left())))
+
+        return ranges
+
+    def clip_view_distances(self) -> Callable[[str], float]:
+        """ Distance in px between a clip and the visible part of the timeline, 0 if it is visible. The spans are
+        collected once per call, the returned function ranks any number of waiting jobs against them """
+        visible_rect = self.track_view.mapToScene(self.track_view.viewport().rect()).boundingRect()
+        spans = self._expected_clip_spans()
+        end_x = self._find_last_pos_x()
+
+        def distance(filename: str) -> float:
+            left, right = spans.get(filename, (end_x, end_x))
+            if right < visible_rect.left():
+                return visible_rect.left() - right
+            if left > visible_rect.right():
+                return left - visible_rect.right()
+            return 0.0
+
+        return distance
+
+    def _expected_clip_spans(self) -> dict[str, tuple[float, float]]:
+        """ Scene x range of every clip's item. Clips without an item yet are placed where they are going to
+        appear: by the remembered order while previews are rebuilt, otherwise at the end of the timeline """
+        spans = {}
+        pos_x = self.scene.ITEMS_ROFFSET
+        for clip_metadata in self.original_previews_order:
+            width = clip_metadata.trimmed_duration_s * self.pixels_per_second
+            spans.setdefault(clip_metadata.filename, (pos_x, pos_x + width))
+            pos_x += width
+
+        item_spans = {}
+        for item in self.scene.get_items():
+            rect = item.sceneBoundingRect()
+            item_spans.setdefault(item.clip_metadata.filename, (rect.left(), rect.right()))
+        spans.update(item_spans)
+        return spans
+
+    @pyqtSlot()
+    def schedule_densification(self):
+        self.densify_timer.start()
+
+    @pyqtSlot()
+    def densify_visible_clips(self):
+        """ Extracts denser thumbnails for visible ranges that have fewer frames than storyboard tiles """
+        for item, start_s, end_s in self.visible_clip_ranges():
+            clip_metadata = item.clip_metadata
+            index = self.thumbnail_indexes.get(clip_metadata.filename)
+            time_step = clip_metadata.scaled_width / self.pixels_per_second
+            if index is None or not index.needs_density(start_s, end_s, time_step):
+                continue
+
+            start_s = math.floor(start_s / time_step) * time_step
+            key = (clip_metadata.filename, round(start_s, 3), round(time_step, 3))
+            if key in self.pending_densifications:
+                continue
+
+            self.pending_densifications.add(key)
+            self.workers_manager.run_densification_worker(
+                clip_metadata, index, start_s, end_s, time_step,
+                lambda clip, frames, key=key: self.on_densification_ready(key, clip, frames),
+                lambda error, key=key: self.on_densification_error(key, error))
+
+    def on_densification_ready(self, key, clip_metadata: ClipMetaData, frames: list):
+        self.pending_densifications.discard(key)
+        index = self.thumbnail_indexes.get(clip_metadata.filename)
+        if index is None or not frames:
+            return
+
+        index.merge(frames)
+        if self._find_item(clip_metadata) is not None:
+            self._run_storyboard_worker(clip_metadata, self.on_densified_storyboard_ready)
+
+    def on_densification_error(self, key, error: str):
+        self.pending_densifications.discard(key)
+        print(error)
+
+    @pyqtSlot()
+    def update_materialized_items(self):
+        """ Off-screen items release their pixels, items scrolling into view get them back from the pixmap cache
+        or have the storyboard rebuilt from the thumbnails on disk """
+        visible_rect = self.track_view.mapToScene(self.track_view.viewport().rect()).boundingRect()
+        margin = visible_rect.width() * PIXMAP_VISIBLE_MARGIN
+        kept_rect = visible_rect.adjusted(-margin, 0, margin, 0)
+        for item in self.scene.get_items():
+            rect = item.sceneBoundingRect()
+            if rect.right() < kept_rect.left() or rect.left() > kept_rect.right():
+                if item.materialized:
+                    item.release_pixels()
+                continue
+
+            if item.materialized or item.materialize():
+                continue
+
+            clip_metadata = item.clip_metadata
+            if id(clip_metadata) in self.staged_frames:
+                if self.staged_frames[id(clip_metadata)]:
+                    item.set_storyboard(self._draw_staged_strip(clip_metadata, self.staged_frames[id(clip_metadata)]))
+                continue
+            if item.cache_key not in self.pending_materializations:
+                self.pending_materializations.add(item.cache_key)
+                self.workers_manager.run_storyboard_creation_worker(
+                    clip_metadata,
+                    self.thumbnail_indexes.get(clip_metadata.filename),
+                    self.pixels_per_second,
+                    self.on_materialized_storyboard_ready,
+                    lambda error, key=item.cache_key: self.on_materialization_error(key, error))
+
+        self.lbl_pixmap_stats.setText(pixmap_cache.stats())
+
+    @pyqtSlot(PreviewData)
+    def on_materialized_storyboard_ready(self, preview_data: PreviewData):
+        """ Storyboards requested before a zoom change are dropped, the item has a request of the new width """
+        key = (preview_data.clip_metadata.filename, preview_data.duration_in_px)
+        self.pending_materializations.discard(key)
+        item = self._find_item(preview_data.clip_metadata)
+        if item is not None and item.cache_key == key:
+            self._update_item_storyboard(preview_data)
+        self.lbl_pixmap_stats.setText(pixmap_cache.stats())
+
+    def on_materialization_error(self, key: tuple, error: str):
+        self.pending_materializations.discard(key)
+        print(error)
+
+    @pyqtSlot(object)
+    def on_item_trimmed(self, clip_metadata: ClipMetaData):
+        self.update_scene_rect()
+        self.update_materialized_items()
+
+    @pyqtSlot(ClipMetaData)
+    def on_clip_missing(self, clip_metadata: ClipMetaData):
+        print(f'Source file is missing: {clip_metadata.filename}')
+
+    def _release_clip_resources(self, filename: str):
+        """ Drops the thumbnail index and the decoder session of a clip that is no longer on the timeline """
+        if not any(item.clip_metadata.filename == filename for item in self.scene.get_items()):
+            self.thumbnail_indexes.pop(filename, None)
+            decoder_pool.close_session(filename)
+
+    @pyqtSlot(object, float, QPoint)
+    def on_clip_hovered(self, clip_metadata: ClipMetaData, time_s: float, global_pos: QPoint):
+        index = self.thumbnail_indexes.get(clip_metadata.filename)
+        frame_path = index.frame_path_at(time_s) if index else None
+        if frame_path is None:
+            self.on_hover_left()
+            return
+
+        self.hover_preview.show_frame(index.pixmap_at(time_s), frame_path, global_pos)
+        self.hover_request = (clip_metadata.filename, time_s)
+        self.hover_clip = clip_metadata
+        self.hover_timer.start()
+
+    @pyqtSlot()
+    def on_hover_left(self):
+        self.hover_timer.stop()
+        self.hover_request = None
+        self.hover_clip = None
+        self.hover_preview.hide_preview()
+
+    @pyqtSlot()
+    def request_hover_hires_frame(self):
+        if self.hover_request is None:
+            return
+
+        _, time_s = self.hover_request
+        self.workers_manager.run_frame_grabber_worker(self.hover_request,
+                                                      self.hover_clip,
+                                                      time_s,
+                                                      HOVER_PREVIEW_WIDTH,
+                                                      self.on_hover_frame_ready,
+                                                      self.on_hover_frame_error)
+
+    @pyqtSlot(object, QImage)
+    def on_hover_frame_ready(self, request_key, image: QImage):
+        if request_key == self.hover_request:
+            self.hover_preview.show_hires_frame(QPixmap.fromImage(image))
+
     @pyqtSlot(str)
-    def on_analysis_error(self, error: str):
+    def on_hover_frame_error(self, error: str):
         print(error)
 
-    def call_analysis_worker(self, file_path: str):
-        self.workers_manager.run_video_analysis_worker(file_path,
-                                                       self.TRACK_VIEW_HEIGHT,
-                                                       self.on_analysis_ready,
-                                                       self.on_analysis_error)
+    def teardown(self):
+        """ Disconnects the view signals before the window is destroyed, deleting the scene and the scrollbar
+        moves the scrollbar, whose handlers would run on widgets that are already gone """
+        scroll_bar = self.track_view.horizontalScrollBar()
+        scroll_bar.valueChanged.disconnect(self.schedule_densification)
+        scroll_bar.valueChanged.disconnect(self.workers_manager.reschedule)
+        scroll_bar.valueChanged.disconnect(self.update_materialized_items)
+        self.resizing_completed.disconnect()
+        self.hover_timer.stop()
+        self.densify_timer.stop()
+        self.workers_manager.dispatch_timer.stop()
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key.Key_Delete:
@@ -182,8 +591,9 @@ class PreviewWindow(QWidget):
     @pyqtSlot()
     def sort_after_resizing(self):
         pos_x = self.scene.ITEMS_ROFFSET
+        order = {id(clip_metadata): idx for idx, clip_metadata in enumerate(self.original_previews_order)}
         previews_sorted = sorted(self.scene.get_items(),
-                                 key=lambda item: self.original_previews_order.index(item.clip_metadata))
+                                 key=lambda item: order.get(id(item.clip_metadata), len(order)))
         for el in previews_sorted:
             el.setPos(pos_x, 0)
             pos_x += el.boundingRect().width()
@@ -191,21 +601,21 @@ class PreviewWindow(QWidget):
         self.update_scene_rect()
 
     def change_preview_size(self):
-        clips_metadata_list = []
-        self.original_previews_order = [preview.clip_metadata for preview in self.scene.get_items()]
-
-        for preview in self.scene.get_items():
-            clips_metadata_list.append(preview.clip_metadata)
-            self.scene.removeItem(preview)
-
-        self.total_previews = len(clips_metadata_list)
-        self.pending_previews = self.total_previews
+        """
+        Resizes the previews for the current zoom in one pass in timeline order. Items become placeholders of the
+        new width, update_materialized_items brings the pixels of the visible ones back from the pixmap cache or
+        the storyboard workers
+        """
+        items = self.scene.get_items()
+        self.original_previews_order = [item.clip_metadata for item in items]
+        pos_x = self.scene.ITEMS_ROFFSET
+        for item in items:
+            item.resize_storyboard(max(int(item.clip_metadata.duration_s * self.pixels_per_second), 1))
+            item.update_position(QPointF(pos_x, 0))
+            pos_x += item.boundingRect().width()
 
-        for clip_metadata in clips_metadata_list:
-            self.workers_manager.run_storyboard_creation_worker(clip_metadata,
-                                                                self.pixels_per_second,
-                                                                self.on_storyboard_ready,
-                                                                self.on_storyboard_error)
+        self.update_scene_rect()
+        self.resizing_completed.emit()
 
 
 if __name__ == '__main__':
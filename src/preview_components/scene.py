@@ -1,10 +1,11 @@
-from PyQt6.QtCore import QPointF
+from PyQt6.QtCore import QPointF, pyqtSignal
 from PyQt6.QtWidgets import QGraphicsScene
 
 from src.preview_components import VideoPreviewItem
 
 
 class Scene(QGraphicsScene):
+    item_trimmed = pyqtSignal(object)  # ClipMetaData of the trimmed item
     ITEMS_ROFFSET = 2
 
     def get_items(self) -> list:
@@ -1,44 +1,61 @@
-from PyQt6.QtWidgets import QGraphicsItemGroup, QGraphicsTextItem
-
-from src.preview_components.tracks_view import TimelineTickItem
+from PyQt6.QtCore import QLineF, QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+
+class TimelineRulerItem(QGraphicsItem):
+    """
+    Ticks and time labels of the whole timeline as one item. Only the exposed part is painted, so a new zoom or
+    timeline width is an update of two numbers and not thousands of tick and label items
+    """
+    TICK_STEP_PX = 10
+    LABEL_STEP_PX = 50
+    TICK_HEIGHT = 10
+    LONG_TICK_HEIGHT = 20
+    LABEL_OFFSET = QPointF(-6, 36)  # from the tick, to the baseline of the label text
+    HEIGHT = 40
+    TICK_COLOR = QColor(240, 0, 55)
+
+    def __init__(self, x_offset: float):
+        super().__init__()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+        self.setZValue(1)
+        self.x_offset = x_offset
+        self.px_per_sec = 1.0
+        self.timeline_width = 0
+
+    def set_scale(self, px_per_sec: float, timeline_width: int):
+        self.prepareGeometryChange()
+        self.px_per_sec = px_per_sec
+        self.timeline_width = timeline_width
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        # labels reach past their tick, the last one past the timeline width
+        return QRectF(0, 0, self.x_offset + self.timeline_width + self.LABEL_STEP_PX, self.HEIGHT)
+
+    def paint(self, painter, option: QStyleOptionGraphicsItem, widget=None):
+        exposed = option.exposedRect
+        first_px = max(int(exposed.left() - self.x_offset) - self.LABEL_STEP_PX, 0)
+        last_px = min(int(exposed.right() - self.x_offset) + 1, self.timeline_width)
+
+        painter.setPen(self.TICK_COLOR)
+        for px in range(first_px - first_px % self.TICK_STEP_PX, last_px, self.TICK_STEP_PX):
+            tick_height = self.LONG_TICK_HEIGHT if px % self.LABEL_STEP_PX == 0 else self.TICK_HEIGHT
+            painter.drawLine(QLineF(px + self.x_offset, 0, px + self.x_offset, tick_height))
+
+        painter.setPen(Qt.GlobalColor.black)
+        first_label_px = max(first_px - first_px % self.LABEL_STEP_PX, self.LABEL_STEP_PX)
+        for px in range(first_label_px, last_px, self.LABEL_STEP_PX):
+            painter.drawText(QPointF(px + self.x_offset, 0) + self.LABEL_OFFSET, str(round(px / self.px_per_sec, 1)))
 
 
 class TimelineRenderer:
     def __init__(self, scene):
         self.scene = scene
-        self.grpTicks = QGraphicsItemGroup()
-        self.grpLabels = QGraphicsItemGroup()
-        self.scene.addItem(self.grpTicks)
-        self.scene.addItem(self.grpLabels)
+        self.ruler = TimelineRulerItem(self.scene.ITEMS_ROFFSET)
+        self.ruler.setPos(0, -38)
+        self.scene.addItem(self.ruler)
 
     def draw(self, px_per_sec, timeline_width):
-        self.grpLabels.setPos(0, 0)
-        self.grpTicks.setPos(0, 0)
-        self.draw_ticks(timeline_width)
-        self.draw_labels(px_per_sec, timeline_width)
-        self.grpLabels.setPos(0, -38)
-        self.grpTicks.setPos(0, -38)
-
-    def draw_ticks(self, timeline_width):
-        for el in self.grpTicks.childItems():
-            self.scene.removeItem(el)
-
-        ticks_step_in_px = 10
-        for px in range(0, timeline_width, ticks_step_in_px):
-            tick_height = 10
-            if px % (5 * tick_height) == 0:
-                tick_height = 20
-
-            tick = TimelineTickItem(px + self.scene.ITEMS_ROFFSET, 0, px + self.scene.ITEMS_ROFFSET, tick_height)
-            self.grpTicks.addToGroup(tick)
-
-    def draw_labels(self, px_per_sec, timeline_width):
-        for el in self.grpLabels.childItems():
-            self.scene.removeItem(el)
-
-        label_tick_height = 20
-        step_px = 50
-        for px in range(step_px, timeline_width, step_px):
-            label = QGraphicsTextItem(str(round(px / px_per_sec, 1)))
-            label.setPos(px + self.scene.ITEMS_ROFFSET - 10, label_tick_height)
-            self.grpLabels.addToGroup(label)
+        self.ruler.set_scale(px_per_sec, timeline_width)
@@ -1,12 +1,17 @@
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
-from PyQt6.QtWidgets import QGraphicsView, QGraphicsLineItem
+from PyQt6.QtCore import Qt, QPoint, pyqtSignal
+from PyQt6.QtWidgets import QGraphicsView
+
+from src.preview_components.video_preview_item import VideoPreviewItem
 
 
 class TracksView(QGraphicsView):
+    clip_hovered = pyqtSignal(object, float, QPoint)  # clip metadata, time in clip (s), global cursor position
+    hover_left = pyqtSignal()
+
     def __init__(self, parent = None):
         super().__init__(parent)
         self.setAcceptDrops(True)
+        self.setMouseTracking(True)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setAlignment(Qt.AlignmentFlag.AlignLeft)
@@ -26,9 +31,24 @@ class TracksView(QGraphicsView):
             file_path = url.toLocalFile()
             self.parent().add_video_track(file_path)
 
+    def _preview_item_at(self, pos: QPoint) -> VideoPreviewItem | None:
+        for item in self.items(pos):
+            if isinstance(item, VideoPreviewItem):
+                return item
+        return None
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        pos = event.position().toPoint()
+        item = self._preview_item_at(pos)
+        if item is None or event.buttons() != Qt.MouseButton.NoButton:
+            self.hover_left.emit()
+            return
+
+        time_s = item.time_at(item.mapFromScene(self.mapToScene(pos)).x())
+        self.clip_hovered.emit(item.clip_metadata, time_s, event.globalPosition().toPoint())
+
+    def leaveEvent(self, event):
+        self.hover_left.emit()
+        super().leaveEvent(event)
 
-class TimelineTickItem(QGraphicsLineItem):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.setPen(QColor(240, 0, 55))
-        self.setZValue(1)
@@ -1,10 +1,12 @@
 from typing import TYPE_CHECKING
 
-from PyQt6.QtCore import QPointF
-from PyQt6.QtGui import QPixmap
-from PyQt6.QtWidgets import QGraphicsPixmapItem, QGraphicsItem
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QPixmap, QPainterPath, QColor
+from PyQt6.QtWidgets import QGraphicsPixmapItem, QGraphicsItem, QMenu
 
+from src.options import ANALYSIS_EDGE_TOLERANCE_S
 from src.schemas import ClipMetaData
+from src.thumbnails import pixmap_cache
 if TYPE_CHECKING:
     from src.preview_components import Scene
 
@@ -12,17 +14,174 @@ if TYPE_CHECKING:
 class VideoPreviewItem(QGraphicsPixmapItem):
     DEFAULT_Z_VALUE = 0
     SELECTED_Z_VALUE = 1
+    TRIM_HANDLE_WIDTH = 6
+    MIN_TRIMMED_DURATION_S = 0.1
+    PLACEHOLDER_COLOR = QColor(60, 60, 60)
 
-    def __init__(self, pixmap: QPixmap, scene: "Scene", init_pos: QPointF, clip_metadata: ClipMetaData):
-        super().__init__(pixmap)
+    def __init__(self, pixmap: QPixmap | None, scene: "Scene", init_pos: QPointF, clip_metadata: ClipMetaData,
+                 placeholder_size: tuple[int, int] = (0, 0)):
+        """ Without a pixmap the item starts as a placeholder of placeholder_size (storyboard width, height) """
+        super().__init__()
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
+        self.setAcceptHoverEvents(True)
         self.scene = scene
         self.prev_pos = init_pos
         self.clip_metadata = clip_metadata
+        self.storyboard_width, self.storyboard_height = placeholder_size
+        self.materialized = False
+        self.trim_edge = None
+        self._trim_press_x = 0.0
+        self._trim_press_points = (0.0, 0.0)
+        if pixmap is None:
+            self.release_pixels()
+        else:
+            self.set_storyboard(pixmap)
         self.setPos(init_pos)
 
+    @property
+    def pixels_per_second(self) -> float:
+        """ 0 for a clip without a duration, it has no time to map to pixels """
+        if self.clip_metadata.duration_s <= 0:
+            return 0.0
+        return self.storyboard_width / self.clip_metadata.duration_s
+
+    @property
+    def cache_key(self) -> tuple:
+        return self.clip_metadata.filename, self.storyboard_width
+
+    @property
+    def trimmed_width(self) -> int:
+        x_start = round(self.clip_metadata.in_point_s * self.pixels_per_second)
+        x_end = round(self.clip_metadata.trim_end_s * self.pixels_per_second)
+        return max(x_end - x_start, 1)
+
+    def set_storyboard(self, pixmap: QPixmap):
+        """ Sets the storyboard of the whole clip, only the trimmed part of it is shown """
+        self.storyboard_width = pixmap.width()
+        self.storyboard_height = pixmap.height()
+        pixmap_cache.put(self.cache_key, pixmap)
+        self.materialized = True
+        self.apply_trim()
+
+    def apply_trim(self):
+        """ Crops the cached storyboard to the trimmed part, an item without pixels only changes its placeholder """
+        full_pixmap = pixmap_cache.get(self.cache_key) if self.materialized else None
+        if full_pixmap is None:
+            self.release_pixels()
+            return
+
+        x_start = round(self.clip_metadata.in_point_s * self.pixels_per_second)
+        self.setPixmap(full_pixmap.copy(x_start, 0, self.trimmed_width, self.storyboard_height))
+
+    def materialize(self) -> bool:
+        """ Shows the storyboard again if it is still cached, otherwise it has to be rebuilt with set_storyboard """
+        if pixmap_cache.get(self.cache_key) is None:
+            return False
+
+        self.materialized = True
+        self.apply_trim()
+        return True
+
+    def release_pixels(self):
+        """ Drops the shown pixels, a placeholder of the same size is painted until the item is materialized """
+        self.materialized = False
+        self.prepareGeometryChange()
+        self.setPixmap(QPixmap())
+        self.update()
+
+    def resize_storyboard(self, storyboard_width: int):
+        """ Storyboard width of a new zoom, the item is a placeholder of it until it is materialized again """
+        self.prepareGeometryChange()
+        self.storyboard_width = storyboard_width
+        self.release_pixels()
+
+    def boundingRect(self) -> QRectF:
+        if self.materialized:
+            return super().boundingRect()
+        # the same as the pixmap item gives, it pads selectable items by half a pen
+        return QRectF(0, 0, self.trimmed_width, self.storyboard_height).adjusted(-0.5, -0.5, 0.5, 0.5)
+
+    def shape(self) -> QPainterPath:
+        if self.materialized:
+            return super().shape()
+        path = QPainterPath()
+        path.addRect(self.boundingRect())
+        return path
+
+    def paint(self, painter, option, widget=None):
+        if self.materialized:
+            super().paint(painter, option, widget)
+            return
+
+        rect = self.boundingRect()
+        painter.fillRect(rect, self.PLACEHOLDER_COLOR)
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+    def time_at(self, local_x: float) -> float:
+        """ Time in the source clip under the local x coordinate of the item """
+        if not self.pixels_per_second:
+            return self.clip_metadata.in_point_s
+        return self.clip_metadata.in_point_s + local_x / self.pixels_per_second
+
+    def _trim_edge_at(self, local_x: float) -> str | None:
+        if local_x <= self.TRIM_HANDLE_WIDTH:
+            return 'in'
+        if local_x >= self.boundingRect().width() - self.TRIM_HANDLE_WIDTH:
+            return 'out'
+        return None
+
+    def _move_trim_edge(self, scene_x: float):
+        if not self.pixels_per_second:
+            return
+
+        delta_s = (scene_x - self._trim_press_x) / self.pixels_per_second
+        in_point_s, out_point_s = self._trim_press_points
+        if self.trim_edge == 'in':
+            max_in_s = out_point_s - self.MIN_TRIMMED_DURATION_S
+            self.clip_metadata.in_point_s = min(max(in_point_s + delta_s, 0.0), max_in_s)
+        else:
+            min_out_s = in_point_s + self.MIN_TRIMMED_DURATION_S
+            out_point_s = min(max(out_point_s + delta_s, min_out_s), self.clip_metadata.duration_s)
+            self.clip_metadata.out_point_s = None if out_point_s >= self.clip_metadata.duration_s else out_point_s
+
+        self.apply_trim()
+
+    def detected_trims(self) -> list[tuple[str, float, float]]:
+        """ (label, in point, out point) for black or silent ranges at the current in or out point. Ranges inside
+        the clip would need a cut, they are not offered """
+        clip = self.clip_metadata
+        trims = []
+        for kind, ranges in (('black', clip.black_ranges or []), ('silence', clip.silent_ranges or [])):
+            for start_s, end_s in ranges:
+                if start_s <= clip.in_point_s + ANALYSIS_EDGE_TOLERANCE_S and end_s > clip.in_point_s:
+                    trims.append((f'Trim leading {kind} ({start_s:.1f}-{end_s:.1f} s)', end_s, clip.trim_end_s))
+                elif end_s >= clip.trim_end_s - ANALYSIS_EDGE_TOLERANCE_S and start_s < clip.trim_end_s:
+                    trims.append((f'Trim trailing {kind} ({start_s:.1f}-{end_s:.1f} s)', clip.in_point_s, start_s))
+
+        return [trim for trim in trims if trim[2] - trim[1] >= self.MIN_TRIMMED_DURATION_S]
+
+    def apply_detected_trim(self, in_point_s: float, out_point_s: float):
+        self.clip_metadata.in_point_s = in_point_s
+        self.clip_metadata.out_point_s = None if out_point_s >= self.clip_metadata.duration_s else out_point_s
+        self.apply_trim()
+        self.scene.remove_field_gaps()
+        self.scene.item_trimmed.emit(self.clip_metadata)
+
+    def contextMenuEvent(self, event):
+        trims = self.detected_trims()
+        if not trims:
+            super().contextMenuEvent(event)
+            return
+
+        menu = QMenu()
+        for label, in_point_s, out_point_s in trims:
+            menu.addAction(label).triggered.connect(
+                lambda checked=False, in_s=in_point_s, out_s=out_point_s: self.apply_detected_trim(in_s, out_s))
+        menu.exec(event.screenPos())
+        event.accept()
+
     def _change_order(self, proposed_pos: QPointF):
         """"""
         if proposed_pos == self.prev_pos:
@@ -44,13 +203,9 @@ class VideoPreviewItem(QGraphicsPixmapItem):
         self.prev_pos = pos
 
     def itemChange(self, change, value):
-        if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
-            x = value.x()
-            if value.x() < 0:
-                x = 0
-
-            y = self.pixmap().height() // 2
-            self.setPos(x, y)
+        if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
+            # adjusted before it is applied, setting it again after the change would move the item three times
+            return QPointF(max(value.x(), 0), self.storyboard_height // 2)
 
         if change == QGraphicsItem.GraphicsItemChange.ItemSelectedChange:
             if value:  # value is 1 if item was selected and 0 if it was unselected
@@ -60,7 +215,37 @@ class VideoPreviewItem(QGraphicsPixmapItem):
 
         return super().itemChange(change, value)
 
+    def hoverMoveEvent(self, event):
+        if self._trim_edge_at(event.pos().x()):
+            self.setCursor(Qt.CursorShape.SizeHorCursor)
+        else:
+            self.unsetCursor()
+        super().hoverMoveEvent(event)
+
+    def mousePressEvent(self, event):
+        self.trim_edge = self._trim_edge_at(event.pos().x())
+        if self.trim_edge is None:
+            super().mousePressEvent(event)
+            return
+
+        self._trim_press_x = event.scenePos().x()
+        self._trim_press_points = (self.clip_metadata.in_point_s, self.clip_metadata.trim_end_s)
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if self.trim_edge is None:
+            super().mouseMoveEvent(event)
+            return
+
+        self._move_trim_edge(event.scenePos().x())
+
     def mouseReleaseEvent(self, event):
+        if self.trim_edge is not None:
+            self.trim_edge = None
+            self.scene.remove_field_gaps()
+            self.scene.item_trimmed.emit(self.clip_metadata)
+            return
+
         self._change_order(self.pos())
         super().mouseReleaseEvent(event)
 
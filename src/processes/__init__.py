@@ -0,0 +1 @@
+from .process_manager import process_manager, ProcessManager, Lane, last_error_line
\ No newline at end of file
@@ -0,0 +1,198 @@
+import asyncio
+import atexit
+import heapq
+import itertools
+import os
+import subprocess
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Callable
+
+from src.options import PROCESS_CPU_SLOTS, PROCESS_INTERACTIVE_SLOTS, PROCESS_STDERR_LINES
+
+
+class Lane(IntEnum):
+    """ Priority of a process, lower goes first when slots are freed """
+    INTERACTIVE = 0  # hover frames, visible thumbnails
+    IMPORT = 1  # analysis, coarse frames, proxies
+    RENDER = 2  # export
+
+
+class SlotScheduler:
+    """
+    Budget of CPU slots shared by all media processes. Used from the event loop thread only.
+
+    Waiters are served by lane, then in order of arrival. PROCESS_INTERACTIVE_SLOTS slots are kept for the
+    interactive lane, so a long import or render never makes the preview wait for a whole process, and a render
+    never takes the last slot left to the import lane.
+    """
+
+    def __init__(self, slots: int, interactive_slots: int):
+        self.slots = slots
+        self.interactive_slots = min(interactive_slots, slots - 1)
+        self.free = slots
+        self.waiters = []
+        self.counter = itertools.count()
+
+    def _reserved(self, lane: Lane) -> int:
+        return 0 if lane == Lane.INTERACTIVE else self.interactive_slots
+
+    def _fits(self, lane: Lane, cost: int) -> bool:
+        return self.free - cost >= self._reserved(lane)
+
+    def _cost(self, lane: Lane, cost: int) -> int:
+        # a render leaves a slot to imports, so probing and analysis go on while an export holds its slots
+        limit = self.slots - self._reserved(lane) - (1 if lane == Lane.RENDER else 0)
+        return max(1, min(cost, limit))
+
+    async def acquire(self, lane: Lane, cost: int) -> int:
+        cost = self._cost(lane, cost)
+        if not self.waiters and self._fits(lane, cost):
+            self.free -= cost
+            return cost
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (int(lane), next(self.counter), cost, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(cost)
+            raise
+        return cost
+
+    def release(self, cost: int):
+        self.free += cost
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self.waiters:
+            lane, _, cost, waiter = self.waiters[0]
+            if waiter.cancelled():
+                heapq.heappop(self.waiters)
+                continue
+            if not self._fits(Lane(lane), cost):
+                break
+
+            heapq.heappop(self.waiters)
+            self.free -= cost
+            waiter.set_result(None)
+
+
+class ProcessManager:
+    """
+    Runs all media subprocesses on one asyncio loop living in a background thread.
+
+    Processes wait for CPU slots of their lane before they are started, their stderr is kept as a ring
+    buffer of the last PROCESS_STDERR_LINES lines, they are killed on timeout and when their future is
+    cancelled. Calls are made from worker threads; results and progress go back to Qt through the signals
+    of the workers, so the GUI thread is never blocked.
+    """
+
+    def __init__(self, slots: int = None, interactive_slots: int = PROCESS_INTERACTIVE_SLOTS):
+        self.slots_count = max(3, slots or PROCESS_CPU_SLOTS or os.cpu_count() or 4)
+        self.interactive_slots = interactive_slots
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.scheduler: SlotScheduler | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.scheduler = SlotScheduler(self.slots_count, self.interactive_slots)
+                self._thread = threading.Thread(target=self.loop.run_forever, name='process-manager', daemon=True)
+                self._thread.start()
+        return self.loop
+
+    def submit(self, command: list[str], lane: Lane = Lane.IMPORT, cost: int = 1, timeout: float = None,
+               capture_stdout: bool = False, on_stdout_line: Callable[[str], None] = None) -> Future:
+        """ Queues the command, cancelling of the returned future kills the process """
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(
+            self._run(command, lane, cost, timeout, capture_stdout, on_stdout_line), loop)
+
+    def run(self, command: list[str], lane: Lane = Lane.IMPORT, cost: int = 1, timeout: float = None,
+            check: bool = False, capture_stdout: bool = False,
+            on_stdout_line: Callable[[str], None] = None) -> subprocess.CompletedProcess:
+        """ Blocking version of submit for worker threads. stderr of the result is the tail of the output """
+        result = self.submit(command, lane, cost, timeout, capture_stdout, on_stdout_line).result()
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+        return result
+
+    @contextmanager
+    def reserve(self, lane: Lane, cost: int = 1):
+        """
+        Holds slots for processes started elsewhere, like the readers and writers of moviepy.
+
+        Do not wait for other processes of the manager inside, the held slots may be the ones they need.
+        """
+        loop = self._ensure_loop()
+        cost = asyncio.run_coroutine_threadsafe(self.scheduler.acquire(lane, cost), loop).result()
+        try:
+            yield
+        finally:
+            loop.call_soon_threadsafe(self.scheduler.release, cost)
+
+    async def _run(self, command: list[str], lane: Lane, cost: int, timeout: float | None, capture_stdout: bool,
+                   on_stdout_line: Callable[[str], None] | None) -> subprocess.CompletedProcess:
+        cost = await self.scheduler.acquire(lane, cost)
+        proc = None
+        try:
+            stdout_pipe = subprocess.PIPE if capture_stdout or on_stdout_line else subprocess.DEVNULL
+            proc = await asyncio.create_subprocess_exec(*command, stdin=subprocess.DEVNULL, stdout=stdout_pipe,
+                                                        stderr=subprocess.PIPE, limit=1024 * 1024)
+            stderr_tail = deque(maxlen=PROCESS_STDERR_LINES)
+            stdout_data = []
+
+            async def read_stderr():
+                async for line in proc.stderr:
+                    stderr_tail.append(line.decode(errors='replace').rstrip())
+
+            async def read_stdout():
+                if on_stdout_line is not None:
+                    async for line in proc.stdout:
+                        on_stdout_line(line.decode(errors='replace').rstrip())
+                elif capture_stdout:
+                    stdout_data.append(await proc.stdout.read())
+
+            try:
+                await asyncio.wait_for(asyncio.gather(read_stdout(), read_stderr(), proc.wait()), timeout)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(command, timeout, stderr='\n'.join(stderr_tail))
+
+            return subprocess.CompletedProcess(command, proc.returncode, b''.join(stdout_data),
+                                               '\n'.join(stderr_tail))
+        finally:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            self.scheduler.release(cost)
+
+    def shutdown(self):
+        if self.loop is None:
+            return
+
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(cancel_all(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+def last_error_line(result: subprocess.CompletedProcess) -> str:
+    """ Last line of stderr tail, ffmpeg puts the reason of failure there """
+    return result.stderr.strip().split('\n')[-1] if result.stderr else f'exit code {result.returncode}'
+
+
+process_manager = ProcessManager()
+atexit.register(process_manager.shutdown)
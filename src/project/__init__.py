@@ -0,0 +1 @@
+from .project_file import ProjectData, save_project, load_project, PROJECT_EXTENSION
\ No newline at end of file
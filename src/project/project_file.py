@@ -0,0 +1,44 @@
+import json
+import os
+from dataclasses import dataclass
+
+from src.schemas import ClipMetaData
+
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = '.vcproj'
+
+
+@dataclass
+class ProjectData:
+    clips: list[ClipMetaData]
+    pixels_per_second: float
+
+
+def save_project(file_path: str, project: ProjectData):
+    """
+    Writes the timeline to a json project file.
+
+    Clips are stored in timeline order together with their analysis results and the references into the
+    thumbnails cache (frames folder) and the fingerprint of the source, so the project can be rebuilt
+    without analysing sources again.
+    """
+    data = {
+        'version': PROJECT_VERSION,
+        'pixels_per_second': project.pixels_per_second,
+        'clips': [clip.to_dict() for clip in project.clips],
+    }
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+def load_project(file_path: str) -> ProjectData:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if data.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f'Project {file_path} was saved by a newer version of the program')
+
+    return ProjectData([ClipMetaData.from_dict(clip) for clip in data['clips']],
+                       data['pixels_per_second'])
@@ -0,0 +1 @@
+from .proxy_manager import proxy_manager, ProxyManager
\ No newline at end of file
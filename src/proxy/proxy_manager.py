@@ -0,0 +1,82 @@
+import os
+
+from PyQt6.QtCore import QObject, QThreadPool, pyqtSignal, pyqtSlot
+
+from src.cache import evict_folder
+from src.options import (PROXY_FOLDER, PROXY_SOURCE_MAX_HEIGHT, PROXY_SOURCE_MAX_BITRATE, PROXY_MAX_JOBS,
+                         PROXY_CACHE_LIMIT_MB)
+from src.schemas import ClipMetaData
+from src.workers import ProxyCreator
+
+
+class ProxyManager(QObject):
+    """
+    Creates playback proxies for heavy sources in the background and keeps them in a size limited cache.
+
+    Proxies are named by the source fingerprint, so a changed source never gets a stale proxy. Proxy jobs run
+    in their own pool limited to PROXY_MAX_JOBS, each ffmpeg with PROXY_FFMPEG_THREADS threads, so they never
+    take the whole CPU from the interactive work. Proxies are used only for playback; renders read originals.
+    """
+    proxy_ready = pyqtSignal(str, str)  # source file, proxy file
+
+    def __init__(self, folder: str = PROXY_FOLDER, cache_limit_mb: int = PROXY_CACHE_LIMIT_MB):
+        super().__init__()
+        self.folder = folder
+        self.cache_limit_bytes = cache_limit_mb * 1024 * 1024
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(PROXY_MAX_JOBS)
+        self.pending = set()
+
+    def _proxy_path(self, clip_metadata: ClipMetaData) -> str | None:
+        if not clip_metadata.fingerprint:
+            return None
+        return os.path.join(self.folder, f'{clip_metadata.fingerprint}.mp4')
+
+    @staticmethod
+    def needs_proxy(clip_metadata: ClipMetaData) -> bool:
+        if clip_metadata.height > PROXY_SOURCE_MAX_HEIGHT:
+            return True
+
+        try:
+            bitrate = os.path.getsize(clip_metadata.filename) * 8 / clip_metadata.duration_s
+        except (OSError, ZeroDivisionError):
+            return False
+        return bitrate > PROXY_SOURCE_MAX_BITRATE
+
+    def proxy_for(self, clip_metadata: ClipMetaData) -> str | None:
+        """ Returns the ready proxy file of the clip, or None if the original has to be played """
+        proxy_path = self._proxy_path(clip_metadata)
+        if proxy_path is None or not os.path.exists(proxy_path):
+            return None
+
+        os.utime(proxy_path)  # mark as recently used for the eviction
+        return proxy_path
+
+    def request_proxy(self, clip_metadata: ClipMetaData):
+        proxy_path = self._proxy_path(clip_metadata)
+        if (proxy_path is None or proxy_path in self.pending
+                or os.path.exists(proxy_path) or not self.needs_proxy(clip_metadata)):
+            return
+
+        os.makedirs(self.folder, exist_ok=True)
+        self.pending.add(proxy_path)
+        worker = ProxyCreator(clip_metadata.filename, proxy_path)
+        worker.signals.finished.connect(self.on_proxy_created)
+        worker.signals.error.connect(lambda error: self.on_proxy_error(proxy_path, error))
+        self.thread_pool.start(worker, priority=-1)
+
+    @pyqtSlot(str, str)
+    def on_proxy_created(self, video_path: str, proxy_path: str):
+        self.pending.discard(proxy_path)
+        self.evict(keep={proxy_path})
+        self.proxy_ready.emit(video_path, proxy_path)
+
+    def on_proxy_error(self, proxy_path: str, error: str):
+        self.pending.discard(proxy_path)
+        print(error)
+
+    def evict(self, keep: set[str] = frozenset()):
+        """ Removes the least recently used proxies until the cache fits its limit, proxies in keep stay """
+        evict_folder(self.folder, self.cache_limit_bytes, keep)
+
+proxy_manager = ProxyManager()
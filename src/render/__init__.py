@@ -0,0 +1,6 @@
+from .smart_cut import SmartCutRenderer
+from .ffmpeg_graph import FfmpegGraphRenderer, RenderCancelled
+from .audio_concat import AudioConcatRenderer
+from .segmented import SegmentedRenderer, fix_profile, join_segments
+from .output import OUTPUT_MODES, output_path
+from .preflight import run_preflight, PreflightReport
\ No newline at end of file
@@ -0,0 +1,116 @@
+import os
+import tempfile
+
+import imageio_ffmpeg
+
+from src.ffmpeg_extractor import probe_streams, first_stream
+from src.processes import process_manager, Lane, last_error_line
+from src.render.output import concat_list_entry
+from src.schemas import ClipMetaData
+
+AUDIO_COPY_CONTAINERS = {'mp3': '.mp3',
+                         'aac': '.m4a',
+                         'alac': '.m4a',
+                         'flac': '.flac',
+                         'vorbis': '.ogg',
+                         'opus': '.ogg',
+                         'pcm_s16le': '.wav',
+                         'pcm_s24le': '.wav'}
+PCM_CODEC = 'pcm_s16le'
+PCM_EXTENSION = '.wav'
+
+
+class AudioConcatRenderer:
+    """
+    Joins timelines made of audio files only, without the video pipeline.
+
+    Sources sharing codec, sample rate and channels are joined by stream copy with the concat demuxer,
+    trims included as in/out points, into the container of that codec. Other sources are decoded and joined
+    with the concat filter into PCM wav at the highest sample rate and channel count among them. The
+    extension of file_path is replaced by the one of the chosen container.
+    """
+
+    def __init__(self, clips_metadata_list: list[ClipMetaData], file_path: str, audio_streams: list[dict]):
+        self.clips = clips_metadata_list
+        self.audio_streams = audio_streams
+        self.copy_codec = self._common_copy_codec(audio_streams)
+        extension = AUDIO_COPY_CONTAINERS[self.copy_codec] if self.copy_codec else PCM_EXTENSION
+        self.file_path = os.path.splitext(file_path)[0] + extension
+        self.ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+
+    @staticmethod
+    def is_audio_timeline(clips_metadata_list: list[ClipMetaData]) -> bool:
+        return bool(clips_metadata_list) and all(clip.is_audio_only for clip in clips_metadata_list)
+
+    @classmethod
+    def from_clips(cls, clips_metadata_list: list[ClipMetaData], file_path: str) -> 'AudioConcatRenderer':
+        audio_streams = []
+        for clip_metadata in clips_metadata_list:
+            audio_stream = first_stream(probe_streams(clip_metadata.filename), 'audio')
+            if audio_stream is None:
+                raise ValueError(f'No audio stream in {clip_metadata.filename}')
+            audio_streams.append(audio_stream)
+
+        return cls(clips_metadata_list, file_path, audio_streams)
+
+    @staticmethod
+    def _common_copy_codec(audio_streams: list[dict]) -> str | None:
+        signatures = {(stream.get('codec_name'), stream.get('sample_rate'), stream.get('channels'))
+                      for stream in audio_streams}
+        if len(signatures) != 1:
+            return None
+
+        codec_name = next(iter(signatures))[0]
+        return codec_name if codec_name in AUDIO_COPY_CONTAINERS else None
+
+    def build_copy_command(self, list_path: str) -> list[str]:
+        with open(list_path, 'w', encoding='utf-8') as list_file:
+            for clip in self.clips:
+                list_file.write(concat_list_entry(clip.filename))
+                if clip.in_point_s > 0:
+                    list_file.write(f"inpoint {clip.in_point_s:.6f}\n")
+                if clip.out_point_s is not None and clip.out_point_s < clip.duration_s:
+                    list_file.write(f"outpoint {clip.out_point_s:.6f}\n")
+
+        return [self.ffmpeg_path, "-y", "-loglevel", "error", "-nostats", "-progress", "pipe:1",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-map", "0:a:0", "-c", "copy",
+                self.file_path]
+
+    def build_pcm_command(self) -> list[str]:
+        sample_rate = max(int(stream.get('sample_rate') or 44100) for stream in self.audio_streams)
+        channels = max(int(stream.get('channels') or 2) for stream in self.audio_streams)
+
+        command = [self.ffmpeg_path, "-y", "-loglevel", "error", "-nostats", "-progress", "pipe:1"]
+        filters = []
+        for idx, clip in enumerate(self.clips):
+            command += ["-ss", f"{clip.in_point_s:.6f}", "-t", f"{clip.trimmed_duration_s:.6f}",
+                        "-i", clip.filename]
+            filters.append(f"[{idx}:a:0]aresample={sample_rate},"
+                           f"aformat=sample_fmts=s16:sample_rates={sample_rate}:channels={channels}[a{idx}]")
+
+        inputs = ''.join(f'[a{idx}]' for idx in range(len(self.clips)))
+        filters.append(f"{inputs}concat=n={len(self.clips)}:v=0:a=1[outa]")
+        return command + ["-filter_complex", ';'.join(filters),
+                          "-map", "[outa]", "-c:a", PCM_CODEC,
+                          self.file_path]
+
+    def render(self, progress=None):
+        total_ms = int(sum(clip.trimmed_duration_s for clip in self.clips) * 1000)
+        if progress is not None:
+            progress(max(total_ms, 1))
+
+        def on_progress_line(line: str):
+            key, _, value = line.partition('=')
+            if key == 'out_time_us' and value.isdigit() and progress is not None:
+                progress(min(int(value) // 1000, total_ms))
+
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            if self.copy_codec:
+                command = self.build_copy_command(os.path.join(tmp_folder, 'clips.txt'))
+            else:
+                command = self.build_pcm_command()
+            result = process_manager.run(command, Lane.RENDER, on_stdout_line=on_progress_line)
+
+        if result.returncode != 0:
+            raise RuntimeError(last_error_line(result))
@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable
+
+from moviepy import VideoClip, AudioClip
+
+from src.options import MAX_OPEN_READERS
+
+
+class ClipReaderPool:
+    """
+    Opens readers on demand and keeps at most max_open of them, closing the least recently used.
+
+    When reader idx is requested, reader idx + 1 is opened in the background, so the render does not stall
+    on the clip boundary.
+    """
+
+    def __init__(self, opener: Callable[[int], object], count: int, max_open: int = MAX_OPEN_READERS):
+        self.opener = opener
+        self.count = count
+        self.max_open = max(max_open, 2)
+        self.readers: OrderedDict[int, object] = OrderedDict()
+        self.pending: dict[int, Future] = {}
+        self.lock = threading.Lock()
+        self.read_ahead = ThreadPoolExecutor(max_workers=1)
+
+    def get(self, idx: int):
+        with self.lock:
+            reader = self.readers.get(idx)
+            if reader is not None:
+                self.readers.move_to_end(idx)
+                return reader
+            future = self.pending.pop(idx, None)
+
+        reader = future.result() if future is not None else self.opener(idx)
+        with self.lock:
+            self.readers[idx] = reader
+            self._evict(keep={idx, idx + 1})
+            if idx + 1 < self.count and idx + 1 not in self.readers and idx + 1 not in self.pending:
+                self.pending[idx + 1] = self.read_ahead.submit(self.opener, idx + 1)
+
+        return reader
+
+    def _evict(self, keep: set[int]):
+        for idx in list(self.readers):
+            if len(self.readers) + len(self.pending) <= self.max_open:
+                break
+            if idx not in keep:
+                self.readers.pop(idx).close()
+
+    def close(self):
+        self.read_ahead.shutdown(wait=True)
+        with self.lock:
+            for idx, future in self.pending.items():
+                # a reader that failed to open re-raises here, the other readers still have to be closed
+                try:
+                    future.result().close()
+                except Exception as e:
+                    print(f'Read ahead of clip {idx} failed: {e}')
+            self.pending.clear()
+            for reader in self.readers.values():
+                reader.close()
+            self.readers.clear()
+
+
+def lazy_video_clip(pool: ClipReaderPool, idx: int, start_s: float, duration_s: float,
+                    size: tuple[int, int], fps: float) -> VideoClip:
+    """ VideoClip that reads frames from the pooled reader idx, opened only when the first frame is needed """
+    clip = VideoClip(duration=duration_s)
+    clip.frame_function = lambda t: pool.get(idx).get_frame(start_s + t)
+    clip.size = size
+    clip.fps = fps
+    return clip
+
+
+def lazy_audio_clip(pool: ClipReaderPool, idx: int, start_s: float, duration_s: float, fps: int,
+                    nchannels: int = 2) -> AudioClip:
+    clip = AudioClip(duration=duration_s, fps=fps)
+    clip.frame_function = lambda t: pool.get(idx).get_frame(start_s + t)
+    clip.nchannels = nchannels
+    return clip
@@ -0,0 +1,132 @@
+from concurrent.futures import CancelledError
+from fractions import Fraction
+
+import imageio_ffmpeg
+
+from src.ffmpeg_extractor import probe_streams, first_stream
+from src.options import PROCESS_RENDER_COST
+from src.processes import process_manager, Lane, last_error_line
+from src.render.output import output_args, keyframe_args
+from src.schemas import ClipMetaData, EncodingProfile
+
+
+class RenderCancelled(Exception):
+    pass
+
+
+class FfmpegGraphRenderer:
+    """
+    Renders the whole timeline with one native ffmpeg process.
+
+    Every clip is normalized inside a single filter_complex graph (scale/pad to the output size, fps,
+    pixel format, aresample) and all of them are joined with the concat filter, so frames never travel
+    through Python. 'chain' scales clips to fit the size of the first clip, 'compose' keeps clips
+    unscaled and centers them on the canvas of the largest one, same as moviepy does.
+    """
+
+    def __init__(self, clips_metadata_list: list[ClipMetaData], file_path: str, concat_method: str = 'chain',
+                 profile: EncodingProfile = None):
+        self.clips = clips_metadata_list
+        self.file_path = file_path
+        self.concat_method = concat_method
+        self.profile = profile or EncodingProfile()
+        self.ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+        self.future = None
+
+    def _probe_clips(self) -> list[dict]:
+        return [probe_streams(clip.filename) for clip in self.clips]
+
+    def output_size(self, probes: list[dict]) -> tuple[int, int]:
+        if self.profile.width and self.profile.height:
+            return self.profile.width, self.profile.height
+
+        sizes = [(first_stream(p, 'video')['width'], first_stream(p, 'video')['height']) for p in probes]
+        if self.concat_method == 'compose':
+            width, height = max(w for w, _ in sizes), max(h for _, h in sizes)
+        else:
+            width, height = sizes[0]
+
+        # rounded up, compose pads clips to this size unscaled and the largest one has to fit
+        return width + width % 2, height + height % 2
+
+    def output_fps(self, probes: list[dict]) -> Fraction:
+        if self.profile.fps:
+            return Fraction(self.profile.fps).limit_denominator(1001)
+
+        rates = [Fraction(first_stream(p, 'video').get('r_frame_rate') or '25/1') for p in probes]
+        return max(rates)
+
+    def _video_filter(self, idx: int, width: int, height: int, fps: Fraction) -> str:
+        if self.concat_method == 'compose' and (self.profile.pad_only
+                                                or not (self.profile.width and self.profile.height)):
+            fit = ''
+        else:
+            fit = f'scale={width}:{height}:force_original_aspect_ratio=decrease,'
+
+        return (f'[{idx}:v:0]{fit}pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,'
+                f'fps={fps},format={self.profile.pix_fmt}[v{idx}]')
+
+    def _audio_filter(self, input_label: str, idx: int) -> str:
+        return (f'[{input_label}]aresample={self.profile.audio_sample_rate},'
+                f'aformat=sample_fmts=fltp:channel_layouts=stereo[a{idx}]')
+
+    def build_command(self, probes: list[dict]) -> list[str]:
+        width, height = self.output_size(probes)
+        fps = self.output_fps(probes)
+
+        inputs = []
+        filters = []
+        silent_inputs = []
+        for idx, (clip, probe) in enumerate(zip(self.clips, probes)):
+            inputs += ["-ss", f"{clip.in_point_s:.6f}", "-t", f"{clip.trimmed_duration_s:.6f}", "-i", clip.filename]
+            filters.append(self._video_filter(idx, width, height, fps))
+            if first_stream(probe, 'audio') is None:
+                silent_inputs.append((idx, clip.trimmed_duration_s))
+            else:
+                filters.append(self._audio_filter(f'{idx}:a:0', idx))
+
+        for silent_number, (idx, duration_s) in enumerate(silent_inputs):
+            input_idx = len(self.clips) + silent_number
+            inputs += ["-f", "lavfi", "-t", f"{duration_s:.6f}",
+                       "-i", f"anullsrc=r={self.profile.audio_sample_rate}:cl=stereo"]
+            filters.append(self._audio_filter(f'{input_idx}:a:0', idx))
+
+        concat_inputs = ''.join(f'[v{idx}][a{idx}]' for idx in range(len(self.clips)))
+        filters.append(f'{concat_inputs}concat=n={len(self.clips)}:v=1:a=1[vout][aout]')
+
+        return [self.ffmpeg_path, "-y", "-loglevel", "error", "-nostats", "-progress", "pipe:1",
+                *inputs,
+                "-filter_complex", ';'.join(filters),
+                "-map", "[vout]", "-map", "[aout]",
+                "-c:v", self.profile.video_codec,
+                "-preset", self.profile.preset,
+                "-crf", str(self.profile.crf),
+                "-c:a", self.profile.audio_codec,
+                "-b:a", self.profile.audio_bitrate,
+                *keyframe_args(self.profile),
+                *output_args(self.profile, self.file_path)]
+
+    def render(self, progress=None):
+        command = self.build_command(self._probe_clips())
+        total_ms = int(sum(clip.trimmed_duration_s for clip in self.clips) * 1000)
+        if progress is not None:
+            progress(max(total_ms, 1))
+
+        def on_progress_line(line: str):
+            key, _, value = line.partition('=')
+            if key == 'out_time_us' and value.isdigit() and progress is not None:
+                progress(min(int(value) // 1000, total_ms))
+
+        self.future = process_manager.submit(command, Lane.RENDER, cost=PROCESS_RENDER_COST,
+                                             on_stdout_line=on_progress_line)
+        try:
+            result = self.future.result()
+        except CancelledError:
+            raise RenderCancelled('render is cancelled')
+
+        if result.returncode != 0:
+            raise RuntimeError(last_error_line(result))
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
@@ -0,0 +1,53 @@
+import os
+
+from src.schemas import EncodingProfile
+
+OUTPUT_MODES = ('mp4', 'fmp4', 'hls')
+FRAGMENTED_MP4_FLAGS = '+frag_keyframe+empty_moov+default_base_moof'
+
+
+def output_path(profile: EncodingProfile, file_path: str) -> str:
+    """ Path of the file a downstream consumer opens: the playlist for hls, the video file otherwise """
+    if profile.output_mode == 'hls':
+        return os.path.splitext(file_path)[0] + '.m3u8'
+    return file_path
+
+
+def concat_list_entry(file_path: str) -> str:
+    """ 'file' line of a concat demuxer list, a quote in the path is written as '\\'' the way the demuxer reads it """
+    quoted_path = os.path.abspath(file_path).replace("'", "'\\''")
+    return f"file '{quoted_path}'\n"
+
+
+def keyframe_args(profile: EncodingProfile) -> list[str]:
+    """ Keyframes forced on segment boundaries, so every fragment or segment starts decodable """
+    if profile.output_mode == 'mp4':
+        return []
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{profile.segment_s})"]
+
+
+def output_args(profile: EncodingProfile, file_path: str) -> list[str]:
+    """
+    Muxer arguments for the output mode.
+
+    'mp4' writes the moov atom at the end and moves it to the front (faststart). 'fmp4' writes moof/mdat
+    fragments as they are encoded, so the file is playable while growing and survives a crash. 'hls' writes
+    mpegts segments of segment_s seconds with a playlist updated after every finished segment; temp_file
+    makes each segment appear only once it is complete.
+    """
+    if profile.output_mode == 'fmp4':
+        return ["-movflags", FRAGMENTED_MP4_FLAGS, "-frag_duration", str(int(profile.segment_s * 1_000_000)),
+                file_path]
+
+    if profile.output_mode == 'hls':
+        playlist_path = output_path(profile, file_path)
+        segment_pattern = os.path.splitext(file_path)[0] + '_%05d.ts'
+        return ["-f", "hls",
+                "-hls_time", str(profile.segment_s),
+                "-hls_list_size", "0",
+                "-hls_playlist_type", "event",
+                "-hls_flags", "independent_segments+temp_file",
+                "-hls_segment_filename", segment_pattern,
+                playlist_path]
+
+    return ["-movflags", "+faststart", file_path]
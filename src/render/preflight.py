@@ -0,0 +1,189 @@
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from fractions import Fraction
+
+from src.ffmpeg_extractor import probe_or_parse_streams, probe_packets, first_stream
+from src.options import PREFLIGHT_WORKERS, PREFLIGHT_TRUNCATION_TOLERANCE_S
+from src.render.smart_cut import SMART_CUT_ENCODERS
+from src.schemas import ClipMetaData
+from src.utils import has_irregular_frame_intervals
+
+COPY_FRIENDLY_PIX_FMTS = ('yuv420p', 'yuvj420p')
+
+
+@dataclass
+class ClipPreflight:
+    """ Findings for one clip: errors make the export fail, slow path reasons force re-encoding instead of copy """
+    clip_metadata: ClipMetaData
+    errors: list[str] = field(default_factory=list)
+    slow_path: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+@dataclass
+class PreflightReport:
+    clips: list[ClipPreflight]
+    elapsed_s: float = 0.0
+
+    @property
+    def failing(self) -> list[ClipPreflight]:
+        return [clip for clip in self.clips if not clip.ok]
+
+    @property
+    def can_stream_copy(self) -> bool:
+        return not any(clip.errors or clip.slow_path for clip in self.clips)
+
+    def summary(self) -> str:
+        lines = [f'Preflight of {len(self.clips)} clips took {self.elapsed_s:.1f}s, '
+                 f'{"stream copy" if self.can_stream_copy else "re-encode"} path']
+        for idx, clip in enumerate(self.clips):
+            name = os.path.basename(clip.clip_metadata.filename)
+            lines += [f'  #{idx} {name}: FAILS - {error}' for error in clip.errors]
+            lines += [f'  #{idx} {name}: re-encode - {reason}' for reason in clip.slow_path]
+            lines += [f'  #{idx} {name}: warning - {warning}' for warning in clip.warnings]
+        return '\n'.join(lines)
+
+
+def _scan_clip(clip_metadata: ClipMetaData) -> tuple[dict | None, list | None, str, str | None]:
+    """
+    Container info and all packets of a clip, or the reason they could not be read. Without ffprobe the
+    streams are parsed from the ffmpeg header and packets are None, the packet level checks are skipped
+    """
+    if not os.path.exists(clip_metadata.filename):
+        return None, None, '', 'source file is missing'
+
+    try:
+        probe_data = probe_or_parse_streams(clip_metadata.filename)
+    except (OSError, subprocess.SubprocessError) as e:
+        return None, None, '', f'container cannot be read: {e}'
+
+    try:
+        packets, errors = probe_packets(clip_metadata.filename)
+    except FileNotFoundError:
+        return probe_data, None, '', None
+    except (OSError, subprocess.SubprocessError) as e:
+        return None, None, '', f'container cannot be read: {e}'
+
+    return probe_data, packets, errors, None
+
+
+def _stream_signature(probe_data: dict) -> dict:
+    video = first_stream(probe_data, 'video') or {}
+    audio = first_stream(probe_data, 'audio') or {}
+    return {'video codec': video.get('codec_name'),
+            'frame size': (video.get('width'), video.get('height')),
+            'pixel format': video.get('pix_fmt'),
+            'frame rate': video.get('r_frame_rate'),
+            'audio codec': audio.get('codec_name'),
+            'sample rate': audio.get('sample_rate'),
+            'channels': audio.get('channels')}
+
+
+def _check_timestamps(report: ClipPreflight, stream: dict, kind: str, packets: list, truncation_fails: bool):
+    stream_packets = [packet for packet in packets if packet[0] == stream['index']]
+    dts_values = [packet[2] for packet in stream_packets if packet[2] is not None]
+    backwards = sum(1 for a, b in zip(dts_values, dts_values[1:]) if b < a)
+    if backwards:
+        report.slow_path.append(f'{kind} timestamps go backwards {backwards} times')
+
+    corrupt = sum(1 for packet in stream_packets if 'C' in packet[4])
+    if corrupt:
+        report.warnings.append(f'{corrupt} corrupt {kind} packets')
+
+    start_s = float(stream.get('start_time') or 0)
+    ends = [packet[1] + (packet[3] or 0) - start_s for packet in stream_packets if packet[1] is not None]
+    last_end_s = max(ends) if ends else 0.0
+    if report.clip_metadata.trim_end_s - last_end_s > PREFLIGHT_TRUNCATION_TOLERANCE_S:
+        message = (f'truncated: {kind} packets end at {last_end_s:.1f}s, '
+                   f'the clip is used until {report.clip_metadata.trim_end_s:.1f}s')
+        (report.errors if truncation_fails else report.warnings).append(message)
+
+
+def _is_variable_frame_rate(video_stream: dict, video_packets: list) -> bool:
+    pts_values = sorted(packet[1] for packet in video_packets if packet[1] is not None)
+    if has_irregular_frame_intervals(pts_values):
+        return True
+
+    try:
+        r_frame_rate = Fraction(video_stream.get('r_frame_rate', '0/1'))
+        avg_frame_rate = Fraction(video_stream.get('avg_frame_rate', '0/1'))
+    except (ValueError, ZeroDivisionError):
+        return False
+    return bool(r_frame_rate and avg_frame_rate) and abs(r_frame_rate - avg_frame_rate) > r_frame_rate / 100
+
+
+def _check_clip(report: ClipPreflight, probe_data: dict, packets: list | None, errors: str,
+                reference: dict | None, needs_video: bool, needs_audio: bool):
+    clip_metadata = report.clip_metadata
+    if packets is None:
+        report.warnings.append('ffprobe is not found, packet scan skipped')
+        report.slow_path.append('stream parameters are unknown')
+    if errors:
+        report.warnings.append(f'demuxer errors: {errors.strip().splitlines()[-1]}')
+    if clip_metadata.in_point_s >= clip_metadata.trim_end_s:
+        report.errors.append('trim range is empty')
+
+    video = first_stream(probe_data, 'video')
+    audio = first_stream(probe_data, 'audio')
+    if video is not None and video.get('disposition', {}).get('attached_pic'):
+        video = None
+    if needs_video and video is None:
+        report.errors.append('no video stream')
+    if needs_audio and audio is None:
+        report.slow_path.append('no audio stream, silence is generated')
+
+    if packets is None:
+        return
+
+    if video is not None:
+        _check_timestamps(report, video, 'video', packets, truncation_fails=True)
+    if audio is not None:
+        _check_timestamps(report, audio, 'audio', packets, truncation_fails=video is None)
+
+    if video is not None:
+        if _is_variable_frame_rate(video, [packet for packet in packets if packet[0] == video['index']]):
+            report.slow_path.append('variable frame rate')
+        if video.get('codec_name') not in SMART_CUT_ENCODERS:
+            report.slow_path.append(f"codec {video.get('codec_name')} cannot be cut without re-encoding")
+        if video.get('pix_fmt') not in COPY_FRIENDLY_PIX_FMTS:
+            report.slow_path.append(f"pixel format {video.get('pix_fmt')} is converted")
+
+    if reference is not None:
+        signature = _stream_signature(probe_data)
+        mismatches = [key for key, value in signature.items() if value != reference[key]]
+        if mismatches:
+            report.slow_path.append(f"differs from the first clip in {', '.join(mismatches)}")
+
+
+def run_preflight(clips_metadata_list: list[ClipMetaData]) -> PreflightReport:
+    """
+    Checks all clips of an export at packet level, without decoding, in parallel: container readability,
+    truncation, timestamp monotonicity, variable frame rate, stream presence and parameter mismatches
+    """
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=PREFLIGHT_WORKERS) as executor:
+        scans = list(executor.map(_scan_clip, clips_metadata_list))
+
+    needs_video = any(clip.has_video for clip in clips_metadata_list)
+    needs_audio = any(probe_data is not None and first_stream(probe_data, 'audio') is not None
+                      for probe_data, _, _, _ in scans)
+    reference = next((_stream_signature(probe_data) for probe_data, packets, _, _ in scans
+                      if packets is not None), None)
+
+    reports = []
+    for clip_metadata, (probe_data, packets, errors, failure) in zip(clips_metadata_list, scans):
+        report = ClipPreflight(clip_metadata)
+        if failure is not None:
+            report.errors.append(failure)
+        else:
+            _check_clip(report, probe_data, packets, errors, reference, needs_video, needs_audio)
+        reports.append(report)
+
+    return PreflightReport(reports, time.monotonic() - started)
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from dataclasses import replace
+
+import imageio_ffmpeg
+
+from src.cache import segment_cache
+from src.ffmpeg_extractor import probe_streams
+from src.processes import process_manager, Lane, last_error_line
+from src.render.ffmpeg_graph import FfmpegGraphRenderer, RenderCancelled
+from src.render.output import output_args, concat_list_entry
+from src.schemas import ClipMetaData, EncodingProfile
+from src.utils import file_fingerprint
+
+
+def fix_profile(clips_metadata_list: list[ClipMetaData], concat_method: str,
+                profile: EncodingProfile) -> EncodingProfile:
+    """ Profile with the output size and fps of the whole timeline resolved, so separately rendered parts of it
+    are encoded with identical parameters and can be joined by stream copy. For 'compose' the size is only the
+    canvas, parts pad their clips to it without scaling them, same as the whole timeline render does """
+    renderer = FfmpegGraphRenderer(clips_metadata_list, '', concat_method, profile)
+    probes = [probe_streams(clip.filename) for clip in clips_metadata_list]
+    width, height = renderer.output_size(probes)
+    fps = renderer.output_fps(probes)
+    canvas_only = concat_method == 'compose' and not (profile.width and profile.height)
+    return replace(profile, width=width, height=height, fps=float(fps), output_mode='mp4',
+                   pad_only=profile.pad_only or canvas_only)
+
+
+def join_segments(segment_paths: list[str], file_path: str, profile: EncodingProfile, tmp_folder: str):
+    """ Joins segments rendered with the same parameters without re-encoding, muxed for the output mode """
+    list_path = os.path.join(tmp_folder, 'segments.txt')
+    with open(list_path, 'w', encoding='utf-8') as list_file:
+        for segment_path in segment_paths:
+            list_file.write(concat_list_entry(segment_path))
+
+    command = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+               "-f", "concat", "-safe", "0", "-i", list_path,
+               "-c", "copy", *output_args(profile, file_path)]
+    result = process_manager.run(command, Lane.RENDER)
+    if result.returncode != 0:
+        raise RuntimeError(last_error_line(result))
+
+
+class SegmentedRenderer:
+    """
+    Renders every clip as its own segment with the ffmpeg graph backend and joins the segments by stream copy.
+
+    Segments are kept in the segment cache under a hash of the source fingerprint, the trim range, the concat
+    method and the fixed encoding profile, so a re-export encodes only the clips whose inputs changed and
+    copies the rest.
+    """
+
+    def __init__(self, clips_metadata_list: list[ClipMetaData], file_path: str, concat_method: str = 'chain',
+                 profile: EncodingProfile = None):
+        self.clips = clips_metadata_list
+        self.file_path = file_path
+        self.concat_method = concat_method
+        self.profile = profile or EncodingProfile()
+        self.current_renderer: FfmpegGraphRenderer | None = None
+        self.cancelled = False
+
+    def segment_key(self, clip_metadata: ClipMetaData, segment_profile: EncodingProfile) -> str:
+        return segment_cache.segment_key({'fingerprint': clip_metadata.fingerprint
+                                                         or file_fingerprint(clip_metadata.filename),
+                                          'in_point_s': round(clip_metadata.in_point_s, 6),
+                                          'trim_end_s': round(clip_metadata.trim_end_s, 6),
+                                          'concat_method': self.concat_method,
+                                          'profile': segment_profile.to_dict()})
+
+    def render(self, progress=None):
+        segment_profile = fix_profile(self.clips, self.concat_method, self.profile)
+        durations_ms = [int(clip.trimmed_duration_s * 1000) for clip in self.clips]
+        total_ms = sum(durations_ms)
+        if progress is not None:
+            progress(max(total_ms, 1))
+
+        offsets_ms = [sum(durations_ms[:idx]) for idx in range(len(self.clips))]
+        segment_paths = []
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            for clip_metadata, offset_ms in zip(self.clips, offsets_ms):
+                if self.cancelled:
+                    raise RenderCancelled('render is cancelled')
+
+                key = self.segment_key(clip_metadata, segment_profile)
+                segment_path = segment_cache.get(key)
+                if segment_path is None:
+                    segment_path = self._render_segment(clip_metadata, segment_profile, key, tmp_folder,
+                                                        offset_ms, progress)
+                segment_paths.append(segment_path)
+                if progress is not None:
+                    progress(offset_ms + int(clip_metadata.trimmed_duration_s * 1000))
+
+            join_segments(segment_paths, self.file_path, self.profile, tmp_folder)
+
+        segment_cache.evict(keep=set(segment_paths))
+
+    def _render_segment(self, clip_metadata: ClipMetaData, segment_profile: EncodingProfile, key: str,
+                        tmp_folder: str, offset_ms: int, progress) -> str:
+        rendered_path = os.path.join(tmp_folder, f'{key}.mp4')
+        self.current_renderer = FfmpegGraphRenderer([clip_metadata], rendered_path, self.concat_method,
+                                                    segment_profile)
+        segment_total = []
+
+        def segment_progress(value: int):
+            # the renderer reports its total first, then the done part
+            if not segment_total:
+                segment_total.append(value)
+            else:
+                progress(offset_ms + value)
+
+        self.current_renderer.render(segment_progress if progress is not None else None)
+        return segment_cache.put(key, rendered_path)
+
+    def cancel(self):
+        self.cancelled = True
+        if self.current_renderer is not None:
+            self.current_renderer.cancel()
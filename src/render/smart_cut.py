@@ -0,0 +1,184 @@
+import os
+import tempfile
+from dataclasses import dataclass
+
+import imageio_ffmpeg
+
+from src.ffmpeg_extractor import probe_streams, probe_keyframes, first_stream
+from src.processes import process_manager, Lane, last_error_line
+from src.render.output import output_args, concat_list_entry
+from src.schemas import ClipMetaData, EncodingProfile
+
+SMART_CUT_ENCODERS = {'h264': ('libx264', 'h264_mp4toannexb'),
+                      'hevc': ('libx265', 'hevc_mp4toannexb')}
+KEYFRAME_EPSILON_S = 0.001
+
+
+@dataclass
+class CutPart:
+    clip_metadata: ClipMetaData
+    start_s: float
+    end_s: float
+    copy: bool
+
+
+class SmartCutRenderer:
+    """
+    Chains clips with stream copy wherever it is possible.
+
+    Every clip is split at its keyframes: the GOP-aligned middle of the trimmed range is copied as is, and only
+    the partial GOPs at the in and out points are re-encoded with the codec and parameters of the source.
+    Video parts are cut to MPEG-TS, so the re-encoded and the copied parts carry their own parameter sets, and
+    then joined to the output without re-encoding. Audio is never re-encoded: the trimmed range of every clip is
+    copied whole, so encoder priming of re-encoded parts cannot shift it against the video. Sources must share
+    codec, frame size, pixel format, frame rate and audio parameters, see from_clips().
+    """
+
+    def __init__(self, clips_metadata_list: list[ClipMetaData], file_path: str, video_stream: dict,
+                 audio_stream: dict | None, start_times: list[float], profile: EncodingProfile = None):
+        self.clips = clips_metadata_list
+        self.file_path = file_path
+        self.profile = profile or EncodingProfile()
+        self.start_times = start_times
+        self.video_stream = video_stream
+        self.audio_stream = audio_stream
+        self.ffmpeg_path = imageio_ffmpeg.get_ffmpeg_exe()
+
+    @staticmethod
+    def _stream_signature(probe_data: dict) -> tuple | None:
+        video = first_stream(probe_data, 'video')
+        if video is None or video.get('codec_name') not in SMART_CUT_ENCODERS:
+            return None
+
+        audio = first_stream(probe_data, 'audio')
+        audio_signature = None
+        if audio is not None:
+            audio_signature = (audio.get('codec_name'), audio.get('sample_rate'), audio.get('channels'))
+
+        return (video.get('codec_name'), video.get('width'), video.get('height'), video.get('pix_fmt'),
+                video.get('r_frame_rate'), audio_signature)
+
+    @classmethod
+    def from_clips(cls, clips_metadata_list: list[ClipMetaData], file_path: str,
+                   profile: EncodingProfile = None) -> 'SmartCutRenderer | None':
+        """ Returns a renderer if all sources are stream compatible, otherwise None """
+        signature = None
+        probe_data = None
+        start_times = []
+        for clip_metadata in clips_metadata_list:
+            probe_data = probe_streams(clip_metadata.filename)
+            clip_signature = cls._stream_signature(probe_data)
+            if clip_signature is None or (signature is not None and clip_signature != signature):
+                return None
+            signature = clip_signature
+            start_times.append(float(first_stream(probe_data, 'video').get('start_time') or 0))
+
+        if probe_data is None:
+            return None
+
+        return cls(clips_metadata_list, file_path, first_stream(probe_data, 'video'), first_stream(probe_data, 'audio'),
+                   start_times, profile)
+
+    @staticmethod
+    def split_clip(clip_metadata: ClipMetaData, keyframes: list[float]) -> list[CutPart]:
+        start_s = clip_metadata.in_point_s
+        end_s = clip_metadata.trim_end_s
+        inner_keyframes = [kf for kf in keyframes if start_s - KEYFRAME_EPSILON_S <= kf <= end_s]
+        if not inner_keyframes:
+            return [CutPart(clip_metadata, start_s, end_s, copy=False)]
+
+        copy_start_s = inner_keyframes[0]
+        copy_end_s = end_s if end_s >= clip_metadata.duration_s - KEYFRAME_EPSILON_S else inner_keyframes[-1]
+        if copy_end_s - copy_start_s <= KEYFRAME_EPSILON_S:
+            return [CutPart(clip_metadata, start_s, end_s, copy=False)]
+
+        parts = []
+        if copy_start_s - start_s > KEYFRAME_EPSILON_S:
+            parts.append(CutPart(clip_metadata, start_s, copy_start_s, copy=False))
+        parts.append(CutPart(clip_metadata, copy_start_s, copy_end_s, copy=True))
+        if end_s - copy_end_s > KEYFRAME_EPSILON_S:
+            parts.append(CutPart(clip_metadata, copy_end_s, end_s, copy=False))
+
+        return parts
+
+    def _part_command(self, part: CutPart, part_path: str) -> list[str]:
+        encoder, annexb_filter = SMART_CUT_ENCODERS[self.video_stream['codec_name']]
+        command = [
+            self.ffmpeg_path, "-y",
+            "-ss", f"{part.start_s:.6f}",
+            "-i", part.clip_metadata.filename,
+            "-t", f"{part.end_s - part.start_s:.6f}",
+            "-map", "0:v:0",
+        ]
+        if part.copy:
+            command += ["-c", "copy", "-bsf:v", annexb_filter]
+        else:
+            command += ["-c:v", encoder,
+                        "-pix_fmt", self.video_stream['pix_fmt'],
+                        "-r", self.video_stream['r_frame_rate'],
+                        "-bsf:v", annexb_filter]
+
+        return command + ["-avoid_negative_ts", "make_zero", "-f", "mpegts", part_path]
+
+    def _audio_command(self, clip_metadata: ClipMetaData, audio_path: str) -> list[str]:
+        """ Trimmed audio of a clip by stream copy. It is seeked on the output: a seek on the input would copy the
+        audio packets from the previous video keyframe along """
+        return [self.ffmpeg_path, "-y",
+                "-i", clip_metadata.filename,
+                "-ss", f"{clip_metadata.in_point_s:.6f}",
+                "-t", f"{clip_metadata.trimmed_duration_s:.6f}",
+                "-map", "0:a:0", "-c", "copy",
+                "-f", "matroska", audio_path]
+
+    @staticmethod
+    def _run(command: list[str]):
+        result = process_manager.run(command, Lane.RENDER)
+        if result.returncode != 0:
+            raise RuntimeError(last_error_line(result))
+
+    def render(self, progress=None):
+        parts = []
+        for clip_metadata, start_time in zip(self.clips, self.start_times):
+            index = clip_metadata.packet_index
+            source_keyframes = index.keyframe_times if index else probe_keyframes(clip_metadata.filename)
+            keyframes = [kf - start_time for kf in source_keyframes]
+            parts += self.split_clip(clip_metadata, keyframes)
+
+        audio_clips = self.clips if self.audio_stream is not None else []
+        steps = len(parts) + len(audio_clips) + 1
+        if progress is not None:
+            progress(steps)
+
+        with tempfile.TemporaryDirectory() as tmp_folder:
+            list_path = os.path.join(tmp_folder, 'parts.txt')
+            with open(list_path, 'w', encoding='utf-8') as list_file:
+                for idx, part in enumerate(parts):
+                    part_path = os.path.join(tmp_folder, f'part{idx:05d}.ts')
+                    self._run(self._part_command(part, part_path))
+                    list_file.write(concat_list_entry(part_path))
+                    if progress is not None:
+                        progress(idx + 1)
+
+            # every clip gets exactly its trimmed duration, the audio cut at packets does not add up over clips
+            audio_list_path = os.path.join(tmp_folder, 'audio.txt')
+            with open(audio_list_path, 'w', encoding='utf-8') as list_file:
+                for idx, clip_metadata in enumerate(audio_clips):
+                    audio_path = os.path.join(tmp_folder, f'audio{idx:05d}.mka')
+                    self._run(self._audio_command(clip_metadata, audio_path))
+                    list_file.write(concat_list_entry(audio_path))
+                    list_file.write(f"duration {clip_metadata.trimmed_duration_s:.6f}\n")
+                    if progress is not None:
+                        progress(len(parts) + idx + 1)
+
+            command = [self.ffmpeg_path, "-y",
+                       "-f", "concat", "-safe", "0",
+                       "-i", list_path]
+            if audio_clips:
+                command += ["-f", "concat", "-safe", "0",
+                            "-i", audio_list_path,
+                            "-map", "0:v:0", "-map", "1:a:0"]
+            command += ["-c", "copy", *output_args(self.profile, self.file_path)]
+            self._run(command)
+
+        if progress is not None:
+            progress(steps)
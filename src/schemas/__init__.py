@@ -1 +1,3 @@
-from .clip_data import ClipMetaData, PreviewData
\ No newline at end of file
+from .clip_data import ClipMetaData, PreviewData
+from .render_profile import EncodingProfile
+from .render_manifest import RenderManifest
\ No newline at end of file
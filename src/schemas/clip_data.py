@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict, fields
 from PyQt6.QtGui import QPixmap
 
+from src.cache import packet_indexes, PacketIndex
+
 
 @dataclass
 class PreviewData:
@@ -23,6 +25,52 @@ class ClipMetaData:
     scaled_width:int = None
     scaled_height:int = None
     all_frames_folder: str = None
+    frames_time_step: float = 0.0
+    fingerprint: str = None
+    in_point_s: float = 0.0
+    out_point_s: float = None
+    has_video: bool = True
+    has_audio: bool = True
+    waveform_path: str = None
+    black_ranges: list = None  # [start, end] in seconds found by the analysis pass, None if not analysed
+    silent_ranges: list = None
+
+    @property
+    def trim_end_s(self) -> float:
+        return self.duration_s if self.out_point_s is None else self.out_point_s
+
+    @property
+    def trimmed_duration_s(self) -> float:
+        return self.trim_end_s - self.in_point_s
+
+    @property
+    def is_audio_only(self) -> bool:
+        return not self.has_video
+
+    @property
+    def is_trimmed(self) -> bool:
+        return self.in_point_s > 0 or self.trim_end_s < self.duration_s
+
+    @property
+    def packet_index(self) -> PacketIndex | None:
+        """ Keyframe and packet index of the source built on import, None if it was not built """
+        if not self.has_video or not self.fingerprint:
+            return None
+        return packet_indexes.get(self.fingerprint)
+
+    def keyframe_at_or_before(self, time_s: float) -> float | None:
+        """ Source time of the nearest keyframe at or before time_s, None if not known """
+        index = self.packet_index
+        return index.keyframe_at_or_before(time_s) if index else None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ClipMetaData':
+        """ Unknown keys are skipped, so data written by newer versions can still be read """
+        known_fields = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known_fields})
 
     # preview_small: QPixmap = None # --
     # preview_large: QPixmap = None # --
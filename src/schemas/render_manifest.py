@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+
+from src.schemas.clip_data import ClipMetaData
+from src.schemas.render_profile import EncodingProfile
+
+
+@dataclass
+class RenderManifest:
+    """ Everything needed to render a timeline without the editor: ordered clips, method and profile """
+    clips: list[ClipMetaData]
+    concat_method: str = 'chain'
+    profile: EncodingProfile = field(default_factory=EncodingProfile)
+
+    def to_dict(self) -> dict:
+        return {'clips': [clip.to_dict() for clip in self.clips],
+                'concat_method': self.concat_method,
+                'profile': self.profile.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RenderManifest':
+        return cls([ClipMetaData.from_dict(clip) for clip in data['clips']],
+                   data.get('concat_method', 'chain'),
+                   EncodingProfile.from_dict(data.get('profile', {})))
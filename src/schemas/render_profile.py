@@ -0,0 +1,26 @@
+from dataclasses import dataclass, asdict, fields
+
+
+@dataclass
+class EncodingProfile:
+    video_codec: str = 'libx264'
+    preset: str = 'medium'
+    crf: int = 20
+    pix_fmt: str = 'yuv420p'
+    audio_codec: str = 'aac'
+    audio_bitrate: str = '192k'
+    audio_sample_rate: int = 44100
+    fps: float = None
+    width: int = None
+    height: int = None
+    output_mode: str = 'mp4'  # 'mp4', 'fmp4' (fragmented mp4) or 'hls' (segments + playlist)
+    segment_s: float = 6.0
+    pad_only: bool = False  # width and height are a canvas, 'compose' clips are centered on it unscaled
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'EncodingProfile':
+        known_fields = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known_fields})
@@ -0,0 +1,80 @@
+from bisect import bisect_right
+from typing import Callable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSlot
+
+from src.options import SCRUB_MIN_INTERVAL_MS, SCRUB_SEEK_TIMEOUT_MS
+
+
+class SeekCoalescer(QObject):
+    """
+    Seeks of a dragged slider, at the pace the decoder keeps up with.
+
+    Only the latest requested position is kept. The next seek is issued once the previous one is reported done
+    by seek_done (or SCRUB_SEEK_TIMEOUT_MS passed) and no sooner than SCRUB_MIN_INTERVAL_MS after it.
+    With keyframes set, positions are snapped to the nearest keyframe, which the decoder shows without
+    decoding the frames in between.
+    """
+
+    def __init__(self, seek: Callable[[int], None], parent=None):
+        super().__init__(parent)
+        self.seek = seek
+        self.keyframes_ms: list[int] = []
+        self.pending_ms: int | None = None
+        self.last_ms: int | None = None
+        self.in_flight = False
+
+        self.interval_timer = QTimer(self)
+        self.interval_timer.setSingleShot(True)
+        self.interval_timer.setInterval(SCRUB_MIN_INTERVAL_MS)
+        self.interval_timer.timeout.connect(self._issue_pending)
+
+        self.timeout_timer = QTimer(self)
+        self.timeout_timer.setSingleShot(True)
+        self.timeout_timer.setInterval(SCRUB_SEEK_TIMEOUT_MS)
+        self.timeout_timer.timeout.connect(self.seek_done)
+
+    def set_keyframes(self, keyframes_s: list[float]):
+        self.keyframes_ms = [round(time_s * 1000) for time_s in keyframes_s]
+
+    def snap(self, position_ms: int) -> int:
+        """ Nearest keyframe to position_ms, the position itself if keyframes are not known """
+        if not self.keyframes_ms:
+            return position_ms
+
+        idx = bisect_right(self.keyframes_ms, position_ms)
+        candidates = self.keyframes_ms[max(idx - 1, 0):idx + 1]
+        return min(candidates, key=lambda keyframe_ms: abs(keyframe_ms - position_ms))
+
+    def request(self, position_ms: int):
+        self.pending_ms = self.snap(position_ms)
+        self._issue_pending()
+
+    @pyqtSlot()
+    def seek_done(self):
+        self.in_flight = False
+        self.timeout_timer.stop()
+        self._issue_pending()
+
+    def cancel(self):
+        """ Drops the waiting position, called before the exact seek on release """
+        self.pending_ms = None
+        self.last_ms = None
+        self.in_flight = False
+        self.interval_timer.stop()
+        self.timeout_timer.stop()
+
+    @pyqtSlot()
+    def _issue_pending(self):
+        if self.pending_ms is None or self.in_flight or self.interval_timer.isActive():
+            return
+
+        position_ms, self.pending_ms = self.pending_ms, None
+        if position_ms == self.last_ms:
+            return
+
+        self.last_ms = position_ms
+        self.in_flight = True
+        self.interval_timer.start()
+        self.timeout_timer.start()
+        self.seek(position_ms)
@@ -0,0 +1,2 @@
+from .job_store import JobStore
+from .job_runner import JobRunner, QueueFullError
\ No newline at end of file
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+
+from src.options import SERVICE_MAX_WORKERS, SERVICE_MAX_QUEUE, SERVICE_PROGRESS_SAVE_S
+from src.render import output_path
+from src.schemas import RenderManifest
+from src.service.job_store import JobStore, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from src.workers.concatenator import ConcatEngine, RenderCancelled
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobRunner:
+    """
+    Runs stored jobs with the concat engine on a bounded number of threads.
+
+    At most max_queue jobs wait; submit() raises QueueFullError beyond that, so clients back off instead of
+    piling work up. Progress is kept in memory for streaming and saved to the store every
+    SERVICE_PROGRESS_SAVE_S seconds.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = SERVICE_MAX_WORKERS, max_queue: int = SERVICE_MAX_QUEUE):
+        self.store = store
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.engines: dict[str, ConcatEngine] = {}
+        self.progress: dict[str, float] = {}
+        self.changed = threading.Condition()
+        self.threads = [threading.Thread(target=self._work, daemon=True, name=f'job-runner-{idx}')
+                        for idx in range(max_workers)]
+
+    def start(self):
+        for job in self.store.requeue_unfinished():
+            try:
+                self.jobs.put_nowait(job['id'])
+            except queue.Full:
+                self.store.update(job['id'], status=FAILED, error='queue was full on restart')
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, manifest: dict, backend: str, file_path: str) -> dict:
+        # invalid manifests are refused before they are stored
+        ConcatEngine.check_timeline(self.parse_manifest(manifest).clips)
+        if backend not in ConcatEngine.BACKENDS:
+            raise ValueError(f'unknown backend {backend}')
+        if self.jobs.full():
+            raise QueueFullError('job queue is full')
+
+        job = self.store.create(manifest, backend, file_path)
+        try:
+            self.jobs.put_nowait(job['id'])
+        except queue.Full:
+            self.store.update(job['id'], status=FAILED, error='job queue is full')
+            raise QueueFullError('job queue is full')
+        return job
+
+    @staticmethod
+    def parse_manifest(manifest) -> RenderManifest:
+        """ Raises ValueError for a manifest that is not an object with a non empty list of clip objects """
+        if not isinstance(manifest, dict):
+            raise ValueError('manifest must be a json object')
+        clips = manifest.get('clips')
+        if not isinstance(clips, list) or not clips or not all(isinstance(clip, dict) for clip in clips):
+            raise ValueError('manifest clips must be a non empty list of objects')
+        if not isinstance(manifest.get('profile', {}), dict):
+            raise ValueError('manifest profile must be a json object')
+        return RenderManifest.from_dict(manifest)
+
+    def cancel(self, job_id: str) -> bool:
+        """ Queued jobs are skipped when their turn comes, running ones are stopped """
+        if not self.store.update_if(job_id, (QUEUED, RUNNING), status=CANCELLED):
+            return False
+
+        engine = self.engines.get(job_id)
+        if engine is not None:
+            engine.cancel()
+        self._notify()
+        return True
+
+    def job_state(self, job_id: str) -> dict | None:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+
+        if job['status'] == RUNNING:
+            job['progress'] = self.progress.get(job_id, job['progress'])
+        return job
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """ Blocks until some job changes, False on timeout """
+        with self.changed:
+            return self.changed.wait(timeout)
+
+    def _notify(self):
+        with self.changed:
+            self.changed.notify_all()
+
+    def _work(self):
+        while True:
+            job_id = self.jobs.get()
+            try:
+                self._run_job(job_id)
+            finally:
+                self.jobs.task_done()
+
+    def _run_job(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job['status'] != QUEUED:
+            return
+
+        manifest = RenderManifest.from_dict(job['manifest'])
+        engine = ConcatEngine(manifest.clips, job['file_path'], manifest.concat_method, job['backend'],
+                              manifest.profile)
+        self.engines[job_id] = engine
+        if not self.store.update_if(job_id, (QUEUED,), status=RUNNING, progress=0):
+            self.engines.pop(job_id, None)  # cancelled since it was read
+            return
+        self._notify()
+
+        total = []
+        last_saved = [time.monotonic()]
+
+        def on_progress(value: int):
+            if not total:
+                total.append(max(value, 1))
+                return
+            self.progress[job_id] = min(value / total[0], 1.0)
+            if time.monotonic() - last_saved[0] >= SERVICE_PROGRESS_SAVE_S:
+                last_saved[0] = time.monotonic()
+                self.store.update(job_id, progress=self.progress[job_id])
+            self._notify()
+
+        try:
+            engine.render(on_progress)
+        except RenderCancelled:
+            self.store.update(job_id, status=CANCELLED)
+        except Exception as e:
+            status = CANCELLED if engine.cancelled else FAILED
+            self.store.update(job_id, status=status, error=str(e))
+        else:
+            self.store.update(job_id, status=DONE, progress=1.0,
+                              result_path=output_path(manifest.profile, engine.file_path))
+        finally:
+            self.engines.pop(job_id, None)
+            self.progress.pop(job_id, None)
+            self._notify()
@@ -0,0 +1,86 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINAL_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+class JobStore:
+    """
+    Concatenation jobs kept in sqlite, so queued jobs and results survive a restart of the service.
+    One connection is shared by the server threads behind a lock.
+    """
+
+    def __init__(self, db_path: str):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    manifest TEXT NOT NULL,
+                    backend TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    result_path TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL)""")
+
+    def create(self, manifest: dict, backend: str, file_path: str) -> dict:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO jobs (id, status, manifest, backend, file_path, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(manifest), backend, file_path, now, now))
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list_jobs(self, statuses: tuple[str, ...] = None) -> list[dict]:
+        query = "SELECT * FROM jobs"
+        params = ()
+        if statuses:
+            query += f" WHERE status IN ({', '.join('?' * len(statuses))})"
+            params = statuses
+        with self.lock:
+            rows = self.connection.execute(query + " ORDER BY created", params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def update(self, job_id: str, **fields):
+        fields['updated'] = time.time()
+        assignments = ', '.join(f'{key} = ?' for key in fields)
+        with self.lock, self.connection:
+            self.connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def update_if(self, job_id: str, statuses: tuple[str, ...], **fields) -> bool:
+        """ Updates the job only while its status is one of statuses, False if it was not """
+        fields['updated'] = time.time()
+        assignments = ', '.join(f'{key} = ?' for key in fields)
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN ({', '.join('?' * len(statuses))})",
+                (*fields.values(), job_id, *statuses))
+        return cursor.rowcount > 0
+
+    def requeue_unfinished(self) -> list[dict]:
+        """ Jobs a previous run of the service did not finish are queued again, from the start """
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE jobs SET status = ?, progress = 0 WHERE status = ?", (QUEUED, RUNNING))
+        return self.list_jobs((QUEUED,))
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job['manifest'] = json.loads(job['manifest'])
+        return job
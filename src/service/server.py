@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import re
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.options import CACHE_FOLDER, SERVICE_PORT, SERVICE_MAX_WORKERS, SERVICE_MAX_QUEUE
+from src.service.job_runner import JobRunner, QueueFullError
+from src.service.job_store import JobStore, FINAL_STATUSES, DONE
+
+JOB_PATH = re.compile(r'^/jobs/([0-9a-f]{32})(/events|/cancel|/result)?$')
+EVENTS_KEEPALIVE_S = 15.0
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /jobs                  {"manifest": RenderManifest, "output": path, "backend": "ffmpeg"} -> 202 job
+    GET  /jobs                  all jobs
+    GET  /jobs/<id>             job state with progress 0..1
+    GET  /jobs/<id>/events      progress as server-sent events until the job is finished
+    POST /jobs/<id>/cancel      cancels a queued or running job
+    GET  /jobs/<id>/result      {"path": ...} of a finished job, 409 before that
+    """
+    server_version = 'VideoConcatService/1.0'
+
+    @property
+    def runner(self) -> JobRunner:
+        return self.server.runner
+
+    def _send_json(self, status: HTTPStatus, data, headers: dict = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('request body must be a json object')
+        return data
+
+    def do_GET(self):
+        if self.path == '/jobs':
+            self._send_json(HTTPStatus.OK, [self._public(job) for job in self.runner.store.list_jobs()])
+            return
+
+        match = JOB_PATH.match(self.path)
+        job = self.runner.job_state(match.group(1)) if match else None
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': 'job not found'})
+        elif match.group(2) == '/events':
+            self._stream_events(job['id'])
+        elif match.group(2) == '/result':
+            if job['status'] == DONE:
+                self._send_json(HTTPStatus.OK, {'path': job['result_path']})
+            else:
+                self._send_json(HTTPStatus.CONFLICT, {'error': f"job is {job['status']}"})
+        elif match.group(2) is None:
+            self._send_json(HTTPStatus.OK, self._public(job))
+        else:
+            self._send_json(HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'use POST'})
+
+    def do_POST(self):
+        if self.path == '/jobs':
+            self._submit()
+            return
+
+        match = JOB_PATH.match(self.path)
+        if match is None or match.group(2) != '/cancel':
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': 'not found'})
+        elif self.runner.cancel(match.group(1)):
+            self._send_json(HTTPStatus.OK, self._public(self.runner.job_state(match.group(1))))
+        else:
+            self._send_json(HTTPStatus.CONFLICT, {'error': 'job is unknown or already finished'})
+
+    def _submit(self):
+        try:
+            request = self._read_json()
+            file_path = os.path.abspath(request['output'])
+            job = self.runner.submit(request['manifest'], request.get('backend', 'ffmpeg'), file_path)
+        except QueueFullError as e:
+            self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {'error': str(e)}, {'Retry-After': '5'})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': f'invalid job: {e}'})
+        else:
+            self._send_json(HTTPStatus.ACCEPTED, self._public(job), {'Location': f"/jobs/{job['id']}"})
+
+    def _stream_events(self, job_id: str):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        last_sent = None
+        try:
+            while True:
+                job = self._public(self.runner.job_state(job_id))
+                state = (job['status'], round(job['progress'], 3))
+                if state != last_sent:
+                    self.wfile.write(f"event: progress\ndata: {json.dumps(job)}\n\n".encode())
+                    self.wfile.flush()
+                    last_sent = state
+                if job['status'] in FINAL_STATUSES:
+                    return
+                if not self.runner.wait_for_change(EVENTS_KEEPALIVE_S):
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    @staticmethod
+    def _public(job: dict) -> dict:
+        return {key: job[key] for key in ('id', 'status', 'backend', 'file_path', 'result_path', 'progress',
+                                          'error', 'created', 'updated')}
+
+    def log_message(self, format, *args):
+        print('%s - %s' % (self.address_string(), format % args))
+
+
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], runner: JobRunner):
+        super().__init__(address, JobRequestHandler)
+        self.runner = runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves concatenation jobs over a local HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=SERVICE_MAX_WORKERS)
+    parser.add_argument('--queue', type=int, default=SERVICE_MAX_QUEUE)
+    parser.add_argument('--db', default=os.path.join(CACHE_FOLDER, 'jobs.sqlite3'))
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    runner = JobRunner(JobStore(args.db), args.workers, args.queue)
+    runner.start()
+    with JobServer((args.host, args.port), runner) as server:
+        print(f'Job service is listening on http://{args.host}:{args.port}')
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from src.options import STALL_THRESHOLD_MS, STALL_HEARTBEAT_MS, STALL_STACK_DEPTH, STALL_SITES_SHOWN
+
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class StallSite:
+    site: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: str = ''
+
+
+class StallWatchdog(QObject):
+    """
+    Finds where the GUI event loop stalls.
+
+    A timer on the main thread stamps a heartbeat every STALL_HEARTBEAT_MS. A background thread checks the stamp
+    and, once it is older than STALL_THRESHOLD_MS, takes the main thread's Python stack with sys._current_frames,
+    one per stall. When the main loop is back the heartbeat measures how long it was away and the stall is
+    counted to the innermost frame of the project's own code in that stack. Nothing is done while the loop is
+    responsive, so the watchdog can stay on.
+    """
+    stall_detected = pyqtSignal(str, float)  # call site, stall duration in ms
+
+    def __init__(self, threshold_ms: int = STALL_THRESHOLD_MS, heartbeat_ms: int = STALL_HEARTBEAT_MS):
+        super().__init__()
+        self.threshold_s = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        self.sites: dict[str, StallSite] = {}
+        self.last_beat = time.monotonic()
+        self.captured_stack: list[traceback.FrameSummary] | None = None
+        self.main_thread_id = threading.main_thread().ident
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.timer: QTimer | None = None
+
+    def start(self):
+        """ Called on the main thread once the QApplication exists """
+        if self.thread is not None:
+            return
+
+        self.main_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.heartbeat_ms)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._watch, name='stall-watchdog', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        self.timer.stop()
+
+    def beat(self):
+        now = time.monotonic()
+        stall_s = now - self.last_beat - self.heartbeat_ms / 1000
+        with self.lock:
+            self.last_beat = now
+            stack, self.captured_stack = self.captured_stack, None
+
+        if stall_s >= self.threshold_s:
+            self._record(stack, stall_s * 1000)
+
+    def _watch(self):
+        """ Wakes twice per threshold so a stall is caught while it lasts """
+        interval_s = self.threshold_s / 2
+        while not self.stopped.wait(interval_s):
+            with self.lock:
+                overdue = time.monotonic() - self.last_beat - self.heartbeat_ms / 1000 >= self.threshold_s
+                if not overdue or self.captured_stack is not None:
+                    continue
+
+            frame = sys._current_frames().get(self.main_thread_id)
+            stack = traceback.extract_stack(frame, limit=STALL_STACK_DEPTH) if frame is not None else []
+            with self.lock:
+                if self.captured_stack is None:
+                    self.captured_stack = stack
+
+    @staticmethod
+    def _call_site(stack: list[traceback.FrameSummary]) -> str:
+        """ Innermost frame of the project's code, the innermost frame if there is none """
+        if not stack:
+            return 'unknown'
+
+        own_frames = [frame for frame in stack
+                      if frame.filename.startswith(SOURCE_ROOT) and 'site-packages' not in frame.filename]
+        if own_frames:
+            frame = own_frames[-1]
+            return f'{os.path.relpath(frame.filename, SOURCE_ROOT)}:{frame.lineno} {frame.name}'
+        return f'{stack[-1].filename}:{stack[-1].lineno} {stack[-1].name}'
+
+    def _record(self, stack: list[traceback.FrameSummary] | None, stall_ms: float):
+        site = self._call_site(stack or [])
+        stall_site = self.sites.setdefault(site, StallSite(site))
+        first_time = stall_site.count == 0
+        stall_site.count += 1
+        stall_site.total_ms += stall_ms
+        stall_site.max_ms = max(stall_site.max_ms, stall_ms)
+        if stack:
+            stall_site.stack = ''.join(traceback.format_list(stack))
+
+        print(f'UI stall {stall_ms:.0f} ms at {site}')
+        if first_time and stall_site.stack:
+            print(stall_site.stack)
+        self.stall_detected.emit(site, stall_ms)
+
+    def summary(self, limit: int = STALL_SITES_SHOWN) -> str:
+        """ Call sites by total stalled time """
+        sites = sorted(self.sites.values(), key=lambda stall_site: stall_site.total_ms, reverse=True)[:limit]
+        return '\n'.join(f'{stall_site.total_ms:8.0f} ms total, {stall_site.count:4d}x, '
+                         f'max {stall_site.max_ms:6.0f} ms  {stall_site.site}' for stall_site in sites)
+
+
+stall_watchdog = StallWatchdog()
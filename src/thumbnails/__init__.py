@@ -0,0 +1,2 @@
+from .thumbnail_index import ThumbnailIndex, DENSE_FOLDER_NAME
+from .pixmap_cache import pixmap_cache, PixmapCache
\ No newline at end of file
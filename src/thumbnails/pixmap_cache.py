@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+from PyQt6.QtGui import QPixmap
+
+from src.options import PIXMAP_BUDGET_MB
+
+
+class PixmapCache:
+    """
+    Storyboard pixmaps of timeline items keyed by (clip file, storyboard width), the width standing for the zoom
+    level. The least recently used pixmaps are dropped once their total size is over the budget; items showing
+    them keep only the visible part.
+    """
+
+    def __init__(self, budget_mb: int = PIXMAP_BUDGET_MB):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.pixmaps: OrderedDict[tuple, QPixmap] = OrderedDict()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def pixmap_bytes(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get(self, key: tuple) -> QPixmap | None:
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key: tuple, pixmap: QPixmap):
+        self.discard(key)
+        self.pixmaps[key] = pixmap
+        self.used_bytes += self.pixmap_bytes(pixmap)
+        while self.used_bytes > self.budget_bytes and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.used_bytes -= self.pixmap_bytes(evicted)
+            self.evictions += 1
+
+    def discard(self, key: tuple):
+        pixmap = self.pixmaps.pop(key, None)
+        if pixmap is not None:
+            self.used_bytes -= self.pixmap_bytes(pixmap)
+
+    def stats(self) -> str:
+        return (f'pixmaps {len(self.pixmaps)}, {self.used_bytes / 1024 / 1024:.1f}/'
+                f'{self.budget_bytes / 1024 / 1024:.0f} MB, hits {self.hits}, misses {self.misses}, '
+                f'evicted {self.evictions}')
+
+
+pixmap_cache = PixmapCache()
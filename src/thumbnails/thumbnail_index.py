@@ -0,0 +1,89 @@
+import bisect
+import math
+import os
+
+from PyQt6.QtGui import QPixmap
+
+from src.schemas import ClipMetaData
+
+DENSE_FOLDER_NAME = 'dense'
+
+
+class ThumbnailIndex:
+    """
+    Thumbnail store of one clip: the coarse frames extracted on import plus denser frames extracted later
+    for the viewed ranges.
+
+    Coarse frames lie in the clip's frames folder with a constant time step. Dense frames lie in its 'dense'
+    subfolder and are named by their time in milliseconds, so they are found again on the next start.
+    The nearest frame for a timestamp is found by bisecting the sorted times of all frames, so merging
+    dense frames needs no rebuild of any table.
+    """
+
+    def __init__(self, clip_metadata: ClipMetaData):
+        self.clip_metadata = clip_metadata
+        self.dense_folder = os.path.join(clip_metadata.all_frames_folder, DENSE_FOLDER_NAME)
+        self.times: list[float] = []
+        self.paths: list[str] = []
+        self._pixmaps: dict[str, QPixmap] = {}
+        self._load()
+
+    def __len__(self):
+        return len(self.times)
+
+    def _load(self):
+        coarse_frames = sorted(file for file in os.listdir(self.clip_metadata.all_frames_folder)
+                               if file.endswith(".png"))
+        frames = [(idx * self.clip_metadata.frames_time_step, os.path.join(self.clip_metadata.all_frames_folder, file))
+                  for idx, file in enumerate(coarse_frames)]
+
+        if os.path.isdir(self.dense_folder):
+            frames += [(int(file[:-4]) / 1000, os.path.join(self.dense_folder, file))
+                       for file in os.listdir(self.dense_folder)
+                       if file.endswith(".png") and file[:-4].isdigit()]
+
+        self.merge(frames)
+
+    def merge(self, frames: list[tuple[float, str]]):
+        """ Adds (time, path) frames, a frame at an already known time replaces the old one """
+        merged = dict(zip(self.times, self.paths))
+        merged.update(frames)
+        self.times = sorted(merged)
+        self.paths = [merged[t] for t in self.times]
+
+    def frame_path_at(self, time_s: float) -> str | None:
+        """ Path of the frame nearest to time_s, the later one of two equally near """
+        if not self.times:
+            return None
+
+        idx = bisect.bisect_left(self.times, time_s)
+        if idx == len(self.times) or (idx > 0 and time_s - self.times[idx - 1] < self.times[idx] - time_s):
+            idx -= 1
+        return self.paths[idx]
+
+    def pixmap_at(self, time_s: float) -> QPixmap | None:
+        """ Returns the nearest thumbnail for time_s. Pixmaps are loaded from disk once and kept in memory """
+        path = self.frame_path_at(time_s)
+        if path is None:
+            return None
+
+        pixmap = self._pixmaps.get(path)
+        if pixmap is None:
+            pixmap = QPixmap(path)
+            self._pixmaps[path] = pixmap
+
+        return pixmap
+
+    def frames_count_between(self, start_s: float, end_s: float) -> int:
+        return bisect.bisect_right(self.times, end_s) - bisect.bisect_left(self.times, start_s)
+
+    def needs_density(self, start_s: float, end_s: float, time_step: float) -> bool:
+        """ True if the range has noticeably fewer frames than one per time_step """
+        expected = (end_s - start_s) / time_step
+        return expected >= 1 and self.frames_count_between(start_s, end_s) < expected * 0.8
+
+    def storyboard_frames(self, duration_in_px: int, tile_width: int) -> list[str]:
+        """ Nearest frame paths for each tile of a storyboard duration_in_px wide """
+        tiles_count = math.ceil(duration_in_px / tile_width)
+        tile_s = self.clip_metadata.duration_s / (duration_in_px / tile_width)
+        return [self.frame_path_at(tile * tile_s) for tile in range(tiles_count)]
@@ -0,0 +1,205 @@
+from bisect import bisect_right
+
+from PyQt6.QtCore import QObject, QTimer, QUrl, pyqtSignal, pyqtSlot
+from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+from PyQt6.QtMultimediaWidgets import QVideoWidget
+from PyQt6.QtWidgets import QStackedWidget
+
+from src.options import TIMELINE_POLL_MS
+from src.proxy import proxy_manager
+from src.schemas import ClipMetaData
+
+
+class TimelinePlayback(QObject):
+    """
+    Plays the clips of the timeline back to back, respecting their trims, without rendering.
+
+    Two players take turns: while one plays the current clip, the other has the next clip loaded, sought
+    to its in point and paused, so at the out point of the current clip only the visible widget is switched
+    and the prerolled player is started. Positions are reported in global timeline milliseconds.
+    """
+    position_changed = pyqtSignal(int)
+    duration_changed = pyqtSignal(int)
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stack = QStackedWidget()
+        self.players: list[QMediaPlayer] = []
+        self.audio_outputs: list[QAudioOutput] = []
+        for player_idx in range(2):
+            video_widget = QVideoWidget()
+            audio_output = QAudioOutput(self)
+            player = QMediaPlayer(self)
+            player.setVideoOutput(video_widget)
+            player.setAudioOutput(audio_output)
+            player.mediaStatusChanged.connect(lambda status, idx=player_idx: self.on_media_status_changed(idx, status))
+            self.stack.addWidget(video_widget)
+            self.players.append(player)
+            self.audio_outputs.append(audio_output)
+
+        self.clips: list[ClipMetaData] = []
+        self.offsets_ms: list[int] = []
+        self.total_ms = 0
+        self.active = 0
+        self.loaded_clips = [-1, -1]  # clip index loaded in each player
+        self.pending_positions: list[int | None] = [None, None]
+        self.playing = False
+        self.volume = 0.8
+        self.audio_outputs[self.active].setVolume(self.volume)
+        self.audio_outputs[self.idle].setVolume(0)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(TIMELINE_POLL_MS)
+        self.poll_timer.timeout.connect(self.poll_position)
+
+    @property
+    def idle(self) -> int:
+        return 1 - self.active
+
+    @property
+    def clip_idx(self) -> int:
+        return self.loaded_clips[self.active]
+
+    def set_clips(self, clips: list[ClipMetaData]):
+        self.stop_players()
+        self.clips = list(clips)
+        self.offsets_ms = []
+        self.total_ms = 0
+        for clip in self.clips:
+            self.offsets_ms.append(self.total_ms)
+            self.total_ms += int(clip.trimmed_duration_s * 1000)
+
+        self.loaded_clips = [-1, -1]
+        self.duration_changed.emit(self.total_ms)
+        self.seek(0)
+
+    def is_playing(self) -> bool:
+        return self.playing
+
+    def play(self):
+        if not self.clips:
+            return
+
+        self.playing = True
+        self.players[self.active].play()
+        self.poll_timer.start()
+
+    def pause(self):
+        self.playing = False
+        self.poll_timer.stop()
+        self.players[self.active].pause()
+
+    def stop(self):
+        self.pause()
+        if self.clips:
+            self.seek(0)
+
+    def stop_players(self):
+        self.playing = False
+        self.poll_timer.stop()
+        for player in self.players:
+            player.stop()
+
+    def set_volume(self, volume: float):
+        self.volume = volume
+        self.audio_outputs[self.active].setVolume(volume)
+
+    def seek(self, global_ms: int):
+        """ Shows the frame at global_ms of the timeline, the player holding that clip becomes active """
+        if not self.clips:
+            return
+
+        global_ms = max(0, min(global_ms, self.total_ms - 1))
+        clip_idx = max(0, bisect_right(self.offsets_ms, global_ms) - 1)
+        local_ms = self._in_point_ms(clip_idx) + global_ms - self.offsets_ms[clip_idx]
+
+        if self.loaded_clips[self.active] != clip_idx and self.loaded_clips[self.idle] == clip_idx:
+            self._activate(self.idle)
+        if self.loaded_clips[self.active] != clip_idx:
+            self._load(self.active, clip_idx, local_ms)
+        else:
+            self._set_position(self.active, local_ms)
+
+        self._preroll_next()
+        if self.playing:
+            self.players[self.active].play()
+        self.position_changed.emit(global_ms)
+
+    def clip_at(self, global_ms: int) -> tuple[ClipMetaData, float] | None:
+        """ Clip under global_ms of the timeline and the time in its source """
+        if not self.clips:
+            return None
+
+        clip_idx = max(0, bisect_right(self.offsets_ms, global_ms) - 1)
+        return self.clips[clip_idx], (self._in_point_ms(clip_idx) + global_ms - self.offsets_ms[clip_idx]) / 1000
+
+    @pyqtSlot()
+    def poll_position(self):
+        clip_idx = self.clip_idx
+        if clip_idx < 0:
+            return
+
+        position_ms = self.players[self.active].position()
+        out_ms = int(self.clips[clip_idx].trim_end_s * 1000)
+        if position_ms >= out_ms - TIMELINE_POLL_MS // 2:
+            self.switch_to_next()
+            return
+
+        local_ms = max(0, position_ms - self._in_point_ms(clip_idx))
+        self.position_changed.emit(self.offsets_ms[clip_idx] + local_ms)
+
+    def on_media_status_changed(self, player_idx: int, status: QMediaPlayer.MediaStatus):
+        if status == QMediaPlayer.MediaStatus.LoadedMedia and self.pending_positions[player_idx] is not None:
+            self.players[player_idx].setPosition(self.pending_positions[player_idx])
+            self.pending_positions[player_idx] = None
+        elif status == QMediaPlayer.MediaStatus.EndOfMedia and player_idx == self.active and self.playing:
+            self.switch_to_next()
+
+    def switch_to_next(self):
+        next_idx = self.clip_idx + 1
+        if next_idx >= len(self.clips):
+            self.pause()
+            self.position_changed.emit(self.total_ms)
+            self.finished.emit()
+            return
+
+        if self.loaded_clips[self.idle] != next_idx:
+            self._load(self.idle, next_idx, self._in_point_ms(next_idx))
+
+        self._activate(self.idle)
+        if self.playing:
+            self.players[self.active].play()
+        self._preroll_next()
+        self.position_changed.emit(self.offsets_ms[next_idx])
+
+    def _activate(self, player_idx: int):
+        self.players[self.active].pause()
+        self.audio_outputs[self.active].setVolume(0)
+        self.active = player_idx
+        self.audio_outputs[player_idx].setVolume(self.volume)
+        self.stack.setCurrentIndex(player_idx)
+
+    def _preroll_next(self):
+        """ Loads the next clip into the idle player and pauses it at the in point, ready to start """
+        next_idx = self.clip_idx + 1
+        if next_idx < len(self.clips) and self.loaded_clips[self.idle] != next_idx:
+            self._load(self.idle, next_idx, self._in_point_ms(next_idx))
+
+    def _load(self, player_idx: int, clip_idx: int, position_ms: int):
+        clip = self.clips[clip_idx]
+        file_path = proxy_manager.proxy_for(clip) or clip.filename
+        player = self.players[player_idx]
+        player.setSource(QUrl.fromLocalFile(file_path))
+        self.loaded_clips[player_idx] = clip_idx
+        self._set_position(player_idx, position_ms)
+        player.pause()
+
+    def _set_position(self, player_idx: int, position_ms: int):
+        player = self.players[player_idx]
+        if player.mediaStatus() in (QMediaPlayer.MediaStatus.LoadingMedia, QMediaPlayer.MediaStatus.NoMedia):
+            self.pending_positions[player_idx] = position_ms
+        player.setPosition(position_ms)
+
+    def _in_point_ms(self, clip_idx: int) -> int:
+        return int(self.clips[clip_idx].in_point_s * 1000)
@@ -1 +1,4 @@
-from .file_names_extraction import extract_file_name
\ No newline at end of file
+from .file_names_extraction import extract_file_name
+from .fingerprint import file_fingerprint
+from .frame_rate import has_irregular_frame_intervals
+from .images import frame_to_image
\ No newline at end of file
@@ -0,0 +1,21 @@
+import hashlib
+import os
+
+FINGERPRINT_CHUNK_SIZE = 64 * 1024
+
+
+def file_fingerprint(file_path: str) -> str:
+    """ Cheap identity of file content: size, modification time and hash of the first and the last chunks.
+    Args:
+        file_path (str): The path to the file.
+    Returns:
+        str: hex digest that changes whenever the file is replaced or modified."""
+    stat = os.stat(file_path)
+    digest = hashlib.sha1(f'{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_CHUNK_SIZE))
+        if stat.st_size > FINGERPRINT_CHUNK_SIZE:
+            f.seek(max(stat.st_size - FINGERPRINT_CHUNK_SIZE, FINGERPRINT_CHUNK_SIZE))
+            digest.update(f.read(FINGERPRINT_CHUNK_SIZE))
+
+    return digest.hexdigest()
@@ -0,0 +1,17 @@
+import statistics
+from typing import Sequence
+
+from src.options import VFR_INTERVAL_TOLERANCE, VFR_IRREGULAR_SHARE
+
+
+def has_irregular_frame_intervals(frame_times: Sequence[float]) -> bool:
+    """ Variable frame rate rule shared by the packet index and the preflight: more than VFR_IRREGULAR_SHARE
+    of the intervals between the sorted frame_times deviate from the median interval by more than
+    VFR_INTERVAL_TOLERANCE of it """
+    deltas = [b - a for a, b in zip(frame_times, frame_times[1:]) if b > a]
+    if len(deltas) <= 2:
+        return False
+
+    median = statistics.median(deltas)
+    irregular = sum(1 for delta in deltas if abs(delta - median) > median * VFR_INTERVAL_TOLERANCE)
+    return irregular > len(deltas) * VFR_IRREGULAR_SHARE
@@ -0,0 +1,8 @@
+import numpy as np
+from PyQt6.QtGui import QImage
+
+
+def frame_to_image(frame: np.ndarray) -> QImage:
+    """ QImage owning a copy of an rgb24 frame as decoded by ffmpeg """
+    h, w, ch = frame.shape
+    return QImage(frame.tobytes(), w, h, w * ch, QImage.Format.Format_RGB888).copy()
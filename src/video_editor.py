@@ -6,7 +6,10 @@ from PyQt6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QFileDialog, QCom
 from src.UI.color import ColorBackground, ColorOptions
 from src.UI.progress_bar import ProgressBar
 from src import debug_manager
-from src.workers import ConcatenatorWorker
+from src.workers import ConcatenatorWorker, PreflightChecker
+from src.project import save_project, load_project, PROJECT_EXTENSION
+from src.render import OUTPUT_MODES
+from src.schemas import EncodingProfile
 from src.utils import extract_file_name
 
 
@@ -22,11 +25,22 @@ class VideoEditor(QWidget):
         self.btn_process_file = QPushButton("Process File", parent=self)
         self.btn_process_file.setMinimumSize(100, 30)
         self.btn_process_file.clicked.connect(self.process_file)
+
+        self.btn_save_project = QPushButton("Save Project", parent=self)
+        self.btn_save_project.clicked.connect(self.save_project)
+        self.btn_open_project = QPushButton("Open Project", parent=self)
+        self.btn_open_project.clicked.connect(self.open_project)
         self.progress_bar = ProgressBar()
         self.progress_bar.setVisible(False)
         self.cbox_method = QComboBox()
         self.cbox_method.addItem('Chain')
         self.cbox_method.addItem('Compose')
+        self.cbox_backend = QComboBox()
+        for backend in ConcatenatorWorker.BACKENDS:
+            self.cbox_backend.addItem(backend)
+        self.cbox_output = QComboBox()
+        for output_mode in OUTPUT_MODES:
+            self.cbox_output.addItem(output_mode)
 
         self.btn_debug = QPushButton("DEBUG_editor")
         self.btn_debug.clicked.connect(self._debug_pressed)
@@ -45,6 +59,10 @@ class VideoEditor(QWidget):
         buttons_layout.addWidget(self.btn_open_file)
         buttons_layout.addWidget(self.btn_process_file)
         buttons_layout.addWidget(self.cbox_method)
+        buttons_layout.addWidget(self.cbox_backend)
+        buttons_layout.addWidget(self.cbox_output)
+        buttons_layout.addWidget(self.btn_save_project)
+        buttons_layout.addWidget(self.btn_open_project)
         buttons_layout.addWidget(self.btn_debug)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.progress_bar)
@@ -68,15 +86,30 @@ class VideoEditor(QWidget):
 
         self.progress_bar.setVisible(True)
         res_file_path = self._create_concat_file_path(folder_path, clips_names)
+        self.btn_process_file.setEnabled(False)
+
+        preflight_worker = PreflightChecker(clips_data_list)
+        preflight_worker.signals.finished.connect(
+            lambda report: self._preflight_finished(report, clips_data_list, res_file_path))
+        preflight_worker.signals.error.connect(self.worker_error)
+        self.threadpool.start(preflight_worker)
+
+    def _preflight_finished(self, report, clips_data_list: list, res_file_path: str):
+        """ Starts the export unless the preflight found clips the export would fail on """
+        print(report.summary())
+        if report.failing:
+            self.worker_error(f'{len(report.failing)} clips would fail the export, see the preflight report')
+            return
 
         worker = ConcatenatorWorker(clips_data_list,
                                     file_path=res_file_path,
-                                    concat_method=self.cbox_method.currentText().lower()
+                                    concat_method=self.cbox_method.currentText().lower(),
+                                    backend=self.cbox_backend.currentText(),
+                                    profile=EncodingProfile(output_mode=self.cbox_output.currentText())
                                     )
         worker.signals.progress.connect(self.progress_bar.progress_changed)
         worker.signals.finished.connect(self._processing_finished)
         worker.signals.error.connect(self.worker_error)
-        self.btn_process_file.setEnabled(False)
 
         self.threadpool.start(worker)
 
@@ -122,6 +155,35 @@ class VideoEditor(QWidget):
         if filename != '':
             self.preview_window.call_analysis_worker(filename)
 
+    def save_project(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Save Project', QDir.currentPath(),
+                                                   f"VideoConcat project (*{PROJECT_EXTENSION})")
+        if file_path == '':
+            return
+
+        if not file_path.endswith(PROJECT_EXTENSION):
+            file_path += PROJECT_EXTENSION
+
+        try:
+            save_project(file_path, self.preview_window.project_data())
+        except OSError as e:
+            print('ERROR: %s' % e)
+
+    def open_project(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Open Project', QDir.currentPath(),
+                                                   f"VideoConcat project (*{PROJECT_EXTENSION})")
+        if file_path == '':
+            return
+
+        try:
+            project = load_project(file_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print('ERROR: %s' % e)
+            return
+
+        self.player.stop_pressed()
+        self.preview_window.load_project(project)
+
     @pyqtSlot(str)
     def worker_error(self, error:str):
         print('ERROR: %s' % error)
@@ -1,12 +1,24 @@
-from PyQt6.QtCore import QUrl, Qt, QTime, pyqtSlot, pyqtSignal
+from typing import Callable
+
+from PyQt6.QtCore import QUrl, Qt, QTime, QPoint, QThreadPool, pyqtSlot, pyqtSignal
+from PyQt6.QtGui import QPixmap
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
-from PyQt6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QSlider, QFileDialog, QLabel
+from PyQt6.QtWidgets import (QWidget, QPushButton, QVBoxLayout, QHBoxLayout, QSlider, QFileDialog, QLabel,
+                             QStackedWidget, QStyle)
 
 from src import debug_manager
+from src.options import SCRUB_PREVIEW_HEIGHT
+from src.proxy import proxy_manager
+from src.schemas import ClipMetaData
+from src.seek_coalescer import SeekCoalescer
+from src.timeline_playback import TimelinePlayback
+from src.workers import KeyframeProber
 
 
 class VideoPlayer(QWidget):
+    timeline_requested = pyqtSignal()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setContentsMargins(20, 20, 20, 40)
@@ -25,16 +37,41 @@ class VideoPlayer(QWidget):
         self.player.durationChanged.connect(self.duration_changed)
         self.player.positionChanged.connect(self.player_position_changed)
         self.player.mediaStatusChanged.connect(self.play_status_changed)
+        self.current_clip: ClipMetaData | None = None
+        self.current_path: str | None = None
+        self.pending_position: int | None = None  # applied once the source being loaded is ready
+        proxy_manager.proxy_ready.connect(self.on_proxy_ready)
+
+        self.thread_pool = QThreadPool()
+        self.keyframes: dict[str, list[float]] = {}
+        self.scrubber = SeekCoalescer(self.seek_scrubbed, parent=self)
+        self.player.positionChanged.connect(self.scrubber.seek_done)
+        self.resume_after_scrub = False
+        self.thumbnail_at: Callable[[ClipMetaData, float], QPixmap | None] | None = None  # set by the mediator
+        self.scrub_preview = QLabel(parent=self)
+        self.scrub_preview.hide()
+
+        self.timeline = TimelinePlayback(parent=self)
+        self.timeline.position_changed.connect(self.timeline_position_changed)
+        self.timeline.duration_changed.connect(self.timeline_duration_changed)
+        self.timeline.finished.connect(lambda: self.change_btn_play_name(True))
+        self.timeline.position_changed.connect(self.scrubber.seek_done)
+        self.timeline_mode = False
+
+        self.screen = QStackedWidget(parent=self)
+        self.screen.addWidget(self.video_window)
+        self.screen.addWidget(self.timeline.stack)
 
         self.video_slider = QSlider(parent=self)
         self.video_slider.setOrientation(Qt.Orientation.Horizontal)
         self.video_slider.sliderPressed.connect(self.slider_pressed)
-        self.video_slider.sliderMoved.connect(self.slider_pressed)
+        self.video_slider.sliderMoved.connect(self.slider_moved)
+        self.video_slider.sliderReleased.connect(self.slider_released)
 
         self.audio_slider = QSlider()
         self.audio_slider.setOrientation(Qt.Orientation.Horizontal)
         self.audio_slider.setValue(80)
-        self.audio_slider.valueChanged.connect(lambda x: self.audioOutput.setVolume(x / 100))
+        self.audio_slider.valueChanged.connect(self.volume_changed)
 
         self.lbl_timer = QLabel('00:00:00')
         self.lbl_timer.setMaximumHeight(22)
@@ -46,6 +83,10 @@ class VideoPlayer(QWidget):
         self.btn_stop = QPushButton("Stop", parent=self)
         self.btn_stop.clicked.connect(self.stop_pressed)
 
+        self.btn_timeline = QPushButton("Timeline", parent=self)
+        self.btn_timeline.setToolTip('Play all clips of the timeline in their order')
+        self.btn_timeline.clicked.connect(self.timeline_requested.emit)
+
         self.btn_debug = QPushButton("DEBUG", parent=self)
         self.btn_debug.clicked.connect(self._debug_pressed)
         debug_manager.register_widget(self.btn_debug)
@@ -58,7 +99,7 @@ class VideoPlayer(QWidget):
         screen_layout = QVBoxLayout()
         slider_layout = QHBoxLayout()
 
-        screen_layout.addWidget(self.video_window)
+        screen_layout.addWidget(self.screen)
         slider_layout.addWidget(self.video_slider)
         slider_layout.addWidget(self.lbl_timer)
         screen_layout.addLayout(slider_layout)
@@ -66,6 +107,7 @@ class VideoPlayer(QWidget):
         buttons_layout = QHBoxLayout()
         buttons_layout.addWidget(self.btn_stop)
         buttons_layout.addWidget(self.btn_play)
+        buttons_layout.addWidget(self.btn_timeline)
         buttons_layout.addWidget(self.audio_slider)
         buttons_layout.addWidget(self.btn_debug)
 
@@ -80,7 +122,20 @@ class VideoPlayer(QWidget):
     def _debug_action(self, value=None):
         """"""
 
+    def volume_changed(self, value: int):
+        self.audioOutput.setVolume(value / 100)
+        self.timeline.set_volume(value / 100)
+
     def play_pressed(self):
+        if self.timeline_mode:
+            playing = self.timeline.is_playing()
+            self.change_btn_play_name(playing)
+            if playing:
+                self.timeline.pause()
+            else:
+                self.timeline.play()
+            return
+
         playing = self.player.isPlaying()
         self.change_btn_play_name(playing)
 
@@ -96,35 +151,184 @@ class VideoPlayer(QWidget):
             self.btn_play.setText("Pause")
 
     def stop_pressed(self):
-        self.player.stop()
+        if self.timeline_mode:
+            self.timeline.stop()
+        else:
+            self.player.stop()
         self.change_btn_play_name(True)
 
     def player_position_changed(self):
-        position_ms = self.player.position()
+        if not self.timeline_mode and not self.video_slider.isSliderDown():
+            self.show_position(self.player.position())
+
+    def show_position(self, position_ms: int):
         self.video_slider.setValue(position_ms)
+        self.show_time(position_ms)
+
+    def show_time(self, position_ms: int):
         qtime = QTime(0, 0, 0, 0)
         qtime = qtime.addMSecs(position_ms)
         self.lbl_timer.setText(qtime.toString())
 
     def slider_pressed(self):
-        self.player.setPosition(self.video_slider.value())
+        """ Scrubbing pauses playback, seeks go through the coalescer until the slider is released """
+        if self.timeline_mode:
+            self.resume_after_scrub = self.timeline.is_playing()
+            self.timeline.pause()
+            self.scrubber.set_keyframes([])
+        else:
+            self.resume_after_scrub = self.player.isPlaying()
+            self.player.pause()
+            self.scrubber.set_keyframes(self.keyframes.get(self.current_path, []))
+        self.slider_moved(self.video_slider.value())
+
+    def slider_moved(self, position_ms: int):
+        self.show_time(position_ms)
+        self.scrubber.request(position_ms)
+        self.show_scrub_preview(position_ms)
+
+    def slider_released(self):
+        """ The only exact seek of a scrub """
+        self.scrubber.cancel()
+        self.scrub_preview.hide()
+        position_ms = self.video_slider.value()
+        if self.timeline_mode:
+            self.timeline.seek(position_ms)
+            if self.resume_after_scrub:
+                self.timeline.play()
+        else:
+            self.player.setPosition(position_ms)
+            if self.resume_after_scrub:
+                self.player.play()
+
+    def seek_scrubbed(self, position_ms: int):
+        if self.timeline_mode:
+            self.timeline.seek(position_ms)
+        else:
+            self.player.setPosition(position_ms)
+
+    def show_scrub_preview(self, position_ms: int):
+        """ Thumbnail of the scrubbed position above the slider handle, shown before the player catches up """
+        clip_position = self.timeline.clip_at(position_ms) if self.timeline_mode else (
+            (self.current_clip, position_ms / 1000) if self.current_clip else None)
+        pixmap = self.thumbnail_at(*clip_position) if clip_position and self.thumbnail_at else None
+        if pixmap is None or pixmap.isNull():
+            self.scrub_preview.hide()
+            return
+
+        self.scrub_preview.setPixmap(pixmap.scaledToHeight(SCRUB_PREVIEW_HEIGHT,
+                                                           Qt.TransformationMode.SmoothTransformation))
+        self.scrub_preview.adjustSize()
+        slider = self.video_slider
+        handle_x = QStyle.sliderPositionFromValue(slider.minimum(), slider.maximum(), position_ms, slider.width())
+        slider_pos = slider.mapTo(self, QPoint(handle_x, 0))
+        preview_x = min(max(slider_pos.x() - self.scrub_preview.width() // 2, 0),
+                        self.width() - self.scrub_preview.width())
+        self.scrub_preview.move(preview_x, slider_pos.y() - self.scrub_preview.height() - 4)
+        self.scrub_preview.show()
+        self.scrub_preview.raise_()
+
+    def load_keyframes(self, file_path: str):
+        """ Keyframes of an original come from its packet index, proxies and unindexed files are probed """
+        if file_path in self.keyframes:
+            return
+
+        index = self.current_clip.packet_index if self.current_clip is not None else None
+        if index is not None and file_path == self.current_clip.filename:
+            self.keyframes[file_path] = list(index.keyframe_times)
+            return
+
+        self.keyframes[file_path] = []
+        worker = KeyframeProber(file_path)
+        worker.signals.finished.connect(self.on_keyframes_ready)
+        worker.signals.error.connect(self.on_keyframes_error)
+        self.thread_pool.start(worker)
+
+    @pyqtSlot(str, list)
+    def on_keyframes_ready(self, file_path: str, keyframes: list):
+        self.keyframes[file_path] = keyframes
+        if file_path == self.current_path and self.video_slider.isSliderDown() and not self.timeline_mode:
+            self.scrubber.set_keyframes(keyframes)
+
+    @pyqtSlot(str)
+    def on_keyframes_error(self, error: str):
+        print(error)
 
     def duration_changed(self, value: int):
-        self.video_slider.setRange(0, value)
+        if not self.timeline_mode:
+            self.video_slider.setRange(0, value)
+
+    @pyqtSlot(int)
+    def timeline_position_changed(self, global_ms: int):
+        if self.timeline_mode and not self.video_slider.isSliderDown():
+            self.show_position(global_ms)
+
+    @pyqtSlot(int)
+    def timeline_duration_changed(self, total_ms: int):
+        if self.timeline_mode:
+            self.video_slider.setRange(0, total_ms)
+
+    def play_timeline(self, clips: list[ClipMetaData]):
+        """ Switches to playing the clips back to back in the given order, mapped to one timeline """
+        if not clips:
+            return
+
+        self.player.pause()
+        self.timeline_mode = True
+        self.screen.setCurrentWidget(self.timeline.stack)
+        self.timeline.set_clips(clips)
+        self.btn_play.setEnabled(True)
+        self.change_btn_play_name(True)
+
+    def leave_timeline_mode(self):
+        if not self.timeline_mode:
+            return
+
+        self.timeline.stop_players()
+        self.timeline_mode = False
+        self.screen.setCurrentWidget(self.video_window)
+        self.video_slider.setRange(0, max(self.player.duration(), 0))
 
     @pyqtSlot()
     def play_status_changed(self):
         status = self.player.mediaStatus()
         if status == QMediaPlayer.MediaStatus.LoadedMedia:
+            if self.pending_position is not None:
+                self.player.setPosition(self.pending_position)
+                self.pending_position = None
             self.btn_play.setEnabled(True)
         elif status == QMediaPlayer.MediaStatus.NoMedia or status == QMediaPlayer.MediaStatus.InvalidMedia:
             self.btn_play.setEnabled(False)
         elif status == QMediaPlayer.MediaStatus.EndOfMedia:
             self.change_btn_play_name(True)
 
-    def connect_video_to_player(self, file_path:str):
+    def connect_video_to_player(self, clip_metadata: ClipMetaData):
+        """ Plays the proxy of the clip when it is ready, otherwise the original file """
+        self.leave_timeline_mode()
+        self.current_clip = clip_metadata
+        file_path = proxy_manager.proxy_for(clip_metadata) or clip_metadata.filename
+        self.current_path = file_path
+        self.pending_position = None
+        self.load_keyframes(file_path)
         self.player.setSource(QUrl.fromLocalFile(file_path))
         print(self.player.source().toString().split('///')[-1])
         self.player.setPosition(0)
         self.player.pause()
-        self.change_btn_play_name(True)
\ No newline at end of file
+        self.change_btn_play_name(True)
+
+    @pyqtSlot(str, str)
+    def on_proxy_ready(self, video_path: str, proxy_path: str):
+        """ Switches the currently loaded original to its fresh proxy keeping the position """
+        if self.current_clip is None or self.current_clip.filename != video_path:
+            return
+
+        was_playing = self.player.isPlaying()
+        position_ms = self.player.position()
+        self.current_path = proxy_path
+        self.load_keyframes(proxy_path)
+        self.pending_position = position_ms  # a position set while the media is loading is dropped
+        self.player.setSource(QUrl.fromLocalFile(proxy_path))
+        if was_playing:
+            self.player.play()
+        else:
+            self.player.pause()
\ No newline at end of file
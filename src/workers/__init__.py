@@ -1,4 +1,10 @@
 from .concatenator import ConcatenatorWorker
 from .file_analyzer import VideoDataAnalyzer
 from .storyboard_creator import StoryboardCreator
-from .preview_workers_manager import PreviewWorkersManager
\ No newline at end of file
+from .frame_grabber import FrameGrabber
+from .project_validator import ProjectValidator
+from .proxy_creator import ProxyCreator
+from .thumbnail_densifier import ThumbnailDensifier
+from .preflight_checker import PreflightChecker
+from .keyframe_prober import KeyframeProber
+from .preview_workers_manager import PreviewWorkersManager
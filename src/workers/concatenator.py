@@ -1,13 +1,198 @@
+import subprocess
+
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
-from moviepy import  VideoClip, VideoFileClip
+
+from moviepy import  VideoClip, VideoFileClip, AudioFileClip
 from moviepy.video.compositing import CompositeVideoClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 from src import WidgetProgressLogger
+from src.farm import FarmCoordinator
+from src.options import MAX_OPEN_READERS, FARM_WORKERS, PROCESS_RENDER_COST, SEGMENT_CACHE_LIMIT_MB
+from src.processes import process_manager, Lane
+from src.render import SmartCutRenderer, FfmpegGraphRenderer, AudioConcatRenderer, SegmentedRenderer, RenderCancelled
+from src.render.output import FRAGMENTED_MP4_FLAGS
+from src.render.clip_readers import ClipReaderPool, lazy_video_clip, lazy_audio_clip
+from src.schemas import EncodingProfile, RenderManifest
 
 
 class ClipContentProvider:
+    """
+    Creates moviepy clips for the render and closes them afterwards.
+
+    Lazy clips do not hold a reader each for the whole render: readers are opened when the playhead reaches
+    the clip, at most max_open_readers of them are open at a time and all are closed by close().
+    """
+    AUDIO_FPS = 44100
+    DEFAULT_FPS = 25.0
+
+    def __init__(self, clips_metadata_list: list, max_open_readers: int = MAX_OPEN_READERS):
+        self.clips_metadata = clips_metadata_list
+        self.max_open_readers = max_open_readers
+        self.opened_clips = []
+        self.pools: list[ClipReaderPool] = []
+
+    @staticmethod
+    def create_video_clip(clip_metadata) -> VideoFileClip:
+        clip = VideoFileClip(clip_metadata.filename)
+        if clip_metadata.is_trimmed:
+            return clip.subclipped(clip_metadata.in_point_s, clip_metadata.trim_end_s)
+        return clip
+
+    def create_video_clips(self) ->list[VideoFileClip]:
+        clips = [ClipContentProvider.create_video_clip(clip) for clip in self.clips_metadata]
+        self.opened_clips += clips
+        return clips
+
+    def create_lazy_video_clips(self) -> list[VideoClip]:
+        # parsed from the header ffmpeg prints, the bundled ffmpeg is enough
+        infos = [ffmpeg_parse_infos(clip.filename) for clip in self.clips_metadata]
+        filenames = [clip.filename for clip in self.clips_metadata]
+        # the audio pool reads ahead by its own index, so it holds the clips with an audio stream only
+        audio_filenames = [filename for filename, clip_infos in zip(filenames, infos) if clip_infos.get('audio_found')]
+        video_pool = ClipReaderPool(lambda idx: VideoFileClip(filenames[idx], audio=False),
+                                    len(filenames), self.max_open_readers)
+        audio_pool = ClipReaderPool(lambda idx: AudioFileClip(audio_filenames[idx], fps=self.AUDIO_FPS),
+                                    len(audio_filenames), self.max_open_readers)
+        self.pools += [video_pool, audio_pool]
+
+        clips = []
+        audio_idx = 0
+        for idx, (clip_metadata, clip_infos) in enumerate(zip(self.clips_metadata, infos)):
+            clip = lazy_video_clip(video_pool, idx, clip_metadata.in_point_s, clip_metadata.trimmed_duration_s,
+                                   tuple(clip_infos['video_size']), clip_infos.get('video_fps') or self.DEFAULT_FPS)
+            if clip_infos.get('audio_found'):
+                clip.audio = lazy_audio_clip(audio_pool, audio_idx, clip_metadata.in_point_s,
+                                             clip_metadata.trimmed_duration_s, self.AUDIO_FPS)
+                audio_idx += 1
+            clips.append(clip)
+
+        return clips
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+        for clip in self.opened_clips:
+            clip.close()
+        self.pools.clear()
+        self.opened_clips.clear()
+
+
+class _ProgressEmitter:
+    """ Gives a progress callback the emit() of a signal, as the moviepy progress logger expects """
+    def __init__(self, callback):
+        self.emit = callback
+
+
+class ConcatEngine:
+    """
+    Picks the render path for a timeline and runs it. It has no Qt dependencies, so ConcatenatorWorker and the
+    job service share it.
+
+    progress is called with the total first and with the done part afterwards. cancel() kills the running
+    ffmpeg process where the renderer supports it, other renderers stop on their next progress report.
+    """
+    BACKENDS = ('moviepy', 'ffmpeg', 'farm') if FARM_WORKERS else ('moviepy', 'ffmpeg')
+
+    def __init__(self, clips_data_list: list, file_path: str, concat_method: str = 'chain', backend: str = 'moviepy',
+                 profile: EncodingProfile = None):
+        self.video_concat: VideoClip | None = None
+        self.clips = clips_data_list
+        self.file_path = file_path
+        self.concat_method = concat_method
+        self.backend = backend
+        self.profile = profile or EncodingProfile()
+        self.progress = None
+        self.renderer = None
+        self.cancelled = False
+
+    def _report_progress(self, value: int):
+        if self.cancelled:
+            raise RenderCancelled('render is cancelled')
+        if self.progress is not None:
+            self.progress(value)
+
+    def _smart_cut_renderer(self) -> SmartCutRenderer | None:
+        """
+        Chained stream compatible sources with trims are joined by stream copy, re-encoding only partial GOPs of
+        the trims. It stands in for the local backends only: the farm keeps its renders, and a profile with its
+        own size or fps needs the re-encode
+        """
+        if self.concat_method != 'chain' or self.backend == 'farm' or not any(clip.is_trimmed for clip in self.clips):
+            return None
+        if self.profile.width or self.profile.height or self.profile.fps:
+            return None
+
+        try:
+            return SmartCutRenderer.from_clips(self.clips, self.file_path, self.profile)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f'Smart cut is not available: {e}')
+            return None
+
+    def _render_with_moviepy(self):
+        content_provider = ClipContentProvider(self.clips)
+        try:
+            if self.concat_method == 'chain':
+                clips = content_provider.create_lazy_video_clips()
+            else:
+                clips = content_provider.create_video_clips()
+
+            ffmpeg_params = None
+            if self.profile.output_mode == 'fmp4':
+                ffmpeg_params = ['-movflags', FRAGMENTED_MP4_FLAGS]
+
+            # clips are probed before the reservation, probes run on the import lane
+            with process_manager.reserve(Lane.RENDER, PROCESS_RENDER_COST):
+                self.video_concat = (CompositeVideoClip
+                                 .concatenate_videoclips(clips, method=self.concat_method)
+                                 .write_videofile(self.file_path,
+                                                  logger=WidgetProgressLogger(_ProgressEmitter(self._report_progress)),
+                                                  ffmpeg_params=ffmpeg_params)
+                                 )
+        finally:
+            content_provider.close()
+
+    def _render_video(self):
+        self.renderer = self._smart_cut_renderer()
+        if self.renderer is not None:
+            self.renderer.render(self._report_progress)
+        elif self.backend == 'farm':
+            FarmCoordinator(FARM_WORKERS).render(RenderManifest(self.clips, self.concat_method, self.profile),
+                                                 self.file_path, self._report_progress)
+        elif self.backend == 'ffmpeg' or self.profile.output_mode == 'hls':
+            # fmp4 and hls are written while rendering, the segment join would only start them at the end
+            incremental = self.profile.output_mode in ('fmp4', 'hls')
+            cached = SEGMENT_CACHE_LIMIT_MB and not incremental
+            renderer_class = SegmentedRenderer if cached else FfmpegGraphRenderer
+            self.renderer = renderer_class(self.clips, self.file_path, self.concat_method, self.profile)
+            self.renderer.render(self._report_progress)
+        else:
+            self._render_with_moviepy()
+
     @staticmethod
-    def create_video_clips(clips_metadata_list:list) ->list[VideoFileClip]:
-        return [VideoFileClip(clip.filename) for clip in clips_metadata_list]
+    def check_timeline(clips_data_list: list):
+        """ Audio files are joined only with other audio files, the video backends have no input for them """
+        if any(clip.is_audio_only for clip in clips_data_list) \
+                and not AudioConcatRenderer.is_audio_timeline(clips_data_list):
+            raise ValueError('audio files can only be joined with other audio files, '
+                             'the timeline mixes them with videos')
+
+    def render(self, progress=None):
+        self.progress = progress
+        self.check_timeline(self.clips)
+        if AudioConcatRenderer.is_audio_timeline(self.clips):
+            self.renderer = AudioConcatRenderer.from_clips(self.clips, self.file_path)
+            self.file_path = self.renderer.file_path  # extension of the audio container
+            self.renderer.render(self._report_progress)
+        else:
+            self._render_video()
+
+        if self.cancelled:
+            raise RenderCancelled('render is cancelled')
+
+    def cancel(self):
+        self.cancelled = True
+        if hasattr(self.renderer, 'cancel'):
+            self.renderer.cancel()
 
 
 class ConcatenatorSignals(QObject):
@@ -18,23 +203,19 @@ class ConcatenatorSignals(QObject):
 
 
 class ConcatenatorWorker(QRunnable):
-    def __init__(self, clips_data_list: list, file_path: str, concat_method: str = 'chain'):
+    BACKENDS = ConcatEngine.BACKENDS
+
+    def __init__(self, clips_data_list: list, file_path: str, concat_method: str = 'chain', backend: str = 'moviepy',
+                 profile: EncodingProfile = None):
         super().__init__()
-        self.video_concat: VideoClip | None = None
         self.signals = ConcatenatorSignals()
-        self.clips = clips_data_list
-        self.file_path = file_path
-        self.concat_method = concat_method
+        self.engine = ConcatEngine(clips_data_list, file_path, concat_method, backend, profile)
 
     def run(self):
         try:
-            self.video_concat = (CompositeVideoClip
-                             .concatenate_videoclips(ClipContentProvider.create_video_clips(self.clips), method=self.concat_method)
-                             .write_videofile(self.file_path, logger=WidgetProgressLogger(self.signals.progress))
-                             )
+            self.engine.render(self.signals.progress.emit)
         except Exception as e:
             self.signals.error.emit("ERROR "+ str(e))
 
         else:
             self.signals.finished.emit()
-
@@ -1,46 +1,188 @@
+import os
+
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+from PyQt6.QtGui import QImage
 from moviepy import VideoFileClip
 
-from src.ffmpeg_extractor import extract_frames_to_folder
+from src.cache import metadata_cache, packet_indexes, PacketIndex
+from src.ffmpeg_extractor import (calc_frames_time_step, analyze_to_folder, draw_waveform, save_peaks, ClipAnalysis,
+                                  decoder_pool, probe_or_parse_streams, probe_video_packets, first_stream)
+from src.options import SNAPS_FOLDER, POSTER_TIME_S, COARSE_STRIP_FRAMES
 from src.schemas import ClipMetaData
+from src.utils import file_fingerprint, extract_file_name, frame_to_image
 
 
 class VideoDataAnalyzerSignals(QObject):
+    probed = pyqtSignal(ClipMetaData)
+    frames_ready = pyqtSignal(list)
     finished = pyqtSignal(ClipMetaData)
     error = pyqtSignal(str)
 
 
 class VideoDataAnalyzer(QRunnable):
-    def __init__(self, file_path: str, preview_frame_height: int):
+    """
+    Probes a clip and extracts its thumbnails. With staged=True a new video clip is reported in stages before
+    the thumbnails are done: probed as soon as its duration and size are known, then frames_ready with the
+    poster frame and frames_ready again with a coarse set of frames, each a list of (time, QImage).
+    """
+    def __init__(self, file_path: str, preview_frame_height: int, refresh: bool = False, staged: bool = False):
         super().__init__()
         self.signals = VideoDataAnalyzerSignals()
         self.video_path = file_path
         self.preview_frame_height = preview_frame_height
+        self.refresh = refresh
+        self.staged = staged
         self.frame_resize_coef = 0
         self.duration_in_px = 0
         self.scaled_frame_width = 0
 
+    def _load_cached(self, fingerprint: str) -> ClipMetaData | None:
+        """ Returns cached analysis if it was made for the same preview height and its frames still exist """
+        data = metadata_cache.load(fingerprint)
+        if data is None or data.get('scaled_height') != self.preview_frame_height:
+            return None
+
+        if not os.path.isdir(data.get('all_frames_folder') or ''):
+            return None
+        if data.get('waveform_path') and not os.path.exists(data['waveform_path']):
+            return None
+
+        clip_metadata = ClipMetaData.from_dict(data)
+        clip_metadata.filename = self.video_path
+        return clip_metadata
+
     def analyze_clip(self) -> ClipMetaData:
-        clip = VideoFileClip(self.video_path)
-        duration_s = clip.duration
-        width, height = clip.size
-        clip.close()
+        fingerprint = file_fingerprint(self.video_path)
+        cached_metadata = None if self.refresh else self._load_cached(fingerprint)
+        if cached_metadata is not None:
+            self._ensure_packet_index(cached_metadata)
+            return cached_metadata
 
-        frame_resize_coef = self.preview_frame_height / height
-        scaled_frame_width = int(width * frame_resize_coef)
-        scaled_frame_width -= scaled_frame_width % 4
-        if scaled_frame_width == 0:
-            scaled_frame_width = 4
+        probe_data = probe_or_parse_streams(self.video_path)
+        video_stream = first_stream(probe_data, 'video')
+        if video_stream is not None and video_stream.get('disposition', {}).get('attached_pic'):
+            video_stream = None  # cover art of an audio file
+        has_audio = first_stream(probe_data, 'audio') is not None
 
-        all_frames_folder = extract_frames_to_folder(self.video_path, scaled_frame_width, self.preview_frame_height)
+        if video_stream is None:
+            if not has_audio:
+                raise ValueError(f'No video or audio streams in {self.video_path}')
+            clip_metadata = self._analyze_audio(probe_data, fingerprint)
+        else:
+            if self.staged:
+                self._report_stages(probe_data, video_stream, fingerprint, has_audio)
+            clip_metadata = self._analyze_video(fingerprint, has_audio)
+
+        metadata_cache.save(fingerprint, clip_metadata.to_dict())
+        self._ensure_packet_index(clip_metadata)
+        return clip_metadata
+
+    def _ensure_packet_index(self, clip_metadata: ClipMetaData):
+        """ Builds the keyframe and packet index once per source, a clip without one is still usable """
+        if not clip_metadata.has_video or (not self.refresh and clip_metadata.packet_index is not None):
+            return
+
+        try:
+            packets = probe_video_packets(self.video_path)
+            packet_indexes.put(clip_metadata.fingerprint, PacketIndex.from_packets(packets))
+        except Exception as e:
+            print(f'Packet index of {self.video_path} was not built: {e}')
 
+    def _analyze_audio(self, probe_data: dict, fingerprint: str) -> ClipMetaData:
+        """ Audio files get their probed duration and a waveform strip drawn from the peaks instead of frames """
+        duration_s = float(probe_data.get('format', {}).get('duration') or 0.0)
+        folder_path, analysis = analyze_to_folder(self.video_path, has_video=False, has_audio=True,
+                                                  overwrite=self.refresh)
+        waveform_path = draw_waveform(analysis.peaks, duration_s, self.preview_frame_height, folder_path)
+        self._save_analysis(fingerprint, analysis)
         return ClipMetaData(self.video_path,
                             duration_s,
-                            width,
-                            height,
-                            scaled_frame_width,
-                            self.preview_frame_height,
-                            all_frames_folder)
+                            scaled_width=self.preview_frame_height,
+                            scaled_height=self.preview_frame_height,
+                            all_frames_folder=folder_path,
+                            fingerprint=fingerprint,
+                            has_video=False,
+                            waveform_path=waveform_path,
+                            silent_ranges=analysis.silent_ranges)
+
+    @staticmethod
+    def _save_analysis(fingerprint: str, analysis: ClipAnalysis):
+        """ Peaks go to the cache entry of the clip next to its json, the ranges are saved with the metadata """
+        if analysis.peaks is not None:
+            save_peaks(fingerprint, analysis.peaks)
+
+    def _scaled_frame_width(self, width: int, height: int) -> int:
+        scaled_frame_width = int(width * self.preview_frame_height / height)
+        scaled_frame_width -= scaled_frame_width % 4
+        return scaled_frame_width or 4
+
+    def _report_stages(self, probe_data: dict, video_stream: dict, fingerprint: str, has_audio: bool):
+        """ Emits the probed clip and its first frames, the analysis goes on whatever happens here """
+        try:
+            duration_s = float(video_stream.get('duration') or probe_data.get('format', {}).get('duration') or 0.0)
+            width, height = int(video_stream.get('width') or 0), int(video_stream.get('height') or 0)
+            if duration_s <= 0 or width <= 0 or height <= 0:
+                return
+
+            clip_metadata = ClipMetaData(self.video_path,
+                                         duration_s,
+                                         width,
+                                         height,
+                                         self._scaled_frame_width(width, height),
+                                         self.preview_frame_height,
+                                         os.path.join(SNAPS_FOLDER, extract_file_name(self.video_path)),
+                                         fingerprint=fingerprint,
+                                         has_audio=has_audio)
+            self.signals.probed.emit(clip_metadata)
+
+            poster_s = min(POSTER_TIME_S, duration_s / 2)
+            frames = self._grab_frames(clip_metadata, [poster_s])
+            if not frames:
+                return
+            self.signals.frames_ready.emit(frames)
+
+            coarse_times = [(idx + 0.5) * duration_s / COARSE_STRIP_FRAMES for idx in range(COARSE_STRIP_FRAMES)]
+            frames += self._grab_frames(clip_metadata, coarse_times)
+            self.signals.frames_ready.emit(frames)
+        except Exception as e:
+            print(f'Staged preview of {self.video_path} failed: {e}')
+        finally:
+            # the thumbnails are extracted next, the session of the staged size is of no use anymore
+            decoder_pool.close_session(self.video_path)
+
+    def _grab_frames(self, clip_metadata: ClipMetaData, times: list[float]) -> list[tuple[float, QImage]]:
+        """ Frames of the times from the decoder pool, read forward in one batch instead of a seek per frame """
+        decoded = decoder_pool.get_frames(self.video_path, times, clip_metadata.scaled_width,
+                                          clip_metadata.scaled_height)
+        return [(time_s, frame_to_image(frame)) for time_s, frame in zip(times, decoded) if frame is not None]
+
+    def _analyze_video(self, fingerprint: str, has_audio: bool) -> ClipMetaData:
+        clip = VideoFileClip(self.video_path, audio=has_audio)
+        duration_s = clip.duration
+        width, height = clip.size
+        clip.close()
+
+        scaled_frame_width = self._scaled_frame_width(width, height)
+        frames_time_step = calc_frames_time_step(scaled_frame_width, duration_s)
+        all_frames_folder, analysis = analyze_to_folder(self.video_path, has_video=True, has_audio=has_audio,
+                                                        frame_width=scaled_frame_width,
+                                                        frame_height=self.preview_frame_height,
+                                                        time_step=frames_time_step, overwrite=self.refresh)
+        self._save_analysis(fingerprint, analysis)
+
+        clip_metadata = ClipMetaData(self.video_path,
+                                     duration_s,
+                                     width,
+                                     height,
+                                     scaled_frame_width,
+                                     self.preview_frame_height,
+                                     all_frames_folder,
+                                     frames_time_step,
+                                     fingerprint,
+                                     has_audio=has_audio,
+                                     black_ranges=analysis.black_ranges,
+                                     silent_ranges=analysis.silent_ranges if has_audio else None)
+        return clip_metadata
 
     def run(self):
         try:
@@ -50,5 +192,3 @@ class VideoDataAnalyzer(QRunnable):
             self.signals.error.emit("ERROR " + str(e))
         else:
             self.signals.finished.emit(clip_metadata)
-
-
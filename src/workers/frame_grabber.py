@@ -0,0 +1,39 @@
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+from PyQt6.QtGui import QImage
+
+from src.ffmpeg_extractor import decoder_pool
+from src.schemas import ClipMetaData
+from src.utils import frame_to_image
+
+
+class FrameGrabberSignals(QObject):
+    finished = pyqtSignal(object, QImage)
+    error = pyqtSignal(str)
+
+
+class FrameGrabber(QRunnable):
+    """ Gets one full-quality frame from the decoder pool. request_key is sent back to drop stale results """
+    def __init__(self, request_key, clip_metadata: ClipMetaData, time_s: float, width: int):
+        super().__init__()
+        self.signals = FrameGrabberSignals()
+        self.request_key = request_key
+        self.clip_metadata = clip_metadata
+        self.time_s = time_s
+        self.width = width
+
+    def _frame_height(self) -> int:
+        height = int(self.width * self.clip_metadata.height / self.clip_metadata.width)
+        return height - height % 2
+
+    def run(self):
+        try:
+            height = self._frame_height()
+            frame = decoder_pool.get_frame(self.clip_metadata.filename, self.time_s, self.width, height)
+            if frame is None:
+                raise ValueError(f'no frame at {self.time_s}s in {self.clip_metadata.filename}')
+            image = frame_to_image(frame)
+
+        except Exception as e:
+            self.signals.error.emit("ERROR " + str(e))
+        else:
+            self.signals.finished.emit(self.request_key, image)
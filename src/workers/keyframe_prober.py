@@ -0,0 +1,24 @@
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from src.ffmpeg_extractor import probe_keyframes
+
+
+class KeyframeProberSignals(QObject):
+    finished = pyqtSignal(str, list)  # video path, keyframe times in seconds
+    error = pyqtSignal(str)
+
+
+class KeyframeProber(QRunnable):
+    """ Reads keyframe times of a video, used to snap seeks while scrubbing """
+    def __init__(self, video_path: str):
+        super().__init__()
+        self.signals = KeyframeProberSignals()
+        self.video_path = video_path
+
+    def run(self):
+        try:
+            keyframes = probe_keyframes(self.video_path)
+        except Exception as e:
+            self.signals.error.emit("ERROR " + str(e))
+        else:
+            self.signals.finished.emit(self.video_path, keyframes)
@@ -0,0 +1,26 @@
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from src.render import run_preflight
+from src.schemas import ClipMetaData
+
+
+class PreflightCheckerSignals(QObject):
+    finished = pyqtSignal(object)  # PreflightReport
+    error = pyqtSignal(str)
+
+
+class PreflightChecker(QRunnable):
+    """ Scans the clips of an export at packet level before rendering, see run_preflight() """
+    def __init__(self, clips_metadata_list: list[ClipMetaData]):
+        super().__init__()
+        self.signals = PreflightCheckerSignals()
+        self.clips = clips_metadata_list
+
+    def run(self):
+        try:
+            report = run_preflight(self.clips)
+
+        except Exception as e:
+            self.signals.error.emit("ERROR " + str(e))
+        else:
+            self.signals.finished.emit(report)
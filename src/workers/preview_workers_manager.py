@@ -1,25 +1,150 @@
-from PyQt6.QtCore import QThreadPool
+import itertools
+from typing import Callable
 
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from src.options import PREVIEW_INTERACTIVE_SLOTS
 from src.schemas import ClipMetaData
 from src.workers import VideoDataAnalyzer
 from src.workers import StoryboardCreator
+from src.workers import FrameGrabber
+from src.workers import ProjectValidator
+from src.workers import ThumbnailDensifier
+from src.thumbnails import ThumbnailIndex
+
+INTERACTIVE, VISIBLE, OFFSCREEN, BACKGROUND = range(4)
+
+
+class ScheduledJobSignals(QObject):
+    done = pyqtSignal(object)
+
+
+class ScheduledJob(QRunnable):
+    """ Runs a preview worker on the pool and reports back when the slot it took is free again """
+    def __init__(self, worker: QRunnable, filename: str | None, kind: int, order: int,
+                 signals: ScheduledJobSignals):
+        super().__init__()
+        self.worker = worker
+        self.filename = filename
+        self.kind = kind
+        self.order = order
+        self.signals = signals
+
+    def run(self):
+        try:
+            self.worker.run()
+        finally:
+            self.signals.done.emit(self)
 
 
 class PreviewWorkersManager:
-    def __init__(self):
+    """
+    Runs preview workers ordered by how close their clip is to the visible part of the timeline.
+
+    Jobs wait in an own queue and are ranked when a pool slot frees, using view_distances (set by the view, returns
+    a function of px between a clip and the viewport, built once per dispatch), so scrolling or zooming re-ranks
+    the waiting work.
+    PREVIEW_INTERACTIVE_SLOTS slots of the pool are kept for hover frames and visible clips, off screen work
+    never takes them. A pool of one thread keeps none, so off screen work still runs there when it is idle.
+
+    parent owns the timer and signals of the manager, the view whose signals call reschedule() should be it.
+    """
+
+    def __init__(self, parent: QObject = None):
         self.thread_pool = QThreadPool()
+        self.view_distances: Callable[[], Callable[[str], float]] | None = None
+        self.pending: list[ScheduledJob] = []
+        self.running = 0
+        self.order = itertools.count()
+        self.job_signals = ScheduledJobSignals(parent)
+        self.job_signals.done.connect(self.on_job_done)
+        self.dispatch_timer = QTimer(parent)
+        self.dispatch_timer.setSingleShot(True)
+        self.dispatch_timer.setInterval(0)
+        self.dispatch_timer.timeout.connect(self.dispatch)
+
+    def _submit(self, worker: QRunnable, filename: str | None = None, kind: int = VISIBLE):
+        """ Jobs submitted in one event loop turn are ranked together """
+        self.pending.append(ScheduledJob(worker, filename, kind, next(self.order), self.job_signals))
+        self.dispatch_timer.start()
+
+    def reschedule(self):
+        """ Called when the visible region changes, waiting jobs are ranked again on the next free slot """
+        self.dispatch_timer.start()
+
+    @staticmethod
+    def _rank(job: ScheduledJob, view_distance: Callable[[str], float] | None) -> tuple:
+        if job.kind != VISIBLE or view_distance is None or job.filename is None:
+            return job.kind, 0, job.order
 
-    def run_storyboard_creation_worker(self, clip_metadata: ClipMetaData, pixels_per_second: int, on_ready, on_error):
+        distance = view_distance(job.filename)
+        return (VISIBLE if distance <= 0 else OFFSCREEN), distance, job.order
+
+    def dispatch(self):
+        slots = self.thread_pool.maxThreadCount()
+        interactive_slots = max(min(PREVIEW_INTERACTIVE_SLOTS, slots - 1), 0)
+        if not self.pending or self.running >= slots:
+            return
+
+        view_distance = self.view_distances() if self.view_distances is not None else None
+        while self.pending and self.running < slots:
+            ranked = [(self._rank(job, view_distance), job) for job in self.pending]
+            rank, job = min(ranked, key=lambda ranked_job: ranked_job[0])
+            if rank[0] > VISIBLE and self.running >= slots - interactive_slots:
+                break
+
+            self.pending.remove(job)
+            self.running += 1
+            self.thread_pool.start(job)
+
+    def on_job_done(self, job: ScheduledJob):
+        self.running -= 1
+        self.dispatch()
+
+    def run_storyboard_creation_worker(self, clip_metadata: ClipMetaData, thumbnail_index: ThumbnailIndex,
+                                       pixels_per_second: int, on_ready, on_error):
+        """ Audio clips have no thumbnail index, their storyboard is the waveform strip stretched to the item """
         duration_in_px = int(clip_metadata.duration_s * pixels_per_second)
         last_frame_width = int(duration_in_px % clip_metadata.scaled_width)  # 675 % 88 = 59
         last_frame_percentage = last_frame_width / clip_metadata.scaled_width  # 0.6704
-        worker = StoryboardCreator(clip_metadata, duration_in_px, last_frame_percentage)
+        if clip_metadata.is_audio_only:
+            last_frame_percentage = 0
+            frame_paths = [clip_metadata.waveform_path]
+        else:
+            frame_paths = thumbnail_index.storyboard_frames(duration_in_px, clip_metadata.scaled_width)
+        worker = StoryboardCreator(clip_metadata, duration_in_px, last_frame_percentage, frame_paths)
+        worker.signals.finished.connect(on_ready)
+        worker.signals.error.connect(on_error)
+        self._submit(worker, clip_metadata.filename)
+
+    def run_video_analysis_worker(self, file_path: str, tracks_view_height, on_ready, on_error, refresh=False,
+                                  on_probed=None, on_frames=None):
+        """ With on_probed and on_frames the clip is reported in stages before its thumbnails are extracted """
+        staged = on_probed is not None
+        worker = VideoDataAnalyzer(file_path, preview_frame_height=tracks_view_height, refresh=refresh, staged=staged)
+        if staged:
+            worker.signals.probed.connect(on_probed)
+            worker.signals.frames_ready.connect(on_frames)
+        worker.signals.finished.connect(on_ready)
+        worker.signals.error.connect(on_error)
+        self._submit(worker, file_path)
+
+    def run_frame_grabber_worker(self, request_key, clip_metadata: ClipMetaData, time_s: float, width: int,
+                                 on_ready, on_error):
+        worker = FrameGrabber(request_key, clip_metadata, time_s, width)
         worker.signals.finished.connect(on_ready)
         worker.signals.error.connect(on_error)
-        self.thread_pool.start(worker)
+        self._submit(worker, clip_metadata.filename, kind=INTERACTIVE)
+
+    def run_project_validation_worker(self, clips_metadata_list: list[ClipMetaData], on_changed, on_missing):
+        worker = ProjectValidator(clips_metadata_list)
+        worker.signals.clip_changed.connect(on_changed)
+        worker.signals.clip_missing.connect(on_missing)
+        self._submit(worker, kind=BACKGROUND)
 
-    def run_video_analysis_worker(self, file_path: str, tracks_view_height, on_ready, on_error):
-        worker = VideoDataAnalyzer(file_path, preview_frame_height=tracks_view_height)
+    def run_densification_worker(self, clip_metadata: ClipMetaData, thumbnail_index: ThumbnailIndex,
+                                 start_s: float, end_s: float, time_step: float, on_ready, on_error):
+        worker = ThumbnailDensifier(clip_metadata, start_s, end_s, time_step, thumbnail_index.dense_folder)
         worker.signals.finished.connect(on_ready)
         worker.signals.error.connect(on_error)
-        self.thread_pool.start(worker)
+        self._submit(worker, clip_metadata.filename)
@@ -0,0 +1,32 @@
+import os
+
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from src.schemas import ClipMetaData
+from src.utils import file_fingerprint
+
+
+class ProjectValidatorSignals(QObject):
+    clip_changed = pyqtSignal(ClipMetaData)
+    clip_missing = pyqtSignal(ClipMetaData)
+    finished = pyqtSignal()
+
+
+class ProjectValidator(QRunnable):
+    """ Compares the fingerprints stored in a loaded project with the current source files """
+    def __init__(self, clips_metadata_list: list[ClipMetaData]):
+        super().__init__()
+        self.signals = ProjectValidatorSignals()
+        self.clips = clips_metadata_list
+
+    def run(self):
+        for clip_metadata in self.clips:
+            try:
+                if not os.path.exists(clip_metadata.filename):
+                    self.signals.clip_missing.emit(clip_metadata)
+                elif file_fingerprint(clip_metadata.filename) != clip_metadata.fingerprint:
+                    self.signals.clip_changed.emit(clip_metadata)
+            except OSError:
+                self.signals.clip_missing.emit(clip_metadata)
+
+        self.signals.finished.emit()
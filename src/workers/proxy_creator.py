@@ -0,0 +1,57 @@
+import os
+
+import imageio_ffmpeg
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from src.options import PROXY_HEIGHT, PROXY_GOP, PROXY_FFMPEG_THREADS
+from src.processes import process_manager, Lane, last_error_line
+
+
+class ProxyCreatorSignals(QObject):
+    finished = pyqtSignal(str, str)  # source file, proxy file
+    error = pyqtSignal(str)
+
+
+class ProxyCreator(QRunnable):
+    """ Transcodes a source to a low resolution short GOP h264 proxy for smooth playback and seeking """
+    def __init__(self, video_path: str, proxy_path: str):
+        super().__init__()
+        self.signals = ProxyCreatorSignals()
+        self.video_path = video_path
+        self.proxy_path = proxy_path
+
+    def create_proxy(self):
+        tmp_path = self.proxy_path + '.part.mp4'
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(),
+            "-y",
+            "-i", self.video_path,
+            "-vf", f"scale=-2:{PROXY_HEIGHT}",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "26",
+            "-g", str(PROXY_GOP),
+            "-keyint_min", str(PROXY_GOP),
+            "-pix_fmt", "yuv420p",
+            "-threads", str(PROXY_FFMPEG_THREADS),
+            "-c:a", "aac",
+            "-b:a", "128k",
+            "-movflags", "+faststart",
+            tmp_path
+        ]
+        result = process_manager.run(command, Lane.IMPORT, cost=PROXY_FFMPEG_THREADS)
+        if result.returncode != 0:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(last_error_line(result))
+
+        os.replace(tmp_path, self.proxy_path)
+
+    def run(self):
+        try:
+            self.create_proxy()
+
+        except Exception as e:
+            self.signals.error.emit("ERROR " + str(e))
+        else:
+            self.signals.finished.emit(self.video_path, self.proxy_path)
@@ -1,6 +1,3 @@
-import math
-import os
-
 import numpy as np
 from PIL import Image
 from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
@@ -15,26 +12,26 @@ class StoryboardCreatorSignals(QObject):
 
 
 class StoryboardCreator(QRunnable):
-    def __init__(self, clip_metadata: ClipMetaData, duration_in_px:int, last_frame_percentage: float):
+    def __init__(self, clip_metadata: ClipMetaData, duration_in_px:int, last_frame_percentage: float,
+                 frame_paths: list[str]):
         super().__init__()
         self.signals = StoryboardCreatorSignals()
         self.clip_metadata = clip_metadata
         self.duration_in_px = duration_in_px
         self.last_frame_percentage = last_frame_percentage
-        self.all_frames_list = [file
-                                for file in os.listdir(self.clip_metadata.all_frames_folder)
-                                if file.endswith(".png")]
+        self.frame_paths = frame_paths
 
     def _prepare_frames(self):
-        frames_count = math.ceil(self.duration_in_px / self.clip_metadata.scaled_width)
-        step = len(self.all_frames_list) // frames_count
-        # print(f'\n[FRAMES COUNT ] = {frames_count}, step: {step}')
-        for frame_name in self.all_frames_list[::step]:
-            with Image.open(os.path.join(self.clip_metadata.all_frames_folder, frame_name)) as img:
-                yield img
+        """ Frames of the storyboard tiles. Neighbouring tiles often share a frame, it is decoded once """
+        loaded = {}
+        for frame_path in self.frame_paths:
+            if frame_path not in loaded:
+                with Image.open(frame_path) as img:
+                    loaded[frame_path] = np.array(img.convert('RGB'))
+            yield loaded[frame_path]
 
     def create_storyboard_frames(self) ->list[np.array]:
-        frames = [np.array(frame) for frame in self._prepare_frames()]
+        frames = list(self._prepare_frames())
         if self.last_frame_percentage:
             last_frame = self._truncate_frame(frames[-1], self.last_frame_percentage)
             frames[-1] = last_frame
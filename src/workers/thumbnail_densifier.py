@@ -0,0 +1,36 @@
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from src.ffmpeg_extractor import extract_frames_range
+from src.schemas import ClipMetaData
+
+
+class ThumbnailDensifierSignals(QObject):
+    finished = pyqtSignal(ClipMetaData, list)  # clip metadata, [(time_s, frame path), ...]
+    error = pyqtSignal(str)
+
+
+class ThumbnailDensifier(QRunnable):
+    """ Extracts frames with a finer time step for one time range of a clip into its dense thumbnails folder """
+    def __init__(self, clip_metadata: ClipMetaData, start_s: float, end_s: float, time_step: float,
+                 dense_folder: str):
+        super().__init__()
+        self.signals = ThumbnailDensifierSignals()
+        self.clip_metadata = clip_metadata
+        self.start_s = start_s
+        self.end_s = end_s
+        self.time_step = time_step
+        self.dense_folder = dense_folder
+
+    def run(self):
+        try:
+            frames = extract_frames_range(self.clip_metadata.filename,
+                                          self.start_s,
+                                          self.end_s,
+                                          self.time_step,
+                                          self.clip_metadata.scaled_width,
+                                          self.clip_metadata.scaled_height,
+                                          self.dense_folder)
+        except Exception as e:
+            self.signals.error.emit("ERROR " + str(e))
+        else:
+            self.signals.finished.emit(self.clip_metadata, frames)